@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Grafana HTTP API used by the benchmarks.
+
+Implements the endpoints the MCP server calls: ``/api/folders``,
+``/api/dashboards/db``, ``/api/dashboards/uid/<uid>``, the public-dashboards
+endpoints and ``/api/ds/query``. Every response is delayed by a configurable
+latency, and query results hold a configurable number of rows per frame.
+
+Run it on its own to point a manually started MCP server at it:
+
+    python benchmarks/fake_grafana.py --port 3000 --latency-ms 20 --rows 1000
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeGrafanaState:
+    """Folders, dashboards and public dashboards held by the fake server."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rows: int = 100, series: int = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rows = rows
+        self.series = series
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.folders: Dict[str, Dict[str, Any]] = {}
+        self.dashboards: Dict[str, Dict[str, Any]] = {}
+        self.public: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self._frame_cache: Dict[int, bytes] = {}
+
+    def delay(self) -> None:
+        latency = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def frame_json(self) -> bytes:
+        """Serialized data frame with ``rows`` rows of a time column and ``series`` value columns."""
+        frame = self._frame_cache.get(self.rows)
+        if frame is None:
+            start = 1_700_000_000_000
+            fields = [{"name": "time", "type": "time"}]
+            fields += [{"name": f"value_{i}", "type": "number"} for i in range(self.series)]
+            values = [[start + i * 60_000 for i in range(self.rows)]]
+            values += [[float(i % 97) for i in range(self.rows)] for _ in range(self.series)]
+            frame = json.dumps({"schema": {"fields": fields}, "data": {"values": values}}).encode()
+            self._frame_cache[self.rows] = frame
+        return frame
+
+
+class FakeGrafanaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40ms per response
+    disable_nagle_algorithm = True
+    state: FakeGrafanaState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        state = self.state
+        with state.lock:
+            state.requests += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        state.delay()
+
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        if path == "/api/folders":
+            if method == "GET":
+                return self._folders(parse_qs(url.query).get("parentUid", [None])[0])
+            return self._create_folder(body)
+        if path == "/api/dashboards/db" and method == "POST":
+            return self._save_dashboard(body)
+        if path == "/api/ds/query" and method == "POST":
+            return self._query(body)
+        if path.startswith("/api/dashboards/uid/"):
+            uid, _, rest = path[len("/api/dashboards/uid/"):].partition("/")
+            if rest == "public-dashboards":
+                return self._share(uid) if method == "POST" else self._public(uid)
+            if not rest and method == "GET":
+                return self._dashboard(uid)
+        self._send({"message": "Not found"}, 404)
+
+    def _send(self, obj: Any, status: int = 200) -> None:
+        self._send_bytes(json.dumps(obj).encode(), status)
+
+    def _send_bytes(self, body: bytes, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _folders(self, parent_uid: Optional[str]) -> None:
+        with self.state.lock:
+            folders = [f for f in self.state.folders.values() if f.get("parentUid") == parent_uid]
+        self._send(folders)
+
+    def _create_folder(self, body: Dict[str, Any]) -> None:
+        with self.state.lock:
+            folder_id = next(self.state.ids)
+            folder = {"id": folder_id, "uid": f"folder-{folder_id}", "title": body["title"],
+                      "parentUid": body.get("parentUid")}
+            self.state.folders[folder["uid"]] = folder
+        self._send(folder)
+
+    def _save_dashboard(self, body: Dict[str, Any]) -> None:
+        dashboard = body["dashboard"]
+        with self.state.lock:
+            previous = self.state.dashboards.get(dashboard["uid"])
+            version = previous["dashboard"].get("version", 0) + 1 if previous else 1
+            self.state.dashboards[dashboard["uid"]] = {
+                "dashboard": {**dashboard, "version": version},
+                "meta": {"folderId": body.get("folderId"), "version": version},
+            }
+        self._send({"id": version, "uid": dashboard["uid"], "url": f"/d/{dashboard['uid']}",
+                    "status": "success", "version": version})
+
+    def _dashboard(self, uid: str) -> None:
+        with self.state.lock:
+            dashboard = self.state.dashboards.get(uid)
+        if dashboard is None:
+            return self._send({"message": "Dashboard not found"}, 404)
+        self._send(dashboard)
+
+    def _share(self, uid: str) -> None:
+        with self.state.lock:
+            public = self.state.public.setdefault(
+                uid, {"uid": f"public-{uid}", "dashboardUid": uid, "accessToken": f"token-{uid}", "isEnabled": True})
+        self._send(public)
+
+    def _public(self, uid: str) -> None:
+        with self.state.lock:
+            public = self.state.public.get(uid)
+        if public is None:
+            return self._send({"message": "Public dashboard not found"}, 404)
+        self._send(public)
+
+    def _query(self, body: Dict[str, Any]) -> None:
+        # Results are assembled from the pre-serialized frame to keep the
+        # server's own cost out of the measurements.
+        frame = self.state.frame_json()
+        parts = [json.dumps(query["refId"]).encode() + b':{"status":200,"frames":[' + frame + b"]}"
+                 for query in body["queries"]]
+        self._send_bytes(b'{"results":{' + b",".join(parts) + b"}}")
+
+
+class FakeGrafana:
+    """Fake Grafana server running in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options: Any):
+        self.state = FakeGrafanaState(**options)
+        handler = type("Handler", (FakeGrafanaHandler,), {"state": self.state})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_dashboard(self, uid: str, panels: int, datasource_uid: str) -> None:
+        """Store a dashboard with ``panels`` single-query ClickHouse panels."""
+        panel_list: List[Dict[str, Any]] = []
+        for i in range(panels):
+            datasource = {"type": "grafana-clickhouse-datasource", "uid": datasource_uid}
+            panel_list.append({
+                "id": i + 1,
+                "title": f"Panel {i + 1}",
+                "type": "timeseries",
+                "datasource": datasource,
+                "targets": [{"refId": "A", "datasource": datasource, "format": 0,
+                             "rawSql": f"SELECT time, value FROM metrics_{i} WHERE $__timeFilter(time)"}],
+            })
+        dashboard = {"uid": uid, "title": uid, "panels": panel_list, "time": {"from": "now-1d", "to": "now"}}
+        with self.state.lock:
+            self.state.dashboards[uid] = {"dashboard": dashboard, "meta": {"version": 1}}
+
+    def start(self) -> "FakeGrafana":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeGrafana":
+        return self.start()
+
+    def __exit__(self, *exc_info: Tuple[Any, ...]) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Grafana HTTP API for benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform random variation of the delay")
+    parser.add_argument("--rows", type=int, default=100, help="rows per query result frame")
+    parser.add_argument("--series", type=int, default=1, help="value columns per query result frame")
+    args = parser.parse_args()
+
+    server = FakeGrafana(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         rows=args.rows, series=args.series)
+    print(f"Fake Grafana listening on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
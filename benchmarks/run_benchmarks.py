@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of the Grafana MCP tools against a local fake Grafana.
+
+Each scenario calls a tool ``--requests`` times at each ``--concurrency``
+level and records latency percentiles and throughput. Results are written as
+JSON so runs from different commits can be compared, either by hand or with
+``--baseline``:
+
+    python benchmarks/run_benchmarks.py --latency-ms 5 --output before.json
+    git checkout my-branch
+    python benchmarks/run_benchmarks.py --latency-ms 5 --baseline before.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from fake_grafana import FakeGrafana  # noqa: E402
+
+DATASOURCE_UID = "bench-clickhouse"
+BENCH_DASHBOARD_UID = "bench-dashboard"
+
+Operation = Callable[[int], Awaitable[Any]]
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def _summary(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(values), 3) if values else 0.0,
+            "p50": round(_percentile(values, 50), 3),
+            "p90": round(_percentile(values, 90), 3),
+            "p99": round(_percentile(values, 99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        },
+    }
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("error"))
+
+
+async def _run_level(operation: Operation, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    from grafana_mcp.connection import get_async_client
+
+    for i in range(warmup):
+        await operation(-1 - i)
+
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in iter(lambda: next(counter), None):
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            try:
+                failed = _is_error(await operation(i))
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+    await get_async_client().aclose()
+    return _summary(latencies, errors, wall)
+
+
+def _reset_caches() -> None:
+    from grafana_mcp import mcp_server
+    from grafana_mcp.cost import get_cost_guard
+    from grafana_mcp.dashboard_cache import get_dashboard_cache
+    from grafana_mcp.folders import get_folder_cache
+    from grafana_mcp.query_cache import get_query_cache
+    from grafana_mcp.schema import clear_schema_catalogs
+    from grafana_mcp.search_index import get_dashboard_index
+    from grafana_mcp.timeseries_cache import get_timeseries_cache
+
+    get_folder_cache().clear()
+    get_query_cache().clear()
+    mcp_server._public_tokens.clear()
+    get_dashboard_cache().clear()
+    get_cost_guard().clear()
+    get_timeseries_cache().clear()
+    clear_schema_catalogs()
+    get_dashboard_index().clear()
+
+
+def _scenarios() -> Dict[str, Callable[[str], Operation]]:
+    from grafana_mcp import mcp_server
+
+    # Each factory gets an id unique to the run and level, so names created
+    # by one level never exist on the server before the next one starts.
+    def create_dashboard(run_id: str) -> Operation:
+        # Distinct SQL per call so every call validates against the server
+        return lambda i: mcp_server.create_time_series_dashboard(
+            title=f"Bench {run_id} {i}",
+            raw_sql=f"SELECT time, value FROM metrics WHERE $__timeFilter(time) AND shard = {i} "
+                    "GROUP BY time ORDER BY time",
+            folder=f"bench/{run_id}",
+        )
+
+    def check_dashboard(run_id: str) -> Operation:
+        return lambda i: mcp_server.check_dashboard_data(BENCH_DASHBOARD_UID)
+
+    def check_dashboard_count(run_id: str) -> Operation:
+        return lambda i: mcp_server.check_dashboard_data(BENCH_DASHBOARD_UID, count_datapoints=True)
+
+    def folder_cold(run_id: str) -> Operation:
+        return lambda i: mcp_server.get_or_create_folder(f"bench-{run_id}/cold/{i}")
+
+    def folder_warm(run_id: str) -> Operation:
+        return lambda i: mcp_server.get_or_create_folder(f"bench-{run_id}/warm")
+
+    return {
+        "create_time_series_dashboard": create_dashboard,
+        "check_dashboard_data": check_dashboard,
+        "check_dashboard_data_count": check_dashboard_count,
+        "get_or_create_folder_cold": folder_cold,
+        "get_or_create_folder_warm": folder_warm,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the fake server, run the selected scenarios and collect the results."""
+    server = FakeGrafana(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rows=args.rows,
+                         series=args.series).start()
+    server.add_dashboard(BENCH_DASHBOARD_UID, args.panels, DATASOURCE_UID)
+    os.environ.update({
+        "GRAFANA_URL": server.url,
+        "GRAFANA_API_TOKEN": "bench-token",
+        "GRAFANA_DATASOURCE_UID": DATASOURCE_UID,
+    })
+
+    from grafana_mcp.connection import reset_connections
+
+    reset_connections()
+    scenarios = _scenarios()
+    run_id = str(int(time.time()))
+    selected = args.scenario or list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        server.stop()
+        raise SystemExit(f"Unknown scenario(s) {unknown}, expected one of {list(scenarios)}")
+    results = []
+    try:
+        for name in selected:
+            for concurrency in args.concurrency:
+                _reset_caches()
+                requests_before = server.state.requests
+                summary = asyncio.run(_run_level(scenarios[name](f"{run_id}-{name}-c{concurrency}"), args.requests, concurrency, args.warmup))
+                summary["upstream_requests"] = server.state.requests - requests_before
+                results.append({"scenario": name, "concurrency": concurrency, **summary})
+                print(f"{name:32} c={concurrency:<4} p50={summary['latency_ms']['p50']:9.2f}ms "
+                      f"p99={summary['latency_ms']['p99']:9.2f}ms {summary['throughput_rps']:9.1f} req/s "
+                      f"errors={summary['errors']}", file=sys.stderr)
+    finally:
+        reset_connections()
+        server.stop()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "rows": args.rows,
+                "series": args.series,
+                "panels": args.panels,
+            },
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of p50, p99 and throughput for results present in both runs."""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    changes = []
+    for result in current["results"]:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        change = {"scenario": result["scenario"], "concurrency": result["concurrency"]}
+        for key, now, then in (
+            ("p50", result["latency_ms"]["p50"], before["latency_ms"]["p50"]),
+            ("p99", result["latency_ms"]["p99"], before["latency_ms"]["p99"]),
+            ("throughput", result["throughput_rps"], before["throughput_rps"]),
+        ):
+            change[f"{key}_change_pct"] = round((now - then) / then * 100, 1) if then else None
+        changes.append(change)
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Grafana MCP tools against a fake Grafana.")
+    parser.add_argument("--scenario", action="append", help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 4, 16],
+                        help="comma-separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--requests", type=int, default=200, help="calls per scenario and level (default: 200)")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls before each level (default: 5)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="server latency per request (default: 5)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random variation of the latency")
+    parser.add_argument("--rows", type=int, default=1000, help="rows per query result frame (default: 1000)")
+    parser.add_argument("--series", type=int, default=1, help="value columns per frame (default: 1)")
+    parser.add_argument("--panels", type=int, default=20, help="panels of the checked dashboard (default: 20)")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = run(args)
+    if baseline is not None:
+        results["comparison"] = {"baseline": baseline["meta"], "changes": compare(results, baseline)}
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
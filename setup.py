@@ -10,10 +10,12 @@ setup(
         "grafana_mcp": ["dashboard.json"],
     },
     install_requires=[
-        "fastmcp>2.3",
+        "fastmcp>=2.9",
         "grafana-client>=4.3.2",
         "python-dotenv>=1.1.0",
         "requests>=2.31",
+        "httpx[http2]>=0.25",
+        "numpy>=1.22",
     ],
     python_requires=">=3.7",
 )
@@ -2,13 +2,24 @@
 """Grafana MCP server entry point.
 
 This module runs the ``FastMCP`` server exposing the MCP API at ``/mcp``.
-Executing ``python -m grafana_mcp`` starts the built-in HTTP server.
+Executing ``python -m grafana_mcp`` starts the built-in HTTP server. With
+``GRAFANA_WORKERS`` above 1, that many worker processes serve the MCP API
+on one port through uvicorn.
 """
 
-from grafana_mcp.mcp_server import mcp
+import fastmcp
+
+from grafana_mcp.config import get_settings
+from grafana_mcp.mcp_server import create_app
 
 if __name__ == "__main__":
     """Main entry point for the application."""
     # print("Starting Grafana MCP server...")
+    import uvicorn
 
-    mcp.run(transport="sse", host="0.0.0.0")
+    workers = get_settings().workers
+    if workers > 1:
+        uvicorn.run("grafana_mcp.mcp_server:create_app", factory=True, workers=workers,
+                    host="0.0.0.0", port=fastmcp.settings.port)
+    else:
+        uvicorn.run(create_app(transport="sse"), host="0.0.0.0", port=fastmcp.settings.port)
@@ -0,0 +1,217 @@
+"""
+Admission control for datasource queries.
+
+Every ``/api/ds/query`` request goes through the ``DatasourceLimiter`` of its
+datasource, which caps the number of queries running at once and their rate
+with a token bucket. Queries over the cap wait in a bounded queue. Waiters
+are served round-robin across MCP sessions, so one agent firing hundreds of
+queries does not starve the others. Once the queue is full, new queries fail
+at once with ``QueueFullError`` instead of piling more load on Grafana.
+
+Waiters are ``concurrent.futures.Future`` objects, so queries from the
+server's event loop and from ``run_sync`` share the same limits.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from grafana_mcp.config import get_settings
+from grafana_mcp.metrics import DATASOURCE_QUEUE_WAIT
+from grafana_mcp.profiling import record_wait
+
+DEFAULT_CLIENT = "default"
+
+# Fairness key of the current MCP session, set per tool call by the server
+client_id: contextvars.ContextVar[str] = contextvars.ContextVar("grafana_mcp_client_id", default=DEFAULT_CLIENT)
+
+_limiters: Dict[str, "DatasourceLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a query is rejected because the datasource queue is full."""
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``burst`` tokens."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it.
+
+        The balance may go negative, which makes later callers wait in turn.
+        A rate of zero or less disables the limit.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class DatasourceLimiter:
+    """Concurrency cap, rate limit and fair bounded queue of one datasource."""
+
+    def __init__(
+        self,
+        name: str = "",
+        max_concurrency: int = 8,
+        max_queue: int = 64,
+        rate: float = 0.0,
+        burst: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self._bucket = TokenBucket(rate, burst, clock)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._active = 0
+        # Waiters per client, in the order the clients are served
+        self._waiting: "collections.OrderedDict[str, Deque[concurrent.futures.Future]]" = collections.OrderedDict()
+        self._queued = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, client: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a query slot for the duration of the block.
+
+        Args:
+            client (Optional[str]): Fairness key; defaults to the current MCP session.
+
+        Raises:
+            QueueFullError: If all slots are busy and the queue is full.
+        """
+        start = self._clock()
+        await self._acquire(client or client_id.get())
+        try:
+            delay = self._bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._record_wait(self._clock() - start)
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, client: str) -> None:
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                self._admitted += 1
+                return
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(
+                    f"Too many queries waiting for datasource '{self.name}' ({self._queued} queued, "
+                    f"{self._active} running); retry later.")
+            waiter: concurrent.futures.Future = concurrent.futures.Future()
+            self._waiting.setdefault(client, collections.deque()).append(waiter)
+            self._queued += 1
+
+        try:
+            await asyncio.wrap_future(waiter)
+        except asyncio.CancelledError:
+            with self._lock:
+                withdrawn = waiter.cancel()
+                waiters = self._waiting.get(client)
+                # _release drops cancelled waiters it comes across
+                if withdrawn and waiters is not None and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiting[client]
+                    self._queued -= 1
+            # Otherwise the slot was handed over just before the cancellation
+            if not withdrawn:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiting:
+                client, waiters = next(iter(self._waiting.items()))
+                waiter = waiters.popleft()
+                self._queued -= 1
+                # Serve the client's next query after every other waiting client
+                del self._waiting[client]
+                if waiters:
+                    self._waiting[client] = waiters
+                if waiter.set_running_or_notify_cancel():
+                    # The slot passes to the waiter, so the active count is unchanged
+                    self._admitted += 1
+                    waiter.set_result(None)
+                    return
+            self._active -= 1
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waited += 1
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+        DATASOURCE_QUEUE_WAIT.observe(seconds, self.name)
+        record_wait("datasource_queue", seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the limiter's state and counters.
+
+        Returns:
+            Dict[str, Any]: 'active' and 'queued' queries, the configured 'max_concurrency' and
+            'max_queue', 'admitted' and 'rejected' totals, and the 'wait_avg_ms' and 'wait_max_ms'
+            spent before running.
+        """
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "wait_avg_ms": round(self._wait_total / self._waited * 1000, 1) if self._waited else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 1),
+            }
+
+
+def get_limiter(datasource_uid: str) -> DatasourceLimiter:
+    """Get the process-wide limiter of a datasource."""
+    limiter = _limiters.get(datasource_uid)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(datasource_uid)
+            if limiter is None:
+                settings = get_settings()
+                limiter = _limiters[datasource_uid] = DatasourceLimiter(
+                    name=datasource_uid,
+                    max_concurrency=settings.datasource_max_concurrency,
+                    max_queue=settings.datasource_max_queue,
+                    rate=settings.datasource_rate_limit,
+                    burst=settings.datasource_rate_burst,
+                )
+    return limiter
+
+
+def get_admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the ``stats()`` of every datasource limiter, keyed by datasource UID."""
+    with _limiters_lock:
+        limiters = list(_limiters.items())
+    return {uid: limiter.stats() for uid, limiter in limiters}
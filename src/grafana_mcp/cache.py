@@ -0,0 +1,211 @@
+"""
+In-memory caches shared by the Grafana MCP server.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from grafana_mcp.disk_cache import DiskCache
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire ``ttl`` seconds after being set."""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, or ``default`` if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally with a custom time to live."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a value if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every entry whose key matches ``predicate``."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all values."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit and miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class LRUCache(TTLCache):
+    """TTL cache bounded by a total byte budget, evicting least recently used entries.
+
+    Entry sizes are given by the caller when storing a value, typically the
+    size of the response body the value was decoded from.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        super().__init__(ttl, clock=clock)
+        self.max_bytes = max_bytes
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 1) -> None:
+        """Store a value of ``size`` bytes, evicting old entries to stay in budget."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (expires_at, value)
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, miss and size counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._bytes -= self._sizes.pop(key, 0)
+
+
+class TieredCache:
+    """In-memory cache backed by a namespace of the shared disk cache.
+
+    Misses in memory are looked up on disk and promoted to memory for the rest
+    of their TTL; values are written to both. Values must be JSON-serializable
+    and keys made of strings, numbers, None and tuples.
+    """
+
+    def __init__(self, memory: TTLCache, disk: "DiskCache", namespace: str):
+        self.memory = memory
+        self.disk = disk
+        self.namespace = namespace
+        self.ttl = memory.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value from memory, else from disk, or ``default``."""
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        entry = self.disk.get(self.namespace, key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        self._promote(key, value, expires_at - time.time())
+        return value
+
+    def _promote(self, key: Hashable, value: Any, ttl: float) -> None:
+        if isinstance(self.memory, LRUCache):
+            self.memory.set(key, value, ttl=ttl, size=len(json.dumps(value)))
+        else:
+            self.memory.set(key, value, ttl=ttl)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, **kwargs: Any) -> None:
+        """Store a value in memory and on disk; extra arguments go to the memory cache."""
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl=ttl, **kwargs)
+        self.disk.set(self.namespace, key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.memory.delete(key)
+        self.disk.delete(self.namespace, key)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        self.memory.delete_where(predicate)
+        self.disk.delete_where(self.namespace, predicate)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear(self.namespace)
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters of the memory cache; disk hits count as memory misses."""
+        return self.memory.stats()
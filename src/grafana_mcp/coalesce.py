@@ -0,0 +1,115 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When several tool calls need the same upstream result at the same moment,
+only the first one runs it; the others wait for its outcome, result or
+exception. Nothing is kept once the call has finished, so this only
+deduplicates concurrent work and is independent of the TTL caches.
+
+The shared call runs in its own task, so a waiter that is cancelled does not
+cancel it for the others; it is only cancelled once every waiter is gone.
+Outcomes are passed through a ``concurrent.futures.Future``, so waiters may
+run on any event loop. Results are shared and must not be mutated.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_coalescer: Optional["Coalescer"] = None
+
+
+class _Call:
+    __slots__ = ("future", "task", "loop", "waiters")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.task: Optional[asyncio.Future] = None
+        self.loop = loop
+        self.waiters = 0
+
+
+class Coalescer:
+    """Share the outcome of in-flight calls among callers using the same key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._started = 0
+        self._coalesced = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run ``factory()``, or wait for the identical call already in flight.
+
+        Args:
+            key (Hashable): Identity of the call.
+            factory (Callable[[], Awaitable[T]]): Coroutine function making the call.
+
+        Returns:
+            T: The result of the call, shared with the other waiters.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(asyncio.get_running_loop())
+                call.task = asyncio.ensure_future(self._run(key, call, factory))
+                self._started += 1
+            else:
+                self._coalesced += 1
+            call.waiters += 1
+
+        try:
+            # Shielded so that cancelling one waiter does not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(call.future))
+        except asyncio.CancelledError:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.future.done()
+                if abandoned and self._calls.get(key) is call:
+                    del self._calls[key]
+            if abandoned:
+                call.loop.call_soon_threadsafe(call.task.cancel)
+            raise
+
+    async def _run(self, key: Hashable, call: _Call, factory: Callable[[], Awaitable[T]]) -> None:
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self._finish(key, call)
+            call.future.cancel()
+        except BaseException as e:
+            self._finish(key, call)
+            call.future.set_exception(e)
+        else:
+            self._finish(key, call)
+            call.future.set_result(result)
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        # Callers arriving from now on start a new call
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of calls 'started', 'coalesced' into one in flight, and 'in_flight' now."""
+        with self._lock:
+            return {"started": self._started, "coalesced": self._coalesced, "in_flight": len(self._calls)}
+
+
+def request_key(method: str, path: str, kwargs: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Build the coalescing key of an HTTP request from its method, path and a hash of its arguments."""
+    arguments = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=repr)
+    return method.upper(), path, hashlib.sha256(arguments.encode()).hexdigest()
+
+
+def get_coalescer() -> Coalescer:
+    """Get the process-wide coalescer."""
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = Coalescer()
+    return _coalescer
@@ -0,0 +1,137 @@
+"""
+Configuration for the Grafana MCP server.
+
+Environment variables are read once per process and exposed as a frozen
+``Settings`` object. Call ``get_settings.cache_clear()`` to pick up changes.
+A ``.env`` file is loaded into the environment the first time the settings
+are read, not when the server module is imported.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+DEFAULT_GRAFANA_URL = "https://pytorchci.grafana.net"
+DEFAULT_DATASOURCE_UID = "Clickhouse"
+
+_dotenv_loaded = False
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Resolved server settings."""
+
+    grafana_url: str
+    api_token: Optional[str]
+    datasource_uid: str
+    pool_size: int = 10
+    timeout: float = 30.0
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    folder_cache_ttl: float = 300.0
+    query_cache_ttl: float = 60.0
+    query_cache_max_bytes: int = 64 * 1024 * 1024
+    query_cache_bucket: float = 60.0
+    query_batch_size: int = 10
+    query_concurrency: int = 4
+    otel_enabled: bool = False
+    schema_cache_ttl: float = 600.0
+    dashboard_index_ttl: float = 300.0
+    dashboard_index_max_age: float = 86400.0
+    dashboard_index_revalidations: int = 50
+    datasource_max_concurrency: int = 8
+    datasource_max_queue: int = 64
+    datasource_rate_limit: float = 0.0
+    datasource_rate_burst: float = 10.0
+    cache_dir: Optional[str] = None
+    disk_cache_max_bytes: int = 512 * 1024 * 1024
+    dashboard_cache_ttl: float = 30.0
+    dashboard_cache_max_bytes: int = 64 * 1024 * 1024
+    workers: int = 1
+    delta_cache_max_bytes: int = 128 * 1024 * 1024
+    delta_cache_max_age: float = 3600.0
+    delta_cache_overlap: float = 300.0
+    query_max_rows: int = 1_000_000_000
+    query_max_bytes: int = 0
+    query_over_budget: str = "narrow"
+    cost_cache_ttl: float = 300.0
+    profile_sample_rate: float = 0.0
+    profile_interval: float = 0.005
+    profile_keep: int = 10
+    admin_token: Optional[str] = None
+    warmup: bool = True
+
+
+def _load_dotenv() -> None:
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        import dotenv
+        dotenv.load_dotenv()
+        _dotenv_loaded = True
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Read the server settings from the environment.
+
+    Returns:
+        Settings: The settings, cached for the lifetime of the process.
+    """
+    _load_dotenv()
+    return Settings(
+        grafana_url=(os.getenv("GRAFANA_URL") or DEFAULT_GRAFANA_URL).rstrip("/"),
+        api_token=os.getenv("GRAFANA_API_TOKEN") or None,
+        datasource_uid=os.getenv("GRAFANA_DATASOURCE_UID") or DEFAULT_DATASOURCE_UID,
+        pool_size=_env_int("GRAFANA_POOL_SIZE", 10),
+        timeout=_env_float("GRAFANA_TIMEOUT", 30.0),
+        max_retries=_env_int("GRAFANA_MAX_RETRIES", 3),
+        backoff_factor=_env_float("GRAFANA_RETRY_BACKOFF", 0.5),
+        folder_cache_ttl=_env_float("GRAFANA_FOLDER_CACHE_TTL", 300.0),
+        query_cache_ttl=_env_float("GRAFANA_QUERY_CACHE_TTL", 60.0),
+        query_cache_max_bytes=_env_int("GRAFANA_QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        query_cache_bucket=_env_float("GRAFANA_QUERY_CACHE_BUCKET", 60.0),
+        query_batch_size=_env_int("GRAFANA_QUERY_BATCH_SIZE", 10),
+        query_concurrency=_env_int("GRAFANA_QUERY_CONCURRENCY", 4),
+        otel_enabled=_env_bool("GRAFANA_OTEL_ENABLED", False),
+        schema_cache_ttl=_env_float("GRAFANA_SCHEMA_CACHE_TTL", 600.0),
+        dashboard_index_ttl=_env_float("GRAFANA_DASHBOARD_INDEX_TTL", 300.0),
+        dashboard_index_max_age=_env_float("GRAFANA_DASHBOARD_INDEX_MAX_AGE", 86400.0),
+        dashboard_index_revalidations=_env_int("GRAFANA_DASHBOARD_INDEX_REVALIDATIONS", 50),
+        datasource_max_concurrency=_env_int("GRAFANA_DS_MAX_CONCURRENCY", 8),
+        datasource_max_queue=_env_int("GRAFANA_DS_MAX_QUEUE", 64),
+        datasource_rate_limit=_env_float("GRAFANA_DS_RATE_LIMIT", 0.0),
+        datasource_rate_burst=_env_float("GRAFANA_DS_RATE_BURST", 10.0),
+        cache_dir=os.getenv("GRAFANA_CACHE_DIR") or None,
+        disk_cache_max_bytes=_env_int("GRAFANA_DISK_CACHE_MAX_BYTES", 512 * 1024 * 1024),
+        dashboard_cache_ttl=_env_float("GRAFANA_DASHBOARD_CACHE_TTL", 30.0),
+        dashboard_cache_max_bytes=_env_int("GRAFANA_DASHBOARD_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        workers=_env_int("GRAFANA_WORKERS", 1),
+        delta_cache_max_bytes=_env_int("GRAFANA_DELTA_CACHE_MAX_BYTES", 128 * 1024 * 1024),
+        delta_cache_max_age=_env_float("GRAFANA_DELTA_CACHE_MAX_AGE", 3600.0),
+        delta_cache_overlap=_env_float("GRAFANA_DELTA_CACHE_OVERLAP", 300.0),
+        query_max_rows=_env_int("GRAFANA_QUERY_MAX_ROWS", 1_000_000_000),
+        query_max_bytes=_env_int("GRAFANA_QUERY_MAX_BYTES", 0),
+        query_over_budget=(os.getenv("GRAFANA_QUERY_OVER_BUDGET") or "narrow").strip().lower(),
+        cost_cache_ttl=_env_float("GRAFANA_COST_CACHE_TTL", 300.0),
+        profile_sample_rate=_env_float("GRAFANA_PROFILE_SAMPLE_RATE", 0.0),
+        profile_interval=_env_float("GRAFANA_PROFILE_INTERVAL", 0.005),
+        profile_keep=_env_int("GRAFANA_PROFILE_KEEP", 10),
+        admin_token=os.getenv("GRAFANA_MCP_ADMIN_TOKEN") or None,
+        warmup=_env_bool("GRAFANA_WARMUP", True),
+    )
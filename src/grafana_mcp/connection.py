@@ -0,0 +1,278 @@
+"""
+Process-wide HTTP connection layer for Grafana.
+
+The tools use an ``httpx.AsyncClient`` (HTTP/2 when ``h2`` is installed), one
+per event loop, so repeated tool calls reuse pooled TCP/TLS connections
+instead of paying a new handshake each time. Synchronous callers run
+coroutines through ``run_sync``, which keeps a single background loop so that
+its async client and connections survive between calls.
+``get_pool_stats`` reports how many requests of the async clients reused a
+pooled connection, as told by the connection events httpcore traces.
+
+The synchronous ``requests`` session and ``GrafanaApi`` client live in
+``grafana_mcp.session``. They, like ``httpx``, are imported on first use so
+that starting the server does not pay for them.
+"""
+
+import asyncio
+import importlib.util
+import sys
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, TypeVar
+
+from grafana_mcp import __version__
+from grafana_mcp.coalesce import get_coalescer, request_key
+from grafana_mcp.config import Settings, get_settings
+from grafana_mcp.metrics import (
+    UPSTREAM_DURATION, UPSTREAM_REQUEST_BYTES, UPSTREAM_RESPONSE_BYTES, UPSTREAM_RETRIES, endpoint_template, span)
+from grafana_mcp.profiling import record_wait
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from grafana_client import GrafanaApi
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"])
+# Read-only methods whose concurrent identical requests are coalesced by default
+COALESCED_METHODS = frozenset(["GET", "HEAD"])
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+# Requests sent by the async clients, and whether they reused a pooled connection
+_async_counts = {"requests": 0, "hits": 0, "misses": 0}
+
+
+def _require_token(settings: Settings) -> str:
+    if not settings.api_token:
+        raise ValueError("GRAFANA_API_TOKEN environment variable is not set.")
+    return settings.api_token
+
+
+def get_session() -> "requests.Session":
+    """Get the shared synchronous Grafana session, see ``grafana_mcp.session``."""
+    from grafana_mcp import session
+    return session.get_session()
+
+
+def get_grafana_client() -> "GrafanaApi":
+    """Get the shared Grafana client instance, see ``grafana_mcp.session``."""
+    from grafana_mcp import session
+    return session.get_grafana_client()
+
+
+def grafana_request(method: str, path: str, **kwargs: Any) -> "requests.Response":
+    """Send a request through the shared synchronous session, see ``grafana_mcp.session``."""
+    from grafana_mcp import session
+    return session.grafana_request(method, path, **kwargs)
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Get connection pool counters and settings of the async clients and the synchronous session.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: For the ``async_client`` and the ``sync_session``: ``requests``
+        sent, ``hits`` served by a pooled connection and ``misses`` that opened a new connection.
+        The async clients also report their ``max_connections`` and ``max_keepalive_connections``,
+        whether they speak ``http2`` and the number of ``clients``, one per event loop; the session
+        its ``pool_size``.
+    """
+    settings = get_settings()
+    with _lock:
+        async_stats: Dict[str, Any] = dict(_async_counts)
+        clients = sum(not client.is_closed for client in _async_clients.values())
+    async_stats.update(max_connections=settings.pool_size, max_keepalive_connections=settings.pool_size,
+                       http2=_http2_available(), clients=clients)
+
+    session = sys.modules.get("grafana_mcp.session")
+    if session is None:
+        sync_stats = {"requests": 0, "hits": 0, "misses": 0, "pool_size": settings.pool_size}
+    else:
+        sync_stats = session.get_pool_stats()
+    return {"async_client": async_stats, "sync_session": sync_stats}
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class _ConnectionTrace:
+    """httpcore trace callback noting whether a request opened a new connection."""
+
+    __slots__ = ("connected",)
+
+    def __init__(self):
+        self.connected = False
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        if event.startswith("connection.connect_"):
+            self.connected = True
+
+
+def _count_connection(trace: _ConnectionTrace) -> None:
+    with _lock:
+        _async_counts["requests"] += 1
+        _async_counts["misses" if trace.connected else "hits"] += 1
+
+
+def _build_async_client(settings: Settings) -> "httpx.AsyncClient":
+    import httpx
+
+    return httpx.AsyncClient(
+        base_url=settings.grafana_url,
+        headers={
+            "Authorization": f"Bearer {_require_token(settings)}",
+            "User-Agent": f"grafana-mcp/{__version__}",
+        },
+        timeout=settings.timeout,
+        transport=httpx.AsyncHTTPTransport(
+            retries=settings.max_retries,
+            limits=httpx.Limits(max_connections=settings.pool_size, max_keepalive_connections=settings.pool_size),
+            http2=_http2_available(),
+        ),
+    )
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Get the async Grafana HTTP client for the running event loop.
+
+    Returns:
+        httpx.AsyncClient: Keep-alive client with pooling and auth headers.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_async_client(get_settings())
+        _async_clients[loop] = client
+    return client
+
+
+async def grafana_request_async(
+    method: str, path: str, stream: bool = False, coalesce: Optional[bool] = None, **kwargs: Any
+) -> "httpx.Response":
+    """Send a request to the Grafana HTTP API through the shared async client.
+
+    Responses with a 429 status are retried for any method, 5xx responses only
+    for idempotent methods, using the same backoff as the sync session.
+
+    Concurrent identical requests that are coalesced share one upstream call
+    and its response, see ``grafana_mcp.coalesce``. Streamed requests never are.
+
+    Args:
+        method (str): HTTP method.
+        path (str): API path starting with ``/api``.
+        stream (bool): Return before reading the body. The caller must close the response.
+        coalesce (Optional[bool]): Whether to coalesce the request. Defaults to True for GET and HEAD.
+        **kwargs: Extra arguments for ``httpx.AsyncClient.build_request``.
+
+    Returns:
+        httpx.Response: The raw response, shared with other callers if coalesced.
+    """
+    method = method.upper()
+    if coalesce is None:
+        coalesce = method in COALESCED_METHODS
+    if coalesce and not stream:
+        return await get_coalescer().run(
+            request_key(method, path, kwargs), lambda: _send_async(method, path, False, **kwargs))
+    return await _send_async(method, path, stream, **kwargs)
+
+
+async def _send_async(method: str, path: str, stream: bool, **kwargs: Any) -> "httpx.Response":
+    import httpx
+
+    settings = get_settings()
+    client = get_async_client()
+    endpoint = endpoint_template(path)
+
+    with span(f"{method} {endpoint}", **{"http.request.method": method, "url.template": endpoint}) as current:
+        attempt = 0
+        while True:
+            request = client.build_request(method, path, **kwargs)
+            trace = request.extensions.setdefault("trace", _ConnectionTrace())
+            start = time.perf_counter()
+            try:
+                response = await client.send(request, stream=stream)
+            except httpx.HTTPError:
+                UPSTREAM_DURATION.observe(time.perf_counter() - start, method, endpoint, "error")
+                record_wait("upstream", time.perf_counter() - start)
+                raise
+            finally:
+                if isinstance(trace, _ConnectionTrace):
+                    _count_connection(trace)
+            _record_response(method, endpoint, request, response, time.perf_counter() - start, stream)
+
+            retryable = response.status_code == 429 or (
+                response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+            )
+            if not retryable or attempt >= settings.max_retries:
+                if current is not None:
+                    current.set_attribute("http.response.status_code", response.status_code)
+                return response
+
+            delay = settings.backoff_factor * (2 ** attempt)
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await response.aclose()
+            UPSTREAM_RETRIES.inc(method, endpoint)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _record_response(
+    method: str, endpoint: str, request: "httpx.Request", response: "httpx.Response", elapsed: float, stream: bool
+) -> None:
+    UPSTREAM_DURATION.observe(elapsed, method, endpoint, str(response.status_code))
+    record_wait("upstream", elapsed)
+    if request.content:
+        UPSTREAM_REQUEST_BYTES.observe(len(request.content), method, endpoint)
+    if not stream:
+        UPSTREAM_RESPONSE_BYTES.observe(len(response.content), method, endpoint)
+        return
+    # A streamed body has not been read yet, so only its declared length is known
+    length = response.headers.get("Content-Length", "")
+    if length.isdigit():
+        UPSTREAM_RESPONSE_BYTES.observe(int(length), method, endpoint)
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    if _sync_loop is None:
+        with _lock:
+            if _sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="grafana-mcp-sync", daemon=True).start()
+                _sync_loop = loop
+    return _sync_loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine from synchronous code and wait for its result.
+
+    Args:
+        coro (Awaitable[T]): The coroutine to run.
+
+    Returns:
+        T: The coroutine's result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+
+
+def reset_connections() -> None:
+    """Close the shared sessions and drop the cached clients and settings."""
+    session = sys.modules.get("grafana_mcp.session")
+    if session is not None:
+        session.close_session()
+    with _lock:
+        clients = list(_async_clients.items())
+        _async_clients.clear()
+        _async_counts.update(requests=0, hits=0, misses=0)
+    for loop, client in clients:
+        if loop is _sync_loop:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+    get_settings.cache_clear()
@@ -0,0 +1,259 @@
+"""
+Cost guard estimating the work of ClickHouse queries before they run.
+
+``EXPLAIN ESTIMATE`` plans a query with its partition and primary key
+pruning and reports, per table, the parts, rows and marks it would read,
+without reading any data. Bytes are approximated from each table's average
+compressed row size in ``system.tables``. Estimates are cached by
+datasource, normalized SQL and time range.
+
+A query estimated to read more rows or bytes than the budget is rejected
+with ``QueryBudgetError``. With the "narrow" action, a query filtered with a
+time filter macro is instead run over the latest part of its range that
+fits the budget, assuming rows are spread evenly over time; the narrowed
+range is estimated again before it is used.
+"""
+
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from grafana_mcp.cache import TTLCache
+from grafana_mcp.config import get_settings
+from grafana_mcp.sql import estimate_sql, has_time_filter, normalize_sql, quote
+from grafana_mcp.timerange import resolve_range
+
+OVER_BUDGET_ACTIONS = ("narrow", "reject")
+# Share of the budget a narrowed range aims for, as rows are not spread exactly evenly
+NARROW_MARGIN = 0.9
+TABLE_SIZES_SQL = (
+    "SELECT database, name, total_rows, total_bytes\n"
+    "FROM system.tables\n"
+    "WHERE (database, name) IN ({tables})"
+)
+
+# Coroutine function running a table query over a time range and returning its rows as dicts
+RunSQL = Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]]
+
+_cost_guard: Optional["CostGuard"] = None
+_cost_guard_lock = threading.Lock()
+
+
+class QueryBudgetError(RuntimeError):
+    """Raised when a query is estimated to read more than the budget allows."""
+
+    def __init__(self, message: str, estimate: Dict[str, Any]):
+        super().__init__(message)
+        self.estimate = estimate
+
+
+class CostGuard:
+    """Estimates queries with ``EXPLAIN ESTIMATE`` and keeps them within a row and byte budget."""
+
+    def __init__(
+        self,
+        max_rows: int = 0,
+        max_bytes: int = 0,
+        action: str = "narrow",
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if action not in OVER_BUDGET_ACTIONS:
+            raise ValueError(f"Unknown over-budget action '{action}', expected one of {OVER_BUDGET_ACTIONS}")
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.action = action
+        self._estimates = TTLCache(ttl, clock=clock)
+        # (database, table) -> average compressed bytes per row
+        self._row_bytes = TTLCache(ttl, clock=clock)
+        self._lock = threading.Lock()
+        self.estimated = 0
+        self.narrowed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a budget is set."""
+        return bool(self.max_rows or self.max_bytes)
+
+    async def estimate(
+        self, datasource_uid: str, raw_sql: str, time_from: str, time_to: str, run_sql: RunSQL
+    ) -> Dict[str, Any]:
+        """Estimate what a query would read over a time range.
+
+        Args:
+            datasource_uid (str): The datasource UID.
+            raw_sql (str): The SQL query.
+            time_from (str): Start of the time range.
+            time_to (str): End of the time range.
+            run_sql (RunSQL): Coroutine function running a table query on the datasource.
+
+        Returns:
+            Dict[str, Any]: Total 'rows', 'parts', 'marks' and approximate 'bytes', and the same
+            counters per table under 'tables'.
+        """
+        key = (datasource_uid, normalize_sql(raw_sql), time_from, time_to)
+        cached = self._estimates.get(key)
+        if cached is not None:
+            return cached
+
+        tables = [{"database": row.get("database", ""), "table": row.get("table", ""), "parts": int(row["parts"]),
+                   "rows": int(row["rows"]), "marks": int(row["marks"])}
+                  for row in await run_sql(estimate_sql(raw_sql), time_from, time_to)]
+        row_bytes = await self._table_row_bytes(datasource_uid, tables, lambda sql: run_sql(sql, time_from, time_to))
+        for table in tables:
+            table["bytes"] = int(table["rows"] * row_bytes.get((table["database"], table["table"]), 0.0))
+
+        estimate = {counter: sum(table[counter] for table in tables)
+                    for counter in ("rows", "parts", "marks", "bytes")}
+        estimate["tables"] = tables
+        self._estimates.set(key, estimate)
+        with self._lock:
+            self.estimated += 1
+        return estimate
+
+    async def _table_row_bytes(
+        self,
+        datasource_uid: str,
+        tables: List[Dict[str, Any]],
+        run_sql: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+    ) -> Dict[Tuple[str, str], float]:
+        names = {(table["database"], table["table"]) for table in tables}
+        row_bytes = {name: self._row_bytes.get((datasource_uid,) + name) for name in names}
+        missing = sorted(name for name, size in row_bytes.items() if size is None)
+        if missing:
+            batch = ", ".join(f"({quote(db)}, {quote(table)})" for db, table in missing)
+            for row in await run_sql(TABLE_SIZES_SQL.format(tables=batch)):
+                rows, size = int(row.get("total_rows") or 0), int(row.get("total_bytes") or 0)
+                name = (row["database"], row["name"])
+                row_bytes[name] = size / rows if rows else 0.0
+                self._row_bytes.set((datasource_uid,) + name, row_bytes[name])
+        return {name: size or 0.0 for name, size in row_bytes.items()}
+
+    def over_budget(self, estimate: Dict[str, Any]) -> Optional[str]:
+        """Describe how an estimate exceeds the budget, or get None if it fits."""
+        if self.max_rows and estimate["rows"] > self.max_rows:
+            return f"Query would read about {estimate['rows']:,} rows, over the budget of {self.max_rows:,}."
+        if self.max_bytes and estimate["bytes"] > self.max_bytes:
+            return f"Query would read about {estimate['bytes']:,} bytes, over the budget of {self.max_bytes:,}."
+        return None
+
+    async def plan(
+        self,
+        datasource_uid: str,
+        raw_sql: str,
+        time_from: str,
+        time_to: str,
+        run_sql: RunSQL,
+        narrow: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """Check a query against the budget before it runs, narrowing its time range if allowed.
+
+        Queries whose estimate fails, e.g. on tables that are not MergeTree, are
+        let through without an estimate.
+
+        Args:
+            datasource_uid (str): The datasource UID.
+            raw_sql (str): The SQL query.
+            time_from (str): Start of the requested time range.
+            time_to (str): End of the requested time range.
+            run_sql (RunSQL): Coroutine function running a table query on the datasource.
+            narrow (bool): Whether the range may be narrowed, with the "narrow" action. Defaults to True.
+
+        Returns:
+            Optional[Dict[str, Any]]: None without a budget or estimate; otherwise the estimate over
+            the range to run, with that range's 'time_from' and 'time_to', and 'narrowed_from'
+            holding the requested range and its 'rows' and 'bytes' if it was narrowed.
+
+        Raises:
+            QueryBudgetError: If the query exceeds the budget and cannot be narrowed to fit it.
+        """
+        if not self.enabled:
+            return None
+        try:
+            estimate = await self.estimate(datasource_uid, raw_sql, time_from, time_to, run_sql)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            return None
+
+        reason = self.over_budget(estimate)
+        if reason is None:
+            return {**estimate, "time_from": time_from, "time_to": time_to}
+        if narrow and self.action == "narrow" and has_time_filter(raw_sql):
+            narrowed = await self._narrow(datasource_uid, raw_sql, time_from, time_to, estimate, run_sql)
+            if narrowed is not None:
+                return narrowed
+
+        with self._lock:
+            self.rejected += 1
+        raise QueryBudgetError(
+            reason + " Narrow the time range, filter on the table's primary key, or sample the table.", estimate)
+
+    async def _narrow(
+        self,
+        datasource_uid: str,
+        raw_sql: str,
+        time_from: str,
+        time_to: str,
+        estimate: Dict[str, Any],
+        run_sql: RunSQL,
+    ) -> Optional[Dict[str, Any]]:
+        ratios = []
+        if self.max_rows:
+            ratios.append(self.max_rows / estimate["rows"])
+        if self.max_bytes and estimate["bytes"]:
+            ratios.append(self.max_bytes / estimate["bytes"])
+        start, end = resolve_range(time_from, time_to)
+        start = end - (end - start) * min(ratios) * NARROW_MARGIN
+        narrowed_from, narrowed_to = str(int(start * 1000)), str(int(end * 1000))
+        try:
+            narrowed = await self.estimate(datasource_uid, raw_sql, narrowed_from, narrowed_to, run_sql)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            return None
+        if self.over_budget(narrowed) is not None:
+            return None
+
+        with self._lock:
+            self.narrowed += 1
+        return {**narrowed, "time_from": narrowed_from, "time_to": narrowed_to,
+                "narrowed_from": {"time_from": time_from, "time_to": time_to,
+                                  "rows": estimate["rows"], "bytes": estimate["bytes"]}}
+
+    def clear(self) -> None:
+        """Forget cached estimates and table sizes."""
+        self._estimates.clear()
+        self._row_bytes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the budget and counters of estimated, narrowed, rejected and failed estimates."""
+        with self._lock:
+            return {
+                "max_rows": self.max_rows,
+                "max_bytes": self.max_bytes,
+                "action": self.action,
+                "estimated": self.estimated,
+                "cached": self._estimates.stats()["hits"],
+                "narrowed": self.narrowed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+
+def get_cost_guard() -> CostGuard:
+    """Get the process-wide cost guard."""
+    global _cost_guard
+    if _cost_guard is None:
+        with _cost_guard_lock:
+            if _cost_guard is None:
+                settings = get_settings()
+                _cost_guard = CostGuard(
+                    max_rows=settings.query_max_rows,
+                    max_bytes=settings.query_max_bytes,
+                    action=settings.query_over_budget,
+                    ttl=settings.cost_cache_ttl,
+                )
+    return _cost_guard
@@ -0,0 +1,147 @@
+"""
+Version-aware cache of dashboard API responses.
+
+Responses of ``/api/dashboards/uid/<uid>`` are kept with their dashboard
+version in an LRU cache bounded by the total size of the response bodies.
+For ``revalidate_after`` seconds after it was fetched or checked, an entry is
+served as is. After that, the dashboard's latest version is read from its
+version history, a response of a few hundred bytes, and the entry is served
+again if the version is unchanged or fetched anew otherwise. Dashboards saved
+through this server are dropped at once. With a disk cache, entries are
+shared by the worker processes; an entry read from disk is checked before
+its first use in a process.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from grafana_mcp.cache import LRUCache, TieredCache, TTLCache
+from grafana_mcp.config import get_settings
+from grafana_mcp.disk_cache import get_disk_cache
+
+if TYPE_CHECKING:
+    from grafana_mcp.disk_cache import DiskCache
+
+# Unchanged dashboards are still fetched anew after this long
+MAX_AGE = 86400.0
+
+# Coroutine function fetching a dashboard response and its size in bytes
+FetchDashboard = Callable[[str], Awaitable[Tuple[Dict[str, Any], int]]]
+# Coroutine function getting the latest version of a dashboard, or None if unknown
+LatestVersion = Callable[[str], Awaitable[Optional[int]]]
+
+_dashboard_cache: Optional["DashboardCache"] = None
+_dashboard_cache_lock = threading.Lock()
+
+
+class DashboardCache:
+    """Cache of dashboard responses revalidated by version, bounded by bytes."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        revalidate_after: float = 30.0,
+        disk: Optional["DiskCache"] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.revalidate_after = revalidate_after
+        self._entries = LRUCache(MAX_AGE, max_bytes=max_bytes, clock=clock)
+        if disk is not None:
+            self._entries = TieredCache(self._entries, disk, "dashboards")
+        # UIDs whose entry was fetched or checked in the last revalidate_after seconds
+        self._validated = TTLCache(revalidate_after, clock=clock)
+        self._lock = threading.Lock()
+        self.fresh = 0
+        self.revalidated = 0
+        self.fetched = 0
+
+    async def get(self, uid: str, fetch: FetchDashboard, latest_version: LatestVersion) -> Dict[str, Any]:
+        """Get a dashboard response, checking its version once ``revalidate_after`` has passed.
+
+        Args:
+            uid (str): The UID of the dashboard.
+            fetch (FetchDashboard): Coroutine function downloading the dashboard.
+            latest_version (LatestVersion): Coroutine function getting the dashboard's latest version.
+
+        Returns:
+            Dict[str, Any]: The API response with 'dashboard' and 'meta' keys, shared with other callers.
+        """
+        entry = self._entries.get(uid)
+        if entry is not None:
+            if self._validated.get(uid, False):
+                self._count("fresh")
+                return entry["response"]
+            try:
+                version = await latest_version(uid)
+            except Exception:
+                version = None
+            if version is not None and version == entry["version"]:
+                self._validated.set(uid, True)
+                self._count("revalidated")
+                return entry["response"]
+
+        response, size = await fetch(uid)
+        self.store(uid, response, size)
+        self._count("fetched")
+        return response
+
+    def store(self, uid: str, response: Dict[str, Any], size: int) -> None:
+        """Cache a dashboard response of ``size`` bytes."""
+        entry = {"version": (response.get("dashboard") or {}).get("version"), "response": response}
+        self._entries.set(uid, entry, size=size)
+        self._validated.set(uid, True)
+
+    def invalidate(self, uid: str) -> None:
+        """Forget a dashboard, e.g. after saving it."""
+        self._entries.delete(uid)
+        self._validated.delete(uid)
+
+    def clear(self) -> None:
+        """Forget all dashboards."""
+        self._entries.clear()
+        self._validated.clear()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size counters, and 'hits' served without downloading the dashboard out of all lookups.
+
+        Returns:
+            Dict[str, Any]: 'fresh' hits, 'revalidated' hits, 'fetched' dashboards ('misses'),
+            'hits', 'hit_rate', and the 'entries', 'bytes', 'max_bytes' and 'evictions' in memory.
+        """
+        memory = self._entries.memory if isinstance(self._entries, TieredCache) else self._entries
+        entries = memory.stats()
+        with self._lock:
+            hits = self.fresh + self.revalidated
+            lookups = hits + self.fetched
+            return {
+                "entries": entries["entries"],
+                "bytes": entries["bytes"],
+                "max_bytes": entries["max_bytes"],
+                "evictions": entries["evictions"],
+                "fresh": self.fresh,
+                "revalidated": self.revalidated,
+                "fetched": self.fetched,
+                "hits": hits,
+                "misses": self.fetched,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+def get_dashboard_cache() -> DashboardCache:
+    """Get the process-wide dashboard cache."""
+    global _dashboard_cache
+    if _dashboard_cache is None:
+        with _dashboard_cache_lock:
+            if _dashboard_cache is None:
+                settings = get_settings()
+                _dashboard_cache = DashboardCache(
+                    max_bytes=settings.dashboard_cache_max_bytes,
+                    revalidate_after=settings.dashboard_cache_ttl,
+                    disk=get_disk_cache(),
+                )
+    return _dashboard_cache
@@ -0,0 +1,106 @@
+"""
+Helpers for walking and patching the panels and queries of a Grafana dashboard model.
+
+Patches return a new model that copies only the objects on the path to the
+change and shares everything else with the original, which may be a cached
+response and must not be modified.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List
+
+# Function returning a patched copy of a dashboard model
+DashboardPatch = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+CLICKHOUSE_DATASOURCE_TYPE = "grafana-clickhouse-datasource"
+
+
+def iter_panels(dashboard: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Iterate over all panels, including those nested in collapsed rows."""
+    for panel in dashboard.get("panels") or []:
+        yield panel
+        for nested in panel.get("panels") or []:
+            yield nested
+
+
+def collect_targets(dashboard: Dict[str, Any], default_datasource_uid: str) -> List[Dict[str, Any]]:
+    """Collect the SQL queries of every panel of a dashboard.
+
+    Hidden targets and targets without ``rawSql`` are skipped. The datasource
+    falls back from the target to its panel and then to ``default_datasource_uid``.
+
+    Args:
+        dashboard (Dict[str, Any]): The dashboard model.
+        default_datasource_uid (str): Datasource UID used when none is set.
+
+    Returns:
+        List[Dict[str, Any]]: Entries with 'panel_id', 'panel_title', 'ref_id', 'raw_sql',
+        'datasource_uid' and 'datasource_type'.
+    """
+    targets = []
+    for index, panel in enumerate(iter_panels(dashboard)):
+        panel_datasource = panel.get("datasource") if isinstance(panel.get("datasource"), dict) else {}
+        for target in panel.get("targets") or []:
+            if target.get("hide") or not target.get("rawSql"):
+                continue
+            datasource = target.get("datasource") if isinstance(target.get("datasource"), dict) else {}
+            targets.append({
+                "panel_id": panel.get("id", index),
+                "panel_title": panel.get("title", ""),
+                "ref_id": target.get("refId", "A"),
+                "raw_sql": target["rawSql"],
+                "datasource_uid": datasource.get("uid") or panel_datasource.get("uid") or default_datasource_uid,
+                "datasource_type": datasource.get("type") or panel_datasource.get("type") or CLICKHOUSE_DATASOURCE_TYPE,
+            })
+    return targets
+
+
+def append_panel(dashboard: Dict[str, Any], panel: Dict[str, Any]) -> Dict[str, Any]:
+    """Append a panel below the others, with an id unused by any panel.
+
+    Args:
+        dashboard (Dict[str, Any]): The dashboard model.
+        panel (Dict[str, Any]): The panel to add; its 'id' and the 'y' of its 'gridPos' are replaced.
+
+    Returns:
+        Dict[str, Any]: The patched dashboard model.
+    """
+    panels = dashboard.get("panels") or []
+    panel_id = max((p.get("id") or 0 for p in iter_panels(dashboard)), default=0) + 1
+    bottom = max((p.get("gridPos", {}).get("y", 0) + p.get("gridPos", {}).get("h", 0) for p in panels), default=0)
+    panel = {**panel, "id": panel_id, "gridPos": {**panel.get("gridPos", {}), "y": bottom}}
+    return {**dashboard, "panels": panels + [panel]}
+
+
+def set_target_sql(dashboard: Dict[str, Any], panel_id: int, ref_id: str, raw_sql: str) -> Dict[str, Any]:
+    """Replace the SQL of one query of a panel, which may be nested in a row.
+
+    Args:
+        dashboard (Dict[str, Any]): The dashboard model.
+        panel_id (int): The id of the panel.
+        ref_id (str): The refId of the query.
+        raw_sql (str): The new SQL.
+
+    Returns:
+        Dict[str, Any]: The patched dashboard model.
+
+    Raises:
+        KeyError: If the dashboard has no such panel or the panel no such query.
+    """
+    def patch_panel(panel: Dict[str, Any]) -> Dict[str, Any]:
+        targets = panel.get("targets") or []
+        for index, target in enumerate(targets):
+            if target.get("refId", "A") == ref_id:
+                patched = {**target, "rawSql": raw_sql}
+                return {**panel, "targets": targets[:index] + [patched] + targets[index + 1:]}
+        raise KeyError(f"Panel {panel_id} has no query '{ref_id}'")
+
+    panels = dashboard.get("panels") or []
+    for index, panel in enumerate(panels):
+        if panel.get("id") == panel_id:
+            return {**dashboard, "panels": panels[:index] + [patch_panel(panel)] + panels[index + 1:]}
+        nested = panel.get("panels") or []
+        for position, child in enumerate(nested):
+            if child.get("id") == panel_id:
+                row = {**panel, "panels": nested[:position] + [patch_panel(child)] + nested[position + 1:]}
+                return {**dashboard, "panels": panels[:index] + [row] + panels[index + 1:]}
+    raise KeyError(f"Dashboard has no panel {panel_id}")
@@ -0,0 +1,229 @@
+"""
+Persistent cache on local disk shared by the server's worker processes.
+
+Entries live in one SQLite database in WAL mode, so any number of processes
+can read while one writes, and a restarted server starts warm. Each entry
+belongs to a namespace, holds a JSON value and expires after its TTL. The
+total size of the values is kept in a counter table by triggers; once it
+exceeds ``max_bytes``, expired entries and then the least recently read ones
+are deleted.
+
+Failures of the disk cache never fail a lookup: they count as misses and
+are reported in ``stats()``.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from grafana_mcp.config import get_settings
+
+# Reads refresh an entry's access time at most this often, to keep reads from writing
+ACCESS_RESOLUTION = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO usage (id, bytes) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE usage SET bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE usage SET bytes = bytes - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE usage SET bytes = bytes - old.size + new.size WHERE id = 0;
+END;
+"""
+
+_disk_cache: Optional["DiskCache"] = None
+_disk_cache_lock = threading.Lock()
+
+
+def encode_key(key: Hashable) -> str:
+    """Encode a cache key made of strings, numbers, None and tuples as a string."""
+    return json.dumps(key, separators=(",", ":"), default=str)
+
+
+def _decode_key(key: str) -> Hashable:
+    def freeze(value: Any) -> Hashable:
+        return tuple(freeze(item) for item in value) if isinstance(value, list) else value
+
+    return freeze(json.loads(key))
+
+
+class DiskCache:
+    """SQLite-backed cache with TTLs and a total size budget, safe across threads and processes."""
+
+    def __init__(self, path: str, max_bytes: int, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process; connections must not cross a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Get a value and its expiry time in epoch seconds, or None if missing or expired."""
+        encoded = encode_key(key)
+        now = self._clock()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, encoded)).fetchone()
+            if row is None or row[1] <= now:
+                self._count("misses")
+                return None
+            if row[2] < now - ACCESS_RESOLUTION:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, encoded))
+            value = json.loads(row[0])
+        except (sqlite3.Error, ValueError):
+            self._count("errors")
+            return None
+        self._count("hits")
+        return value, row[1]
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a JSON-serializable value, evicting entries to stay within ``max_bytes``."""
+        try:
+            data = json.dumps(value, separators=(",", ":")).encode()
+        except (TypeError, ValueError):
+            self._count("errors")
+            return
+        if len(data) > self.max_bytes:
+            return
+        now = self._clock()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO entries (namespace, key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET "
+                    "value = excluded.value, size = excluded.size, expires_at = excluded.expires_at, "
+                    "accessed_at = excluded.accessed_at",
+                    (namespace, encode_key(key), data, len(data), now + ttl, now))
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self._count("errors")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self._usage(conn) <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        excess = self._usage(conn) - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        cursor = conn.execute("SELECT rowid, size FROM entries ORDER BY accessed_at")
+        for rowid, size in cursor:
+            victims.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        cursor.close()
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+        with self._lock:
+            self.evictions += len(victims)
+
+    @staticmethod
+    def _usage(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0]
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        """Remove a value if present."""
+        try:
+            self._connect().execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, encode_key(key)))
+        except sqlite3.Error:
+            self._count("errors")
+
+    def delete_where(self, namespace: str, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every entry of a namespace whose decoded key matches ``predicate``."""
+        try:
+            conn = self._connect()
+            keys = [key for (key,) in conn.execute("SELECT key FROM entries WHERE namespace = ?", (namespace,))]
+            matching: List[Tuple[str, str]] = [(namespace, key) for key in keys if predicate(_decode_key(key))]
+            conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", matching)
+        except sqlite3.Error:
+            self._count("errors")
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove all values, or those of one namespace."""
+        try:
+            if namespace is None:
+                self._connect().execute("DELETE FROM entries")
+            else:
+                self._connect().execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+        except sqlite3.Error:
+            self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit counters; the counters are those of this process."""
+        try:
+            conn = self._connect()
+            entries = conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+            size = self._usage(conn)
+        except sqlite3.Error:
+            entries = size = 0
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Get the process-wide disk cache, or None unless ``GRAFANA_CACHE_DIR`` is set."""
+    global _disk_cache
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            settings = get_settings()
+            if _disk_cache is None and settings.cache_dir:
+                _disk_cache = DiskCache(os.path.join(settings.cache_dir, "cache.sqlite3"),
+                                        max_bytes=settings.disk_cache_max_bytes)
+    return _disk_cache
@@ -0,0 +1,143 @@
+"""
+Folder hierarchy cache for Grafana folder path resolution.
+
+Folders are cached by ``(parent_uid, title)``. Listing a parent marks it as
+known, so a miss for a known parent means the folder does not exist and can be
+created without another list call. Resolving a warm path makes no HTTP calls.
+With a disk cache, the tree is shared by the worker processes.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from grafana_mcp.cache import TieredCache, TTLCache
+from grafana_mcp.config import get_settings
+from grafana_mcp.disk_cache import get_disk_cache
+
+if TYPE_CHECKING:
+    from grafana_mcp.disk_cache import DiskCache
+
+Folder = Dict[str, Any]
+ListChildren = Callable[[Optional[str]], Awaitable[Iterable[Folder]]]
+CreateFolder = Callable[[str, Optional[str]], Awaitable[Folder]]
+
+_folder_cache: Optional["FolderCache"] = None
+
+
+def split_folder_path(path: str) -> List[str]:
+    """Split a ``a/b/c`` folder path into its non-empty segments."""
+    return [seg.strip() for seg in path.split("/") if seg.strip()]
+
+
+class FolderCache:
+    """Cache of the Grafana folder tree keyed by ``(parent_uid, title)``."""
+
+    def __init__(self, ttl: float = 300.0, disk: Optional["DiskCache"] = None):
+        self._folders = TTLCache(ttl)
+        self._listed = TTLCache(ttl)
+        if disk is not None:
+            self._folders = TieredCache(self._folders, disk, "folders")
+            self._listed = TieredCache(self._listed, disk, "folder_lists")
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[Optional[str], str], concurrent.futures.Future] = {}
+
+    def get(self, parent_uid: Optional[str], title: str) -> Optional[Folder]:
+        """Get a cached folder by parent UID and title."""
+        return self._folders.get((parent_uid, title))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit and miss counters of folder lookups."""
+        return self._folders.stats()
+
+    def is_listed(self, parent_uid: Optional[str]) -> bool:
+        """Whether the children of ``parent_uid`` have been listed recently."""
+        return self._listed.get(parent_uid, False)
+
+    def store(self, parent_uid: Optional[str], folder: Folder) -> None:
+        """Cache a single folder under its parent."""
+        self._folders.set((parent_uid, folder["title"]), folder)
+
+    def store_children(self, parent_uid: Optional[str], folders: Iterable[Folder]) -> None:
+        """Cache the complete list of children of ``parent_uid``."""
+        self._folders.delete_where(lambda key: key[0] == parent_uid)
+        for folder in folders:
+            self.store(parent_uid, folder)
+        self._listed.set(parent_uid, True)
+
+    def invalidate(self, parent_uid: Optional[str]) -> None:
+        """Forget the children of ``parent_uid``."""
+        self._folders.delete_where(lambda key: key[0] == parent_uid)
+        self._listed.delete(parent_uid)
+
+    def clear(self) -> None:
+        """Forget the whole folder tree."""
+        self._folders.clear()
+        self._listed.clear()
+
+    async def resolve(
+        self,
+        path: str,
+        list_children: ListChildren,
+        create_folder: CreateFolder,
+        parent_uid: Optional[str] = None,
+    ) -> Optional[Folder]:
+        """Resolve a folder path, creating missing folders.
+
+        Args:
+            path (str): Folder path such as ``a/b/c``.
+            list_children (ListChildren): Coroutine function listing the children of a parent UID.
+            create_folder (CreateFolder): Coroutine function creating a folder from a title and parent UID.
+            parent_uid (Optional[str]): UID the path is relative to, or None for the root.
+
+        Returns:
+            Optional[Folder]: The last folder of the path, or None for an empty path.
+        """
+        folder = None
+        for segment in split_folder_path(path):
+            folder = self.get(parent_uid, segment)
+            if folder is None and not self.is_listed(parent_uid):
+                self.store_children(parent_uid, await list_children(parent_uid))
+                folder = self.get(parent_uid, segment)
+            if folder is None:
+                folder = await self._create_once(parent_uid, segment, create_folder)
+            parent_uid = folder["uid"]
+        return folder
+
+    async def _create_once(self, parent_uid: Optional[str], title: str, create_folder: CreateFolder) -> Folder:
+        # Concurrent creates of the same folder wait for the first one. A
+        # concurrent.futures.Future is used so waiters may run on any event loop.
+        key = (parent_uid, title)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = concurrent.futures.Future()
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            folder = self.get(parent_uid, title)
+            if folder is None:
+                folder = await create_folder(title, parent_uid)
+                self.store(parent_uid, folder)
+                # A new folder has no children, so there is nothing to list.
+                self._listed.set(folder["uid"], True)
+            future.set_result(folder)
+            return folder
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def get_folder_cache() -> FolderCache:
+    """Get the process-wide folder cache."""
+    global _folder_cache
+    if _folder_cache is None:
+        _folder_cache = FolderCache(ttl=get_settings().folder_cache_ttl, disk=get_disk_cache())
+    return _folder_cache
@@ -0,0 +1,146 @@
+"""
+Helpers for reading data frames returned by Grafana's ``/api/ds/query``.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from grafana_mcp.jsonstream import Event, JSONEventParser, decode_scalar
+
+_VALUES_SUFFIX = ".frames.item.data.values.item"
+_ELEMENT_EVENTS = ("scalar", "start_map", "start_array")
+
+
+def iter_frames(query_result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Iterate over all frames of all refIds in a query response."""
+    for result_data in query_result.get('results', {}).values():
+        for frame in result_data.get('frames') or []:
+            yield frame
+
+
+def frame_columns(query_result: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Get the columns of the first frame of a query response.
+
+    Args:
+        query_result (Dict[str, Any]): The ``/api/ds/query`` response.
+
+    Returns:
+        List[Dict[str, str]]: Column 'name' and Grafana field 'type' (time, number, string, ...).
+    """
+    for frame in iter_frames(query_result):
+        return [
+            {"name": field.get("name", ""), "type": field.get("type", "other")}
+            for field in frame.get("schema", {}).get("fields", [])
+        ]
+    return []
+
+
+def frame_rows(query_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the rows of all frames of a query response as dicts keyed by column name.
+
+    Args:
+        query_result (Dict[str, Any]): The ``/api/ds/query`` response of a table query.
+
+    Returns:
+        List[Dict[str, Any]]: One dict per row.
+    """
+    rows = []
+    for frame in iter_frames(query_result):
+        names = [field.get("name", "") for field in frame.get("schema", {}).get("fields", [])]
+        values = frame.get("data", {}).get("values", [])
+        rows.extend(dict(zip(names, row)) for row in zip(*values))
+    return rows
+
+
+def time_series_contract_errors(columns: List[Dict[str, str]]) -> List[str]:
+    """Check columns against the time-series panel contract.
+
+    Args:
+        columns (List[Dict[str, str]]): Columns as returned by ``frame_columns``.
+
+    Returns:
+        List[str]: Human readable violations; empty if the contract holds.
+    """
+    types = [column["type"] for column in columns]
+    errors = []
+    if "time" not in types:
+        errors.append("Query does not return a DateTime column to use as the time axis.")
+    if "number" not in types:
+        errors.append("Query does not return a numeric metric column.")
+    return errors
+
+
+async def scan_frame_values(
+    events: AsyncIterator[Event],
+    count: bool = False,
+    ref_ids: Optional[Iterable[str]] = None,
+    parser: Optional[JSONEventParser] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Look for data in a streamed ``/api/ds/query`` response.
+
+    Values are never decoded. Without ``count`` the scan stops as soon as every
+    expected refId has a non-empty value column (the first one if ``ref_ids``
+    is not given).
+
+    Given the ``parser`` producing the events, the scan skips what cannot
+    change the answer instead of tokenizing it: value columns are counted by
+    a byte scan, and once a refId has data the rest of its frames is passed
+    over.
+
+    Args:
+        events (AsyncIterator[Event]): JSON events from ``jsonstream.aiter_events``.
+        count (bool): Whether to read the whole response and count all values.
+        ref_ids (Optional[Iterable[str]]): The refIds of the queries in the request.
+        parser (Optional[JSONEventParser]): The parser given to ``aiter_events``.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per refId, 'has_data', 'error' if the query failed,
+        and 'total_datapoints' when counting.
+    """
+    def new_result() -> Dict[str, Any]:
+        return {"has_data": False, "total_datapoints": 0} if count else {"has_data": False}
+
+    def found_data() -> None:
+        nonlocal pending
+        if not current["has_data"]:
+            current["has_data"] = True
+            pending -= 1
+
+    results = {ref_id: new_result() for ref_id in ref_ids or []}
+    pending = len(results) or 1
+    column = None
+    column_item = None
+    current = None
+
+    async for prefix, event, value in events:
+        if column is None:
+            if event == "start_array" and prefix.startswith("results.") and prefix.endswith(_VALUES_SUFFIX):
+                column = prefix
+                column_item = prefix + ".item"
+                ref_id = prefix[len("results."):-len(_VALUES_SUFFIX)]
+                current = results.setdefault(ref_id, new_result())
+                if count and parser is not None:
+                    parser.skip()
+            elif event == "scalar" and prefix.startswith("results.") and prefix.count(".") == 2 \
+                    and prefix.endswith(".error"):
+                ref_id = prefix[len("results."):-len(".error")]
+                results.setdefault(ref_id, new_result())["error"] = decode_scalar(value)
+        elif prefix == column_item and event in _ELEMENT_EVENTS:
+            found_data()
+            if count:
+                current["total_datapoints"] += 1
+            elif pending <= 0:
+                break
+            else:
+                # The rest of this refId's frames cannot change the answer.
+                column = column_item = None
+                if parser is not None:
+                    # Frames array, holding the frame, its data, its values and this column
+                    parser.skip(parser.depth - 4 if event == "scalar" else parser.depth - 5)
+        elif prefix == column and event == "end_array":
+            if value:
+                # Number of values counted while skipping the column
+                found_data()
+                current["total_datapoints"] += value
+            column = column_item = None
+
+    return results
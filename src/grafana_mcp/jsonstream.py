@@ -0,0 +1,200 @@
+"""
+Incremental JSON parsing over a streamed response body.
+
+``JSONEventParser`` turns chunks of bytes into ``(prefix, event, value)``
+events in the style of ijson. The prefix is the dotted path of the value with
+``item`` standing for array elements, e.g. ``results.A.frames.item``. Events
+are ``start_map``, ``map_key``, ``end_map``, ``start_array``, ``end_array``
+and ``scalar``; scalar values are passed as their raw JSON text so consumers
+that only count them never decode anything. Only the unparsed tail of the
+input is kept in memory.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterator, List, Optional, Tuple
+
+Event = Tuple[str, str, Optional[str]]
+
+_TOKEN = re.compile(r'\s*("(?:[^"\\]|\\.)*"|[\[\]{},:]|[^\s\[\]{},:"]+)')
+_SPACE = re.compile(r"\s*")
+_COMPLETE = frozenset('"[]{},:')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Run of text up to the next bracket or unterminated string, skipping complete strings
+_RUN = re.compile(r'[^\[\]{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\[\]{}"]*)*')
+
+
+def _join(prefix: str, segment: str) -> str:
+    return f"{prefix}.{segment}" if prefix else segment
+
+
+def decode_scalar(raw: str) -> Any:
+    """Decode the raw JSON text of a scalar event."""
+    return json.loads(raw)
+
+
+class JSONEventParser:
+    """Push parser that emits events for each complete token fed to it."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        # Stack of (is_map, prefix) for the open containers.
+        self._stack: List[Tuple[bool, str]] = []
+        self._value_prefix = ""
+        self._expect_key = False
+        # Whether the last token opened a container or separated two of its elements
+        self._expect_element = False
+        # While skipping: [depth of the skipped container, current depth, elements counted,
+        # whether the next content at its level starts an element]
+        self._skip: Optional[List[Any]] = None
+
+    @property
+    def depth(self) -> int:
+        """Number of containers open at the last event."""
+        return len(self._stack)
+
+    def skip(self, depth: Optional[int] = None) -> None:
+        """Skip the rest of an open container without emitting events for its contents.
+
+        The next event is the container's end event, whose value is the number
+        of elements, or members of a map, that started after the skip, e.g. all
+        of them when called right after its start event.
+
+        Args:
+            depth (Optional[int]): The ``depth`` at which the container was open;
+                defaults to the innermost one.
+        """
+        depth = len(self._stack) if depth is None else depth
+        if not 0 < depth <= len(self._stack):
+            raise ValueError(f"No open container at depth {depth}")
+        self._skip = [depth, len(self._stack), 0, self._expect_element and depth == len(self._stack)]
+
+    def _scan(self, buffer: str, pos: int) -> Tuple[int, bool]:
+        """Advance a skip over ``buffer`` from ``pos``; get the new position and whether it ended."""
+        skip = self._skip
+        target, depth, elements, pending = skip
+        match_run = _RUN.match
+        end = len(buffer)
+        while True:
+            stop = match_run(buffer, pos).end()
+            if depth == target and stop > pos:
+                # Every comma at the container's level, outside strings, starts an element
+                if buffer.find('"', pos, stop) == -1:
+                    elements += buffer.count(",", pos, stop)
+                else:
+                    elements += _STRING.sub("", buffer[pos:stop]).count(",")
+                if pending and _SPACE.match(buffer, pos).end() < stop:
+                    elements += 1
+                    pending = False
+            pos = stop
+            if pos == end or buffer[pos] == '"':
+                # The rest, or the string starting here, continues in the next chunk
+                break
+            pos += 1
+            if buffer[stop] in "]}":
+                depth -= 1
+                if depth < target:
+                    skip[:] = target, depth, elements, False
+                    return pos, True
+            else:
+                if pending and depth == target:
+                    elements += 1
+                    pending = False
+                depth += 1
+        skip[:] = target, depth, elements, pending
+        return pos, False
+
+    def feed(self, data: bytes, final: bool = False) -> Iterator[Event]:
+        """Parse a chunk of input.
+
+        Args:
+            data (bytes): The next chunk of the document.
+            final (bool): Whether this is the last chunk.
+
+        Yields:
+            Event: ``(prefix, event, value)`` tuples for the tokens completed by this chunk.
+        """
+        buffer = self._buffer + self._decoder.decode(data, final)
+        stack = self._stack
+        match_token = _TOKEN.match
+        pos = 0
+        end = len(buffer)
+        while True:
+            if self._skip is not None:
+                pos, done = self._scan(buffer, pos)
+                if not done:
+                    break
+                target, _, elements, _ = self._skip
+                self._skip = None
+                del stack[target:]
+                is_map, prefix = stack.pop()
+                self._expect_key = self._expect_element = False
+                yield prefix, "end_map" if is_map else "end_array", elements
+                continue
+            match = match_token(buffer, pos)
+            if match is None:
+                break
+            token = match.group(1)
+            first = token[0]
+            # A number or literal touching the end of the buffer may continue in the next chunk.
+            if match.end() == end and not final and first not in _COMPLETE:
+                break
+            pos = match.end()
+            self._expect_element = first == "[" or first == "," or first == "{"
+
+            if first == ",":
+                is_map, prefix = stack[-1]
+                if is_map:
+                    self._expect_key = True
+                else:
+                    self._value_prefix = _join(prefix, "item")
+            elif first == ":":
+                pass
+            elif first == "{":
+                stack.append((True, self._value_prefix))
+                self._expect_key = True
+                yield self._value_prefix, "start_map", None
+            elif first == "[":
+                prefix = self._value_prefix
+                stack.append((False, prefix))
+                self._value_prefix = _join(prefix, "item")
+                yield prefix, "start_array", None
+            elif first == "}" or first == "]":
+                is_map, prefix = stack.pop()
+                self._expect_key = False
+                yield prefix, "end_map" if is_map else "end_array", None
+            elif self._expect_key:
+                prefix = stack[-1][1]
+                key = json.loads(token)
+                self._expect_key = False
+                self._value_prefix = _join(prefix, key)
+                yield prefix, "map_key", key
+            else:
+                yield self._value_prefix, "scalar", token
+
+        self._buffer = buffer[pos:]
+        if final and (self._skip is not None or _SPACE.fullmatch(self._buffer) is None):
+            raise ValueError(f"Invalid JSON near: {self._buffer[:50]!r}")
+
+
+async def aiter_events(
+    chunks: AsyncIterable[bytes], parser: Optional[JSONEventParser] = None
+) -> AsyncIterator[Event]:
+    """Parse an async stream of byte chunks into JSON events.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The document, e.g. ``httpx.Response.aiter_bytes()``.
+        parser (Optional[JSONEventParser]): The parser to use, so the consumer can ``skip``
+            containers; a new one by default.
+
+    Yields:
+        Event: ``(prefix, event, value)`` tuples.
+    """
+    parser = parser or JSONEventParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.feed(b"", final=True):
+        yield event
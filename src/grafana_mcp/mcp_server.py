@@ -2,45 +2,245 @@
 Grafana MCP server implementation
 """
 
-from grafana_client.client import TokenAuth
-from grafana_client import GrafanaApi
-import os
-import requests
-import json
+import asyncio
+import logging
+import time
 import uuid
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
 
+import fastmcp
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from grafana_mcp.admission import client_id, get_admission_stats, get_limiter
+from grafana_mcp.cache import TTLCache
+from grafana_mcp.coalesce import get_coalescer, request_key
+from grafana_mcp.config import get_settings
+from grafana_mcp.dashboards import (
+    CLICKHOUSE_DATASOURCE_TYPE, DashboardPatch, append_panel, collect_targets, set_target_sql)
+from grafana_mcp.disk_cache import get_disk_cache
+from grafana_mcp.cost import QueryBudgetError, get_cost_guard
+from grafana_mcp.dashboard_cache import get_dashboard_cache
+from grafana_mcp.connection import get_grafana_client, get_pool_stats, grafana_request_async, run_sync  # noqa: F401
+from grafana_mcp.folders import get_folder_cache
+from grafana_mcp.frames import frame_columns, frame_rows, scan_frame_values, time_series_contract_errors
+from grafana_mcp.jsonstream import JSONEventParser, aiter_events
+from grafana_mcp import metrics
+from grafana_mcp.profiling import get_profiler
+from grafana_mcp.query_cache import get_query_cache, query_cache_key
+from grafana_mcp.schema import get_schema_catalog
+from grafana_mcp.search_index import get_dashboard_index
+from grafana_mcp.sql import BUCKETS, explain_sql, normalize_sql, range_decomposition, schema_probe_sql
+from grafana_mcp.templates import get_template_registry
+from grafana_mcp.timerange import resolve_range
+from grafana_mcp.timeseries_cache import get_timeseries_cache
+from grafana_mcp.warmup import get_warmup, start_warmup
+
+
+logger = logging.getLogger(__name__)
 
-from importlib import resources
+# Create an MCP server
+mcp = FastMCP("Grafana MCP")
 
-import dotenv
 
-# Load environment variables from .env file
-dotenv.load_dotenv()
+class ToolMetricsMiddleware(Middleware):
+    """Record the duration of every tool call and trace it as the parent of its Grafana requests."""
 
-# Create an MCP server
-mcp = FastMCP("Grafana MCP")
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        status = "error"
+        start = time.perf_counter()
+        with metrics.span(f"tool {tool}", **{"mcp.tool.name": tool}):
+            try:
+                result = await call_next(context)
+                content = getattr(result, "structured_content", None)
+                # Tools report failures in an 'error' field rather than raising
+                if not (isinstance(content, dict) and content.get("error")):
+                    status = "ok"
+                return result
+            finally:
+                metrics.TOOL_DURATION.observe(time.perf_counter() - start, tool, status)
 
 
-def get_grafana_client():
-    """Creates a Grafana client instance.
+class SessionMiddleware(Middleware):
+    """Key the datasource queries of a tool call by MCP session, so that admission control can be fair."""
 
-    Returns:
-        A Grafana client instance.
+    async def on_call_tool(self, context, call_next):
+        try:
+            session_id = context.fastmcp_context.session_id
+        except (AttributeError, RuntimeError):
+            session_id = None
+        token = client_id.set(session_id or client_id.get())
+        try:
+            return await call_next(context)
+        finally:
+            client_id.reset(token)
+
+
+class ProfilingMiddleware(Middleware):
+    """Profile a sample of tool calls, see ``grafana_mcp.profiling``."""
+
+    async def on_call_tool(self, context, call_next):
+        profiler = get_profiler()
+        if not profiler.should_profile():
+            return await call_next(context)
+        with profiler.profile(context.message.name):
+            return await call_next(context)
+
+
+mcp.add_middleware(ToolMetricsMiddleware())
+mcp.add_middleware(SessionMiddleware())
+mcp.add_middleware(ProfilingMiddleware())
+
+# Validation modes: "schema" runs the query wrapped in LIMIT 0 over a narrow
+# range to get its columns, "explain" only asks ClickHouse to plan it, and
+# "full" executes it over the requested range.
+VALIDATION_MODES = ("schema", "explain", "full")
+PROBE_TIME_FROM = "now-5m"
+PROBE_TIME_TO = "now"
+
+# Access tokens of public dashboards by dashboard UID. A token stays valid
+# until the public dashboard is deleted, so entries are kept for an hour.
+PUBLIC_TOKEN_TTL = 3600.0
+_public_tokens = TTLCache(PUBLIC_TOKEN_TTL)
+
+
+def _cache_metrics() -> List[metrics.Family]:
+    return metrics.cache_families({
+        "query": get_query_cache().stats(),
+        "folder": get_folder_cache().stats(),
+        "public_token": _public_tokens.stats(),
+        "dashboard": get_dashboard_cache().stats(),
+    })
+
+
+def _admission_metrics() -> List[metrics.Family]:
+    queues = get_admission_stats()
+    return [
+        ("grafana_mcp_datasource_queries_active", "gauge", "Datasource queries running.",
+         [("", {"datasource": uid}, stats["active"]) for uid, stats in queues.items()]),
+        ("grafana_mcp_datasource_queries_queued", "gauge", "Datasource queries waiting for a slot.",
+         [("", {"datasource": uid}, stats["queued"]) for uid, stats in queues.items()]),
+        ("grafana_mcp_datasource_queries_rejected", "counter", "Datasource queries rejected with a full queue.",
+         [("_total", {"datasource": uid}, stats["rejected"]) for uid, stats in queues.items()]),
+    ]
+
+
+metrics.register_collector(_cache_metrics)
+metrics.register_collector(_admission_metrics)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Serve the server metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _is_admin(request: Request) -> bool:
+    token = get_settings().admin_token
+    return bool(token) and request.headers.get("Authorization", "") == f"Bearer {token}"
+
+
+@mcp.custom_route("/debug/profile", methods=["GET", "POST"])
+async def profile_endpoint(request: Request) -> JSONResponse:
+    """Get the slowest profiled tool calls, or change profiling with a POST.
+
+    Only served with ``GRAFANA_MCP_ADMIN_TOKEN`` set and sent as a bearer token.
+    A POST takes the query parameters 'rate' (fraction of calls to profile, 0
+    to stop), 'interval' (seconds of CPU time between samples) and 'clear'.
+    GET takes an optional 'tool'.
     """
-    grafana_url = os.getenv("GRAFANA_URL", "http://pytorchci.grafana.net")
-    api_key = os.getenv("GRAFANA_API_TOKEN")
-    if not api_key:
-        raise ValueError("GRAFANA_API_TOKEN environment variable is not set.")
+    if not _is_admin(request):
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    profiler = get_profiler()
+    if request.method == "POST":
+        try:
+            rate, interval = request.query_params.get("rate"), request.query_params.get("interval")
+            profiler.configure(float(rate) if rate else None, float(interval) if interval else None)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if request.query_params.get("clear"):
+            profiler.clear()
+    return JSONResponse({**profiler.stats(), "slowest": profiler.slowest(request.query_params.get("tool"))})
+
+
+@mcp.custom_route("/debug/profile/collapsed", methods=["GET"])
+async def profile_collapsed(request: Request) -> PlainTextResponse:
+    """Get the stacks of the slowest profiled tool calls in the collapsed format of flamegraph tools."""
+    if not _is_admin(request):
+        return PlainTextResponse("Not found\n", status_code=404)
+    return PlainTextResponse(get_profiler().collapsed(request.query_params.get("tool")))
+
+
+# Warmup steps that must succeed before the server reports ready
+WARMUP_REQUIRED = ("token", "templates")
+# Connections to Grafana opened at startup
+WARMUP_CONNECTIONS = 4
+
+
+def _warmup_steps() -> Dict[str, Any]:
+    """Get the startup warmup steps, run concurrently by ``grafana_mcp.warmup``."""
+    settings = get_settings()
+
+    async def token() -> Dict[str, Any]:
+        if not settings.api_token:
+            raise RuntimeError("GRAFANA_API_TOKEN environment variable is not set.")
+        health, org = await asyncio.gather(grafana_request_async("GET", "/api/health"),
+                                           grafana_request_async("GET", "/api/org"))
+        health.raise_for_status()
+        org.raise_for_status()
+        return {"grafana_version": health.json().get("version"), "org": org.json().get("name")}
+
+    async def connections() -> int:
+        # Concurrent requests make the client open several pooled connections
+        count = min(settings.pool_size, WARMUP_CONNECTIONS)
+        await asyncio.gather(*[grafana_request_async("GET", "/api/health", coalesce=False) for _ in range(count)])
+        return count
+
+    async def folders() -> Optional[int]:
+        # Resolving a folder path starts by listing the root folders
+        cache = get_folder_cache()
+        if cache.is_listed(None):
+            return None
+        children = await _list_child_folders(None)
+        cache.store_children(None, children)
+        return len(children)
+
+    async def datasources() -> Dict[str, Any]:
+        response = await grafana_request_async("GET", "/api/datasources")
+        response.raise_for_status()
+        uids = [datasource.get("uid") for datasource in response.json()]
+        return {"count": len(uids), "default_found": settings.datasource_uid in uids}
+
+    async def templates() -> None:
+        get_template_registry().load_all()
+
+    return {"token": token, "connections": connections, "folders": folders,
+            "datasources": datasources, "templates": templates}
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def readiness(request: Request) -> JSONResponse:
+    """Answer 200 once the startup warmup has succeeded, and 503 until then.
+
+    Load balancers can use it to keep traffic away from cold instances. With
+    ``GRAFANA_WARMUP`` disabled the server is always ready.
+    """
+    warmup = get_warmup()
+    if warmup is None:
+        return JSONResponse({"ready": True, "state": "disabled"})
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
-    return GrafanaApi.from_url(
-        url=grafana_url,
-        credential=TokenAuth(token=api_key)
-    )
 
+def _public_dashboard_url(access_token: str) -> str:
+    return f"{get_settings().grafana_url}/public-dashboards/{access_token}"
 
-def make_dashboard_public(dashboard_uid: str) -> Dict[str, Any]:
+
+async def make_dashboard_public_async(dashboard_uid: str) -> Dict[str, Any]:
     """Makes a dashboard public using the Grafana HTTP API.
 
     Args:
@@ -49,18 +249,6 @@ def make_dashboard_public(dashboard_uid: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: The API response containing public dashboard details.
     """
-    grafana_url = os.getenv("GRAFANA_URL", "http://pytorchci.grafana.net")
-    api_key = os.getenv("GRAFANA_API_TOKEN")
-
-    if not api_key:
-        raise ValueError("GRAFANA_API_TOKEN environment variable is not set.")
-
-    endpoint = f"{grafana_url}/api/dashboards/uid/{dashboard_uid}/public-dashboards/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-
     # Create public dashboard payload
     payload = {
         "isEnabled": True,
@@ -68,26 +256,61 @@ def make_dashboard_public(dashboard_uid: str) -> Dict[str, Any]:
         "share": "public"
     }
 
-    response = requests.post(endpoint, headers=headers, json=payload)
+    response = await grafana_request_async(
+        "POST", f"/api/dashboards/uid/{dashboard_uid}/public-dashboards/", json=payload)
     response.raise_for_status()  # Raise an exception for HTTP errors
 
-    return response.json()
+    data = response.json()
+    if data.get("accessToken"):
+        _public_tokens.set(dashboard_uid, data["accessToken"])
+    return data
 
 
-def get_grafana_folders(parent_uid: str = None) -> Dict[str, Any]:
+def make_dashboard_public(dashboard_uid: str) -> Dict[str, Any]:
+    """Synchronous wrapper for ``make_dashboard_public_async``."""
+    return run_sync(make_dashboard_public_async(dashboard_uid))
+
+
+async def get_grafana_folders_async(parent_uid: str = None) -> Dict[str, Any]:
     """Get all folders from Grafana.
 
     Returns:
         Dict[str, Any]: Dictionary containing folder information with folder names as keys and folder data as values.
     """
-    client = get_grafana_client()
-    folders = client.folder.get_all_folders(parent_uid=parent_uid)
+    params = {"parentUid": parent_uid} if parent_uid else {}
+    response = await grafana_request_async("GET", "/api/folders", params=params)
+    response.raise_for_status()
+
+    return {folder['title']: folder for folder in response.json()}
+
+
+def get_grafana_folders(parent_uid: str = None) -> Dict[str, Any]:
+    """Synchronous wrapper for ``get_grafana_folders_async``."""
+    return run_sync(get_grafana_folders_async(parent_uid))
+
+
+async def create_folder_async(title: str, parent_uid: Optional[str] = None) -> Dict[str, Any]:
+    """Create a Grafana folder.
+
+    Args:
+        title (str): Title of the new folder.
+        parent_uid (Optional[str]): UID of the parent folder, or None for the root.
+
+    Returns:
+        Dict[str, Any]: The created folder.
+    """
+    payload = {"title": title}
+    if parent_uid is not None:
+        payload["parentUid"] = parent_uid
+
+    response = await grafana_request_async("POST", "/api/folders", json=payload)
+    response.raise_for_status()
 
-    return {folder['title']: folder for folder in folders}
+    return response.json()
 
 
 @mcp.tool()
-def get_or_create_folder(folder_name: str, parent_uid: str = None) -> int:
+async def get_or_create_folder(folder_name: str, parent_uid: str = None) -> int:
     """Get folder ID by name, or create the folder if it doesn't exist.
 
     Args:
@@ -96,168 +319,672 @@ def get_or_create_folder(folder_name: str, parent_uid: str = None) -> int:
     Returns:
         int: The folder ID. Returns None for root folder (empty folder_name).
     """
-    return get_or_create_folder_internal(folder_name, parent_uid)
+    return await get_or_create_folder_async(folder_name, parent_uid)
+
+
+async def _list_child_folders(parent_uid: Optional[str]) -> List[Dict[str, Any]]:
+    return list((await get_grafana_folders_async(parent_uid=parent_uid)).values())
+
+
+async def get_or_create_folder_async(folder_name: str, parent_uid: Optional[str] = None) -> Optional[int]:
+    folder = await get_folder_cache().resolve(
+        folder_name, _list_child_folders, create_folder_async, parent_uid=parent_uid)
+
+    return folder['id'] if folder else None
 
 
 def get_or_create_folder_internal(folder_name: str, parent_uid: Optional[str] = None) -> Optional[int]:
-    client = get_grafana_client()
-    folders = get_grafana_folders(parent_uid=parent_uid)
+    """Synchronous wrapper for ``get_or_create_folder_async``."""
+    return run_sync(get_or_create_folder_async(folder_name, parent_uid))
+
+
+def _datasource_query(
+    raw_sql: str,
+    datasource_uid: str,
+    ref_id: str = "A",
+    query_format: int = 0,
+    datasource_type: str = CLICKHOUSE_DATASOURCE_TYPE
+) -> Dict[str, Any]:
+    return {
+        "refId": ref_id,
+        "datasource": {
+            "type": datasource_type,
+            "uid": datasource_uid
+        },
+        "rawSql": raw_sql,
+        "format": query_format
+    }
+
+
+def _query_payload(queries: List[Dict[str, Any]], time_from: str, time_to: str) -> Dict[str, Any]:
+    return {
+        "queries": queries,
+        "range": {
+            "from": time_from,
+            "to": time_to
+        },
+        "from": time_from,
+        "to": time_to
+    }
+
+
+async def _post_ds_query(datasource_uid: str, query_payload: Dict[str, Any]):
+    """Run a datasource query under admission control.
+
+    Identical concurrent queries are coalesced into one upstream request
+    holding one datasource slot, and share its response.
+    """
+    async def send():
+        async with get_limiter(datasource_uid).slot():
+            return await grafana_request_async("POST", "/api/ds/query", json=query_payload)
+
+    return await get_coalescer().run(request_key("POST", "/api/ds/query", {"json": query_payload}), send)
+
+
+async def _fetch_query_result(
+    raw_sql: str,
+    datasource_uid: str,
+    time_from: str,
+    time_to: str,
+    query_format: int = 0,
+    delta: bool = True,
+) -> Tuple[Dict[str, Any], int]:
+    """Run a query and get its ``/api/ds/query`` response and size in bytes.
+
+    With ``delta``, queries that can be fetched in time slices go through the
+    delta-fetching cache, so a repeated run only queries the new tail of the range.
+
+    Raises:
+        RuntimeError: If Grafana answers with an HTTP error.
+    """
+    async def fetch(start: str, end: str) -> Tuple[Dict[str, Any], int]:
+        query_payload = _query_payload(
+            [_datasource_query(raw_sql, datasource_uid, query_format=query_format)], start, end)
+        response = await _post_ds_query(datasource_uid, query_payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"Query failed with status {response.status_code}: {response.text}")
+        return response.json(), len(response.content)
 
-    folder_segments = [seg.strip() for seg in folder_name.split("/") if seg.strip()]
-    folder_id = None
+    decomposition = range_decomposition(raw_sql) if delta else None
+    if decomposition is None:
+        return await fetch(time_from, time_to)
 
-    for segment in folder_segments:
-        folders = get_grafana_folders(parent_uid=parent_uid)
-        if segment in folders:
-            parent_uid = folders[segment]['uid']
-            folder_id = folders[segment]['id']
-        else:
-            result = client.folder.create_folder(title=segment, parent_uid=parent_uid)
-            parent_uid = result['uid']
-            folder_id = result['id']
+    start, end = resolve_range(time_from, time_to)
+    key = (datasource_uid, normalize_sql(raw_sql), query_format)
+    return await get_timeseries_cache().get(
+        key, start, end, lambda start, end: fetch(str(int(start * 1000)), str(int(end * 1000))),
+        bucketed=decomposition == BUCKETS)
 
-    return folder_id
 
+async def validate_grafana_query_async(
+    raw_sql: str,
+    time_from: str = "now-30d",
+    time_to: str = "now",
+    datasource_uid: str = None,
+    use_cache: bool = True,
+    mode: str = "schema"
+) -> Dict[str, Any]:
+    """Validate a Grafana query against the datasource.
 
-def validate_grafana_query(raw_sql: str, time_from: str = "now-30d", time_to: str = "now", datasource_uid: str = None) -> Dict[str, Any]:
-    """Validate a Grafana query by executing it against the datasource.
+    By default the query is only probed for its columns; pass ``mode="full"``
+    to execute it over the requested time range. Successful results are cached
+    by datasource, normalized SQL, time range and mode. Full runs are first
+    checked against the query cost budget, which may narrow their time range.
 
     Args:
         raw_sql (str): The SQL query to validate.
-        time_from (str): Start time for the query range. Defaults to "now-30d".
-        time_to (str): End time for the query range. Defaults to "now".
+        time_from (str): Start time for the query range in "full" mode. Defaults to "now-30d".
+        time_to (str): End time for the query range in "full" mode. Defaults to "now".
         datasource_uid (str): The datasource UID. Uses environment default if None.
+        use_cache (bool): Whether to serve and store the result in the query cache. Defaults to True.
+        mode (str): One of "schema", "explain" or "full". Defaults to "schema".
 
     Returns:
-        Dict[str, Any]: Dictionary with 'is_valid', 'error', and optional 'result' keys.
+        Dict[str, Any]: Dictionary with 'is_valid', 'error', and optional 'result', 'columns' and
+        'cost' keys.
     """
-    grafana_url = os.getenv("GRAFANA_URL", "http://pytorchci.grafana.net")
-    api_key = os.getenv("GRAFANA_API_TOKEN")
+    if mode not in VALIDATION_MODES:
+        return {"is_valid": False, "error": f"Unknown validation mode '{mode}', expected one of {VALIDATION_MODES}"}
 
-    if not api_key:
+    settings = get_settings()
+    if not settings.api_token:
         return {"is_valid": False, "error": "GRAFANA_API_TOKEN environment variable is not set."}
 
     if not datasource_uid:
-        datasource_uid = os.getenv("GRAFANA_DATASOURCE_UID", "Clickhouse")
+        datasource_uid = settings.datasource_uid
+
+    query_format = 0
+    if mode == "schema":
+        raw_sql, query_format = schema_probe_sql(raw_sql), 1
+        time_from, time_to = PROBE_TIME_FROM, PROBE_TIME_TO
+    elif mode == "explain":
+        raw_sql, query_format = explain_sql(raw_sql), 1
+        time_from, time_to = PROBE_TIME_FROM, PROBE_TIME_TO
 
     try:
-        query_endpoint = f"{grafana_url}/api/ds/query"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
+        cost = None
+        if mode == "full":
+            cost = await _plan_query(raw_sql, datasource_uid, time_from, time_to)
+            if cost is not None:
+                time_from, time_to = cost["time_from"], cost["time_to"]
+
+        cache_key = None
+        if use_cache:
+            cache_key = query_cache_key(datasource_uid, raw_sql, time_from, time_to, mode)
+            cached = get_query_cache().get(cache_key)
+            if cached is not None:
+                return _validation_result(cached, mode, cost)
+
+        query_result, size = await _fetch_query_result(
+            raw_sql, datasource_uid, time_from, time_to, query_format, delta=mode == "full")
+        errors = [r["error"] for r in query_result.get("results", {}).values() if r.get("error")]
+        if errors:
+            return {"is_valid": False, "error": "; ".join(errors)}
+
+        if cache_key is not None:
+            get_query_cache().set(cache_key, query_result, size=size)
+        return _validation_result(query_result, mode, cost)
+
+    except QueryBudgetError as e:
+        return {"is_valid": False, "error": str(e), "cost": e.estimate}
+    except Exception as e:
+        return {"is_valid": False, "error": str(e)}
 
-        # Prepare query payload
-        query_payload = {
-            "queries": [{
-                "refId": "A",
-                "datasource": {
-                    "type": "grafana-clickhouse-datasource",
-                    "uid": datasource_uid
-                },
-                "rawSql": raw_sql,
-                "format": 0
-            }],
-            "range": {
-                "from": time_from,
-                "to": time_to
-            },
-            "from": time_from,
-            "to": time_to
-        }
 
-        response = requests.post(query_endpoint, headers=headers, json=query_payload)
+def _validation_result(query_result: Dict[str, Any], mode: str, cost: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    result = {"is_valid": True, "result": query_result}
+    if mode != "explain":
+        result["columns"] = frame_columns(query_result)
+    if cost is not None:
+        result["cost"] = cost
+    return result
 
-        if response.status_code != 200:
-            return {
-                "is_valid": False,
-                "error": f"Query failed with status {response.status_code}: {response.text}"
-            }
 
+def validate_grafana_query(
+    raw_sql: str,
+    time_from: str = "now-30d",
+    time_to: str = "now",
+    datasource_uid: str = None,
+    use_cache: bool = True,
+    mode: str = "schema"
+) -> Dict[str, Any]:
+    """Synchronous wrapper for ``validate_grafana_query_async``."""
+    return run_sync(validate_grafana_query_async(raw_sql, time_from, time_to, datasource_uid, use_cache, mode))
+
+
+@mcp.tool()
+async def run_query(
+    raw_sql: str,
+    time_from: str = "now-1d",
+    time_to: str = "now",
+    max_points: int = 500,
+    method: str = "lttb",
+    max_series: int = 20,
+    datasource_uid: str = None
+) -> Dict[str, Any]:
+    """Run a SQL query and get compact, downsampled series with statistics.
+
+    Rows with a time column are split into series: one per numeric column and
+    combination of string column values (e.g. a `name` label). Each series is
+    downsampled to at most `max_points` points, keeping the visual shape, and
+    comes with statistics over all of its rows. Results without a time column
+    are returned as tables truncated to `max_points` rows. The response size
+    does not depend on the number of rows returned by the query.
+
+    Grafana macros such as `$__timeFilter(column)` are expanded with the given
+    time range. Running a `$__timeFilter` query again over a range that moved
+    forward, e.g. `now-30d` to `now`, only queries the new data.
+
+    The rows and bytes the query would read are estimated first. Queries over
+    the server's budget are rejected, or run over the latest part of their
+    time range that fits it; 'cost' tells which.
+
+    Args:
+        raw_sql (str): The SQL query to run.
+        time_from (str): Start of the time range. Defaults to "now-1d".
+        time_to (str): End of the time range. Defaults to "now".
+        max_points (int): Maximum points per series or rows per table. Defaults to 500.
+        method (str): "lttb" to keep the shape of the line, or "minmax" to keep every
+            bucket's extremes. Defaults to "lttb".
+        max_series (int): Maximum series returned. Defaults to 20.
+        datasource_uid (str): The datasource UID. Uses environment default if None.
+
+    Returns:
+        Dict[str, Any]: 'series' with 'name', 'labels', 'stats' (count, nulls, min, max, mean, p50,
+        p90, p99), and the 'time' (epoch ms) and 'values' columns; 'tables' for results without a
+        time column; 'row_count', 'series_count' and 'series_truncated'; 'cost' with the estimated
+        'rows', 'parts', 'marks' and 'bytes', the range run and, if narrowed, the requested range
+        under 'narrowed_from'; 'error' on failure.
+    """
+    # Imported here so that NumPy is only loaded once a query is run
+    from grafana_mcp.series import DOWNSAMPLING_METHODS, summarize_query_result
+
+    if method not in DOWNSAMPLING_METHODS:
+        return {"error": f"Unknown downsampling method '{method}', expected one of {DOWNSAMPLING_METHODS}"}
+    if max_points < 2 or max_series < 1:
+        return {"error": "max_points must be at least 2 and max_series at least 1."}
+
+    settings = get_settings()
+    if not settings.api_token:
+        return {"error": "GRAFANA_API_TOKEN environment variable is not set."}
+    datasource_uid = datasource_uid or settings.datasource_uid
+
+    try:
+        cost = await _plan_query(raw_sql, datasource_uid, time_from, time_to)
+        if cost is not None:
+            time_from, time_to = cost["time_from"], cost["time_to"]
+
+        cache_key = query_cache_key(datasource_uid, raw_sql, time_from, time_to, "run_query")
+        query_result = get_query_cache().get(cache_key)
+        if query_result is None:
+            query_result, size = await _fetch_query_result(raw_sql, datasource_uid, time_from, time_to, 1)
+            errors = [r["error"] for r in query_result.get("results", {}).values() if r.get("error")]
+            if errors:
+                return {"error": "; ".join(errors)}
+            get_query_cache().set(cache_key, query_result, size=size)
+
+        summary = summarize_query_result(query_result, max_points=max_points, method=method, max_series=max_series)
+        if cost is not None:
+            summary["cost"] = cost
+        return summary
+
+    except QueryBudgetError as e:
+        return {"error": str(e), "cost": e.estimate}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _sql_runner(datasource_uid: str):
+    """Get a coroutine function running a table query on a datasource and returning its rows."""
+    async def run_sql(raw_sql: str, time_from: str = PROBE_TIME_FROM, time_to: str = PROBE_TIME_TO
+                      ) -> List[Dict[str, Any]]:
+        query_payload = _query_payload(
+            [_datasource_query(raw_sql, datasource_uid, query_format=1)], time_from, time_to)
+        response = await _post_ds_query(datasource_uid, query_payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"Query failed with status {response.status_code}: {response.text}")
         query_result = response.json()
-        return {"is_valid": True, "result": query_result}
+        errors = [r["error"] for r in query_result.get("results", {}).values() if r.get("error")]
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return frame_rows(query_result)
+
+    return run_sql
+
+
+async def _plan_query(
+    raw_sql: str, datasource_uid: str, time_from: str, time_to: str, narrow: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Check a query against the cost budget, see ``CostGuard.plan``."""
+    return await get_cost_guard().plan(datasource_uid, raw_sql, time_from, time_to, _sql_runner(datasource_uid), narrow)
+
+
+async def _fresh_schema_catalog(datasource_uid: Optional[str]):
+    datasource_uid = datasource_uid or get_settings().datasource_uid
+    catalog = get_schema_catalog(datasource_uid)
+    await catalog.ensure_fresh(_sql_runner(datasource_uid))
+    return catalog
 
+
+@mcp.tool()
+async def list_tables(database: str = None, pattern: str = None, datasource_uid: str = None) -> Dict[str, Any]:
+    """List the ClickHouse tables available to queries.
+
+    Answers from a cached catalog of the datasource's tables and columns,
+    refreshed in the background every few minutes, so it is cheap to call
+    repeatedly.
+
+    Args:
+        database (str): Only list tables of this database.
+        pattern (str): Only list tables whose name contains this text (case-insensitive).
+        datasource_uid (str): The datasource UID. Uses environment default if None.
+
+    Returns:
+        Dict[str, Any]: 'tables' with 'database', 'table', 'engine' and 'columns' count; 'error' on failure.
+    """
+    try:
+        catalog = await _fresh_schema_catalog(datasource_uid)
     except Exception as e:
-        return {"is_valid": False, "error": str(e)}
+        return {"tables": [], "error": str(e)}
+    return {"tables": catalog.list_tables(database, pattern)}
 
 
-def check_dashboard_has_data(dashboard_uid: str) -> Dict[str, Any]:
-    """Check if a dashboard has any data for the default time range.
+@mcp.tool()
+async def search_columns(
+    query: str,
+    database: str = None,
+    table: str = None,
+    limit: int = 20,
+    datasource_uid: str = None
+) -> Dict[str, Any]:
+    """Find ClickHouse columns by name, tolerating typos.
+
+    Use it to find which table holds a metric, or with `database` and `table`
+    and an empty `query` to list the columns of a table.
 
     Args:
-        dashboard_uid (str): The UID of the dashboard to check.
+        query (str): Column name or part of it, case-insensitive.
+        database (str): Only search this database.
+        table (str): Only search this table.
+        limit (int): Maximum number of results. Defaults to 20.
+        datasource_uid (str): The datasource UID. Uses environment default if None.
 
     Returns:
-        Dict[str, Any]: Dictionary containing check results with 'has_data', 'error', and 'details' keys.
+        Dict[str, Any]: 'columns' with 'database', 'table', 'column', 'type', 'comment' and a match
+        'score' between 0 and 1, best first; 'error' on failure.
     """
-    grafana_url = os.getenv("GRAFANA_URL", "http://pytorchci.grafana.net")
-    api_key = os.getenv("GRAFANA_API_TOKEN")
+    try:
+        catalog = await _fresh_schema_catalog(datasource_uid)
+    except Exception as e:
+        return {"columns": [], "error": str(e)}
+    return {"columns": catalog.search_columns(query, database, table, limit)}
 
-    if not api_key:
-        return {"has_data": False, "error": "GRAFANA_API_TOKEN environment variable is not set."}
 
+async def get_dashboard_async(dashboard_uid: str, use_cache: bool = True) -> Dict[str, Any]:
+    """Get a dashboard and its metadata by UID.
+
+    Responses are cached. After ``GRAFANA_DASHBOARD_CACHE_TTL`` seconds, a
+    cached response is only downloaded again if the dashboard's version
+    changed. Saving a dashboard through this server drops its entry.
+
+    Args:
+        dashboard_uid (str): The UID of the dashboard.
+        use_cache (bool): Whether a cached response may be returned. Defaults to True.
+
+    Returns:
+        Dict[str, Any]: The API response with 'dashboard' and 'meta' keys. It may be shared
+        with other callers and must not be modified.
+    """
+    if use_cache:
+        return await get_dashboard_cache().get(dashboard_uid, _download_dashboard, _latest_dashboard_version)
+
+    result, size = await _download_dashboard(dashboard_uid)
+    get_dashboard_cache().store(dashboard_uid, result, size)
+    return result
+
+
+async def _download_dashboard(dashboard_uid: str) -> Tuple[Dict[str, Any], int]:
+    response = await grafana_request_async("GET", f"/api/dashboards/uid/{dashboard_uid}")
+    response.raise_for_status()
+    return response.json(), len(response.content)
+
+
+async def _latest_dashboard_version(dashboard_uid: str) -> Optional[int]:
+    """Get the latest version of a dashboard from its version history, or None if unavailable."""
+    response = await grafana_request_async(
+        "GET", f"/api/dashboards/uid/{dashboard_uid}/versions", params={"limit": 1})
+    if response.status_code != 200:
+        return None
+    # Grafana 11 wraps the list in an object with a continuation token
+    versions = response.json()
+    if isinstance(versions, dict):
+        versions = versions.get("versions") or []
+    return versions[0].get("version") if versions else None
+
+
+async def _fetch_dashboard(dashboard_uid: str) -> Dict[str, Any]:
+    # Index syncs read many dashboards once and bypass the cache to keep it for tool reads
+    return (await _download_dashboard(dashboard_uid))[0]
+
+
+async def save_dashboard_async(dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    """Create or update a dashboard.
+
+    Args:
+        dashboard (Dict[str, Any]): Payload for ``/api/dashboards/db`` with a 'dashboard' key.
+
+    Returns:
+        Dict[str, Any]: The API response with the saved dashboard's uid, url and version.
+    """
+    response = await grafana_request_async("POST", "/api/dashboards/db", json=dashboard)
+    response.raise_for_status()
+
+    result = response.json()
+    get_dashboard_cache().invalidate(result.get("uid") or dashboard["dashboard"].get("uid"))
+    return result
+
+
+# Page size of /api/search, which Grafana caps at 5000
+SEARCH_PAGE_SIZE = 5000
+
+
+async def list_dashboards_async() -> List[Dict[str, Any]]:
+    """List all dashboards through ``/api/search``.
+
+    Returns:
+        List[Dict[str, Any]]: The search hits with 'uid', 'title', 'tags', 'folderUid' and 'folderTitle'.
+    """
+    hits: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        response = await grafana_request_async(
+            "GET", "/api/search", params={"type": "dash-db", "limit": SEARCH_PAGE_SIZE, "page": page})
+        response.raise_for_status()
+        batch = response.json()
+        hits.extend(batch)
+        if len(batch) < SEARCH_PAGE_SIZE:
+            return hits
+        page += 1
+
+
+@mcp.tool()
+async def search_dashboards(query: str = "", table: str = None, tag: str = None, limit: int = 20) -> Dict[str, Any]:
+    """Search existing dashboards by text, by the table they read from, or by tag.
+
+    Answers from a local index of all dashboards (titles, tags, folders, panel
+    titles and SQL), synced with Grafana in the background every few minutes.
+
+    Args:
+        query (str): Words that must all appear in the dashboard; the last one may be a prefix.
+            Empty to match every dashboard.
+        table (str): Only dashboards with a query reading from this `table` or `database.table`.
+        tag (str): Only dashboards with this tag.
+        limit (int): Maximum number of results. Defaults to 20.
+
+    Returns:
+        Dict[str, Any]: 'dashboards' with 'uid', 'title', 'tags', 'folder', 'url', 'version', 'panels'
+        titles, 'tables' and a relevance 'score', best first; 'total' indexed; 'error' on failure.
+    """
+    index = get_dashboard_index()
     try:
-        # Get dashboard data
-        client = get_grafana_client()
-        dashboard_response = client.dashboard.get_dashboard(dashboard_uid)
-        dashboard = dashboard_response['dashboard']
+        await index.ensure_fresh(list_dashboards_async, _fetch_dashboard, _latest_dashboard_version)
+    except Exception as e:
+        return {"dashboards": [], "error": str(e)}
+    return {"dashboards": index.search(query, table=table, tag=tag, limit=limit), "total": len(index)}
 
-        # Extract time range (default from dashboard.json is "now-30d" to "now")
-        time_from = dashboard.get('time', {}).get('from', 'now-30d')
-        time_to = dashboard.get('time', {}).get('to', 'now')
 
-        # Get the first panel's query
-        if not dashboard.get('panels') or len(dashboard['panels']) == 0:
-            return {"has_data": False, "error": "No panels found in dashboard"}
+async def queries_have_data_async(
+    queries: List[Dict[str, Any]],
+    time_from: str,
+    time_to: str,
+    count_datapoints: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """Check whether queries return any data, reading the response as a stream.
 
-        panel = dashboard['panels'][0]
-        if not panel.get('targets') or len(panel['targets']) == 0:
-            return {"has_data": False, "error": "No queries found in panel"}
+    All queries are sent in one ``/api/ds/query`` request, holding a slot of
+    the first query's datasource until the response is read. The response body
+    is parsed incrementally and never held in memory; value columns, and the
+    frames of queries already known to have data, are skipped by a byte scan
+    rather than tokenized. Unless ``count_datapoints`` is set, the download
+    stops once every query has returned a value.
 
-        target = panel['targets'][0]
-        raw_sql = target.get('rawSql', '')
+    Args:
+        queries (List[Dict[str, Any]]): Datasource queries with distinct 'refId's.
+        time_from (str): Start time for the query range.
+        time_to (str): End time for the query range.
+        count_datapoints (bool): Whether to read the whole result and count its values.
 
-        if not raw_sql:
-            return {"has_data": False, "error": "No SQL query found"}
+    Returns:
+        Dict[str, Dict[str, Any]]: Per refId, 'has_data', optional 'total_datapoints', and 'error' on failure.
+    """
+    ref_ids = [query["refId"] for query in queries]
+    async with get_limiter(queries[0]["datasource"]["uid"]).slot():
+        response = await grafana_request_async(
+            "POST", "/api/ds/query", json=_query_payload(queries, time_from, time_to), stream=True)
+        try:
+            parser = JSONEventParser()
+            events = aiter_events(response.aiter_bytes(), parser)
+            try:
+                results = await scan_frame_values(events, count=count_datapoints, ref_ids=ref_ids, parser=parser)
+            except ValueError:
+                results = {ref_id: {"has_data": False} for ref_id in ref_ids}
+            finally:
+                await events.aclose()
+        finally:
+            await response.aclose()
+
+    if response.status_code >= 400:
+        for result in results.values():
+            result.setdefault("error", f"Query failed with status {response.status_code}")
+    return results
+
+
+async def check_dashboard_has_data_async(dashboard_uid: str, count_datapoints: bool = False) -> Dict[str, Any]:
+    """Check if the panels of a dashboard have any data for its default time range.
+
+    Every query of every panel, including panels in collapsed rows, is checked.
+    Queries are batched per datasource into few ``/api/ds/query`` requests,
+    which run concurrently with a bounded number of workers. Concurrent checks
+    of the same dashboard share one run and its report.
+
+    ClickHouse queries are first checked against the cost budget, see
+    ``CostGuard.plan``: queries over budget are not run and are listed under
+    the panel's 'rejected', and queries narrowed to the latest part of the
+    range that fits are checked over it and listed under 'narrowed'.
 
-        datasource_uid = target.get('datasource', {}).get('uid', os.getenv("GRAFANA_DATASOURCE_UID", "Clickhouse"))
+    Args:
+        dashboard_uid (str): The UID of the dashboard to check.
+        count_datapoints (bool): Whether to also count all returned values. Defaults to False,
+            which stops at the first value found for each query.
 
-        # Use extracted validation method
-        validation_result = validate_grafana_query(raw_sql, time_from, time_to, datasource_uid)
-        if not validation_result["is_valid"]:
-            return {
-                "has_data": False,
-                "error": validation_result["error"]
-            }
+    Returns:
+        Dict[str, Any]: Dictionary with the overall 'has_data', the 'time_range', and a 'panels'
+        report with per-panel 'has_data', 'latency_ms', 'rejected' and 'narrowed' refIds if any, and
+        per-query results with their 'cost' estimate under a budget; 'error' on failure.
+    """
+    return await get_coalescer().run(
+        ("check_dashboard_has_data", dashboard_uid, count_datapoints),
+        lambda: _check_dashboard_has_data(dashboard_uid, count_datapoints))
 
-        query_result = validation_result["result"]
 
-        # Check if there's any data in the results
-        has_data = False
-        total_datapoints = 0
+async def _check_dashboard_has_data(dashboard_uid: str, count_datapoints: bool) -> Dict[str, Any]:
+    settings = get_settings()
+    if not settings.api_token:
+        return {"has_data": False, "error": "GRAFANA_API_TOKEN environment variable is not set."}
 
-        if 'results' in query_result:
-            for result_data in query_result['results'].values():
-                if 'frames' in result_data:
-                    for frame in result_data['frames']:
-                        if 'data' in frame and 'values' in frame['data']:
-                            for values in frame['data']['values']:
-                                if values and len(values) > 0:
-                                    has_data = True
-                                    total_datapoints += len(values)
+    try:
+        dashboard_response = await get_dashboard_async(dashboard_uid)
+        dashboard = dashboard_response['dashboard']
 
-        return {
-            "has_data": has_data,
-            "total_datapoints": total_datapoints,
+        # Extract time range (default from dashboard.json is "now-30d" to "now")
+        time_from = dashboard.get('time', {}).get('from', 'now-30d')
+        time_to = dashboard.get('time', {}).get('to', 'now')
+
+        targets = collect_targets(dashboard, settings.datasource_uid)
+        if not targets:
+            return {"has_data": False, "error": "No SQL queries found in dashboard"}
+
+        semaphore = asyncio.Semaphore(settings.query_concurrency)
+
+        async def plan(target):
+            # Only ClickHouse queries can be estimated
+            if target["datasource_type"] != CLICKHOUSE_DATASOURCE_TYPE:
+                return None
+            async with semaphore:
+                try:
+                    return await _plan_query(target["raw_sql"], target["datasource_uid"], time_from, time_to)
+                except QueryBudgetError as e:
+                    return e
+
+        plans = await asyncio.gather(*[plan(target) for target in targets])
+
+        # Group the targets within budget per datasource and time range, giving each a refId
+        # unique across the dashboard
+        batches: List[Tuple[str, str, List[Tuple[str, Dict[str, Any]]]]] = []
+        open_batches: Dict[Tuple[str, str, str, str], List[Tuple[str, Dict[str, Any]]]] = {}
+        for index, (target, cost) in enumerate(zip(targets, plans)):
+            if isinstance(cost, QueryBudgetError):
+                continue
+            target_from, target_to = (time_from, time_to) if cost is None else (cost["time_from"], cost["time_to"])
+            key = (target["datasource_type"], target["datasource_uid"], target_from, target_to)
+            batch = open_batches.get(key)
+            if batch is None or len(batch) >= settings.query_batch_size:
+                batch = open_batches[key] = []
+                batches.append((target_from, target_to, batch))
+            batch.append((f"q{index}", target))
+
+        async def run_batch(batch_from, batch_to, batch):
+            queries = [
+                _datasource_query(t["raw_sql"], t["datasource_uid"], ref_id, datasource_type=t["datasource_type"])
+                for ref_id, t in batch
+            ]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    results = await queries_have_data_async(queries, batch_from, batch_to, count_datapoints)
+                except Exception as e:
+                    results = {query["refId"]: {"has_data": False, "error": str(e)} for query in queries}
+                return results, (time.perf_counter() - start) * 1000
+
+        panels: Dict[Any, Dict[str, Any]] = {}
+        for target in targets:
+            panels.setdefault(target["panel_id"], {
+                "panel_id": target["panel_id"],
+                "title": target["panel_title"],
+                "has_data": False,
+                "latency_ms": 0.0,
+                "targets": [],
+            })
+
+        results: Dict[str, Dict[str, Any]] = {}
+        latencies: Dict[str, float] = {}
+        for (_, _, batch), (batch_results, latency_ms) in zip(
+                batches, await asyncio.gather(*[run_batch(*batch) for batch in batches])):
+            for ref_id, _ in batch:
+                results[ref_id] = dict(batch_results.get(ref_id, {"has_data": False}))
+                latencies[ref_id] = latency_ms
+
+        for index, (target, cost) in enumerate(zip(targets, plans)):
+            panel = panels[target["panel_id"]]
+            if isinstance(cost, QueryBudgetError):
+                # Not run: the query would read more than the budget allows
+                result = {"has_data": False, "error": str(cost), "cost": cost.estimate}
+                panel.setdefault("rejected", []).append(target["ref_id"])
+            else:
+                result = results[f"q{index}"]
+                panel["latency_ms"] = max(panel["latency_ms"], round(latencies[f"q{index}"], 1))
+                if cost is not None:
+                    result["cost"] = cost
+                    if "narrowed_from" in cost:
+                        # Checked over the latest part of the range that fits the budget
+                        panel.setdefault("narrowed", []).append(target["ref_id"])
+            panel["has_data"] = panel["has_data"] or result["has_data"]
+            panel["targets"].append({"ref_id": target["ref_id"], "datasource_uid": target["datasource_uid"],
+                                     **result})
+
+        report = {
+            "has_data": any(panel["has_data"] for panel in panels.values()),
             "time_range": {"from": time_from, "to": time_to},
-            "query": raw_sql
+            "panels": list(panels.values()),
         }
+        if count_datapoints:
+            report["total_datapoints"] = sum(
+                t.get("total_datapoints", 0) for panel in panels.values() for t in panel["targets"])
+        errors = [t["error"] for panel in panels.values() for t in panel["targets"] if "error" in t]
+        if len(errors) == len(targets):
+            report["error"] = errors[0]
+        return report
 
     except Exception as e:
         return {"has_data": False, "error": str(e)}
 
 
-def get_public_dashboard_url(dashboard_uid: str) -> Optional[str]:
+def check_dashboard_has_data(dashboard_uid: str, count_datapoints: bool = False) -> Dict[str, Any]:
+    """Synchronous wrapper for ``check_dashboard_has_data_async``."""
+    return run_sync(check_dashboard_has_data_async(dashboard_uid, count_datapoints))
+
+
+async def get_public_dashboard_url_async(dashboard_uid: str) -> Optional[str]:
     """Get the public URL for a shared dashboard.
 
     Args:
@@ -266,16 +993,11 @@ def get_public_dashboard_url(dashboard_uid: str) -> Optional[str]:
     Returns:
         Optional[str]: The public URL for the dashboard, or None if not found or not public.
     """
-    grafana_url = os.getenv("GRAFANA_URL", "https://pytorchci.grafana.net")
-    api_key = os.getenv("GRAFANA_API_TOKEN")
-
-    if not api_key:
-        raise ValueError("GRAFANA_API_TOKEN environment variable is not set.")
-
-    endpoint = f"{grafana_url}/api/dashboards/uid/{dashboard_uid}/public-dashboards/"
-    headers = {"Authorization": f"Bearer {api_key}"}
+    access_token = _public_tokens.get(dashboard_uid)
+    if access_token:
+        return _public_dashboard_url(access_token)
 
-    response = requests.get(endpoint, headers=headers)
+    response = await grafana_request_async("GET", f"/api/dashboards/uid/{dashboard_uid}/public-dashboards/")
 
     if response.status_code == 404:
         return None
@@ -292,13 +1014,19 @@ def get_public_dashboard_url(dashboard_uid: str) -> Optional[str]:
     access_token = data.get("accessToken")
 
     if public_dashboard_uid and access_token:
-        return f"{grafana_url}/public-dashboards/{access_token}"
+        _public_tokens.set(dashboard_uid, access_token)
+        return _public_dashboard_url(access_token)
 
     return None
 
 
+def get_public_dashboard_url(dashboard_uid: str) -> Optional[str]:
+    """Synchronous wrapper for ``get_public_dashboard_url_async``."""
+    return run_sync(get_public_dashboard_url_async(dashboard_uid))
+
+
 @mcp.tool()
-def create_time_series_dashboard(
+async def create_time_series_dashboard(
     title: str,
     raw_sql: str,
     description: str = None,
@@ -358,77 +1086,406 @@ def create_time_series_dashboard(
         make_public (bool): Whether to make the dashboard public. Defaults to True.
         folder (str): Name of the folder to create the dashboard in. If empty, uses mcp-generated folder. Defaults to empty string.
 
+    Queries estimated to read more rows than the server's budget over the
+    dashboard's default time range are rejected.
+
     Returns:
-        JSON response from the Grafana API with additional public URL if requested.
+        JSON response from the Grafana API with additional public URL if requested, or
+        'public_url_error' if sharing failed, and the query's estimated 'cost'.
     """
     # Validate the query before creating the dashboard
-    datasource_uid = os.getenv("GRAFANA_DATASOURCE_UID", "Clickhouse")
-    validation_result = validate_grafana_query(raw_sql, datasource_uid=datasource_uid)
+    datasource_uid = get_settings().datasource_uid
+    error, cost = await _validate_time_series_query(raw_sql, datasource_uid)
+    if error:
+        return error
+
+    # Get or create folder and set folderId
+    folder_id = await get_or_create_folder_async(folder)
+
+    dashboard_uid = str(uuid.uuid4())
+    dashboard = get_template_registry().get().build(
+        dashboard_uid, title, raw_sql, datasource_uid, panel_title, description, folder_id)
+    res = await _save_and_share_dashboard(dashboard, dashboard_uid, make_public)
+    if cost is not None:
+        res["cost"] = cost
+    return res
+
+
+@mcp.tool()
+async def create_time_series_dashboards(dashboards: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create several single-panel **Time-series** dashboards at once.
+
+    Each item takes the arguments of ``create_time_series_dashboard``: 'title' and
+    'raw_sql' are required, 'description', 'panel_title', 'make_public' (default
+    True) and 'folder' (default "") are optional. The SQL contract of
+    ``create_time_series_dashboard`` applies to every query.
+
+    Queries are validated concurrently and dashboards are saved in parallel. Each
+    distinct folder is resolved once, when the first of its items has passed
+    validation, so a batch of invalid items creates no folder. A failing item
+    does not stop the others.
+
+    Args:
+        dashboards (List[Dict[str, Any]]): The dashboards to create.
+
+    Returns:
+        Dict[str, Any]: 'results' with one entry per item, in order, holding 'index', 'title',
+        'status' ("success" or "error") and either the Grafana response fields or 'error';
+        plus 'succeeded' and 'failed' counts.
+    """
+    settings = get_settings()
+    datasource_uid = settings.datasource_uid
+    template = get_template_registry().get()
+    semaphore = asyncio.Semaphore(settings.pool_size)
+
+    folder_tasks: Dict[str, asyncio.Future] = {}
+
+    def resolve_folder(folder: str) -> asyncio.Future:
+        task = folder_tasks.get(folder)
+        if task is None:
+            task = folder_tasks[folder] = asyncio.ensure_future(get_or_create_folder_async(folder))
+        return task
+
+    async def create_one(index: int, spec: Dict[str, Any]) -> Dict[str, Any]:
+        result = {"index": index, "title": spec.get("title") if isinstance(spec, dict) else None}
+        try:
+            if not isinstance(spec, dict) or not spec.get("title") or not spec.get("raw_sql"):
+                raise ValueError("Each dashboard needs a 'title' and a 'raw_sql'.")
+
+            async with semaphore:
+                error, cost = await _validate_time_series_query(spec["raw_sql"], datasource_uid)
+            if error:
+                return {**result, "status": "error", **error}
+
+            folder_id = await resolve_folder(str(spec.get("folder") or ""))
+            dashboard_uid = str(uuid.uuid4())
+            dashboard = template.build(dashboard_uid, spec["title"], spec["raw_sql"], datasource_uid,
+                                       spec.get("panel_title"), spec.get("description"), folder_id)
+            async with semaphore:
+                res = await _save_and_share_dashboard(dashboard, dashboard_uid, spec.get("make_public", True))
+            if cost is not None:
+                res["cost"] = cost
+            return {**result, "status": "success", **res}
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+
+    results = await asyncio.gather(*[create_one(index, spec) for index, spec in enumerate(dashboards)])
+
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+# Saves of a patched dashboard attempted before giving up on version conflicts
+PATCH_ATTEMPTS = 3
+
+
+@mcp.tool()
+async def add_panel(
+    dashboard_uid: str,
+    title: str,
+    raw_sql: str,
+    description: str = None
+) -> Dict[str, Any]:
+    """Add a **Time-series** panel to an existing dashboard, below its other panels.
+
+    The SQL contract of ``create_time_series_dashboard`` applies. Only the new
+    query is validated, and the dashboard is saved only if nobody changed it
+    meanwhile; concurrent edits are kept by re-applying the new panel to them.
+
+    Args:
+        dashboard_uid (str): The UID of the dashboard.
+        title (str): Title of the panel.
+        raw_sql (str): SQL of the panel query.
+        description (str): Description of the panel.
+
+    Returns:
+        Dict[str, Any]: The Grafana response ('uid', 'url', 'version') with the new 'panel_id' and
+        the query's estimated 'cost'; 'error' on failure.
+    """
+    datasource_uid = get_settings().datasource_uid
+    panel = get_template_registry().get().build_panel(title, raw_sql, datasource_uid, description)
+    try:
+        current = await get_dashboard_async(dashboard_uid)
+        error, cost = await _validate_time_series_query(raw_sql, datasource_uid, current["dashboard"].get("time"))
+        if error:
+            return error
+        res, patched = await _save_patched_dashboard(
+            dashboard_uid, lambda dashboard: append_panel(dashboard, panel), f"Add panel '{title}'", current)
+    except Exception as e:
+        return {"error": str(e)}
+    res["panel_id"] = patched["panels"][-1]["id"]
+    if cost is not None:
+        res["cost"] = cost
+    return res
+
+
+@mcp.tool()
+async def update_panel_query(
+    dashboard_uid: str,
+    panel_id: int,
+    raw_sql: str,
+    ref_id: str = "A"
+) -> Dict[str, Any]:
+    """Replace the SQL of one query of a dashboard panel.
+
+    The SQL contract of ``create_time_series_dashboard`` applies. Only the
+    changed query is validated, and the dashboard is saved only if nobody
+    changed it meanwhile; concurrent edits are kept by re-applying the new SQL
+    to them.
+
+    Args:
+        dashboard_uid (str): The UID of the dashboard.
+        panel_id (int): The id of the panel, as in the dashboard JSON.
+        raw_sql (str): The new SQL.
+        ref_id (str): The refId of the query in the panel. Defaults to "A".
+
+    Returns:
+        Dict[str, Any]: The Grafana response ('uid', 'url', 'version') with the query's
+        estimated 'cost'; 'error' on failure.
+    """
+    try:
+        current = await get_dashboard_async(dashboard_uid)
+        targets = [target for target in collect_targets(current["dashboard"], get_settings().datasource_uid)
+                   if target["panel_id"] == panel_id and target["ref_id"] == ref_id]
+        # Fails early if the panel or query does not exist
+        set_target_sql(current["dashboard"], panel_id, ref_id, raw_sql)
+        datasource_uid = targets[0]["datasource_uid"] if targets else get_settings().datasource_uid
+        error, cost = await _validate_time_series_query(raw_sql, datasource_uid, current["dashboard"].get("time"))
+        if error:
+            return error
+        res, _ = await _save_patched_dashboard(
+            dashboard_uid, lambda dashboard: set_target_sql(dashboard, panel_id, ref_id, raw_sql),
+            f"Update query {ref_id} of panel {panel_id}", current)
+    except KeyError as e:
+        return {"error": e.args[0]}
+    except Exception as e:
+        return {"error": str(e)}
+    if cost is not None:
+        res["cost"] = cost
+    return res
+
+
+async def _save_patched_dashboard(
+    dashboard_uid: str,
+    patch: DashboardPatch,
+    message: str,
+    current: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Apply a patch to the latest version of a dashboard and save it without overwriting other changes.
+
+    The dashboard is saved with its version and ``overwrite=False``, so Grafana
+    rejects the save if another one happened since it was read. On such a
+    conflict the dashboard is downloaded again and the patch re-applied.
+
+    Args:
+        dashboard_uid (str): The UID of the dashboard.
+        patch (DashboardPatch): Function returning the patched copy of a dashboard model.
+        message (str): Message of the saved version.
+        current (Optional[Dict[str, Any]]): The dashboard response to patch first, if already read.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: The Grafana response and the saved dashboard model.
+
+    Raises:
+        RuntimeError: If every attempt conflicted with another save.
+    """
+    for _ in range(PATCH_ATTEMPTS):
+        if current is None:
+            current = await get_dashboard_async(dashboard_uid, use_cache=False)
+        patched = patch(current["dashboard"])
+        payload = {"dashboard": patched, "folderUid": current.get("meta", {}).get("folderUid"),
+                   "overwrite": False, "message": message}
+        response = await grafana_request_async("POST", "/api/dashboards/db", json=payload)
+        get_dashboard_cache().invalidate(dashboard_uid)
+        # Grafana also answers 412 to a title already used in the folder, which retrying cannot fix
+        if response.status_code == 412 and response.json().get("status") == "version-mismatch":
+            current = None
+            continue
+        response.raise_for_status()
+
+        res = response.json()
+        get_dashboard_index().update({"dashboard": {**patched, "version": res.get("version")},
+                                      "meta": {**current.get("meta", {}), "url": res.get("url")}})
+        return res, patched
+    raise RuntimeError(f"Dashboard {dashboard_uid} kept changing; gave up after {PATCH_ATTEMPTS} attempts.")
+
+
+async def _validate_time_series_query(
+    raw_sql: str, datasource_uid: str, time_range: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Validate a query for a time-series panel and estimate its cost over the dashboard's time range.
+
+    The time range defaults to that of the dashboard template.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]: The error response on failure,
+        or None, and the cost estimate if one was made.
+    """
+    validation_result = await validate_grafana_query_async(raw_sql, datasource_uid=datasource_uid)
 
     if not validation_result["is_valid"]:
         return {
             "error": f"Query validation failed: {validation_result['error']}",
             "dashboard": None
-        }
+        }, None
 
-    client = get_grafana_client()
+    # The datasource may return no frame at all for an empty result, in which
+    # case the columns are unknown and the contract cannot be checked.
+    contract_errors = time_series_contract_errors(validation_result["columns"]) if validation_result["columns"] else []
+    if contract_errors:
+        return {
+            "error": f"Query validation failed: {' '.join(contract_errors)}",
+            "columns": validation_result["columns"],
+            "dashboard": None
+        }, None
 
-    with resources.files("grafana_mcp").joinpath("dashboard.json").open("r") as f:
-        dashboard = json.load(f)
+    # The dashboard runs the query over its whole time range on every view, so it is not narrowed
+    if time_range is None:
+        time_range = get_template_registry().get().payload["dashboard"].get("time", {})
+    try:
+        cost = await _plan_query(raw_sql, datasource_uid, time_range.get("from", "now-30d"),
+                                 time_range.get("to", "now"), narrow=False)
+    except QueryBudgetError as e:
+        return {"error": f"Query validation failed: {e}", "cost": e.estimate, "dashboard": None}, None
+    return None, cost
 
-    # Get or create folder and set folderId
-    folder_id = get_or_create_folder_internal(folder)
-    dashboard["folderId"] = folder_id
 
-    dashboard_uid = str(uuid.uuid4())
-    dashboard["dashboard"]["uid"] = dashboard_uid
-    dashboard["dashboard"]["title"] = title
-    dashboard["dashboard"]["panels"][0]["targets"][0]["rawSql"] = raw_sql
-
-    # datasource
-    dashboard["dashboard"]["panels"][0]["targets"][0]["datasource"]["uid"] = os.getenv(
-        "GRAFANA_DATASOURCE_UID", "Clickhouse")
-    dashboard["dashboard"]["panels"][0]["datasource"]["uid"] = os.getenv(
-        "GRAFANA_DATASOURCE_UID", "Clickhouse")
-
-    # set the panel title
-    dashboard["dashboard"]["panels"][0]["title"] = panel_title if panel_title else title
-    # set the panel description
-    dashboard["dashboard"]["panels"][0]["description"] = description if description else ""
-    # set the dashboard description
-    dashboard["dashboard"]["description"] = description if description else ""
-    res = client.dashboard.update_dashboard(dashboard)
-
-    # If requested, make the dashboard public
+async def _save_and_share_dashboard(dashboard: Dict[str, Any], dashboard_uid: str, make_public: bool) -> Dict[str, Any]:
+    res = await save_dashboard_async(dashboard)
+    get_dashboard_index().update({"dashboard": {**dashboard["dashboard"], "version": res.get("version")},
+                                  "meta": {"url": res.get("url")}})
+
+    # If requested, make the dashboard public. The URL is built from the token
+    # in the POST response, so sharing costs a single request.
     if make_public:
         try:
-            make_dashboard_public(dashboard_uid)
-            public_url = get_public_dashboard_url(dashboard_uid)
+            public_url = await share_dashboard_async(dashboard_uid)
 
             # Add public URL to the response
             if public_url:
                 res["public_url"] = public_url
 
         except Exception as e:
-            # Log the error but don't fail the entire operation
-            print(f"Failed to make dashboard public: {e}")
+            # The dashboard is saved, so the failure is reported without failing the call
+            logger.warning("Failed to make dashboard %s public: %s", dashboard_uid, e)
+            metrics.SHARE_FAILURES.inc()
+            res["public_url_error"] = f"Failed to make dashboard public: {e}"
 
     return res
 
 
+async def share_dashboard_async(dashboard_uid: str) -> Optional[str]:
+    """Make a dashboard public and get its public URL.
+
+    Args:
+        dashboard_uid (str): The UID of the dashboard.
+
+    Returns:
+        Optional[str]: The public URL, or None if Grafana returned no access token.
+    """
+    access_token = _public_tokens.get(dashboard_uid)
+    if access_token:
+        return _public_dashboard_url(access_token)
+
+    data = await make_dashboard_public_async(dashboard_uid)
+    if data.get("accessToken"):
+        return _public_dashboard_url(data["accessToken"])
+
+    # Older Grafana versions may not echo the token
+    return await get_public_dashboard_url_async(dashboard_uid)
+
+
 @mcp.tool()
-def check_dashboard_data(dashboard_uid: str) -> Dict[str, Any]:
-    """Check if a dashboard has any data for its default time range.
+async def check_dashboard_data(dashboard_uid: str, count_datapoints: bool = False) -> Dict[str, Any]:
+    """Check if the panels of a dashboard have any data for its default time range.
+
+    Every query of every panel, including panels in collapsed rows, is checked.
 
     Args:
         dashboard_uid (str): The UID of the dashboard to check.
+        count_datapoints (bool): Whether to also count the returned values (slower on large results).
+            Defaults to False.
+
+    Returns:
+        Dict[str, Any]: 'has_data' if any panel has data, the 'time_range' checked as 'from' and 'to',
+        and 'panels', each with 'panel_id', 'title', 'has_data', 'latency_ms' and 'targets' holding
+        per query 'ref_id', 'datasource_uid', 'has_data' and 'error' if it failed. With a query
+        budget set, each query's 'cost' estimate, and per panel the refIds 'rejected' as over budget
+        and not run, or 'narrowed' and checked over the latest part of the range only. With
+        count_datapoints, 'total_datapoints' overall and per query. 'error' if the dashboard could
+        not be checked or every query failed.
+    """
+    return await check_dashboard_has_data_async(dashboard_uid, count_datapoints)
+
+
+@mcp.tool()
+async def get_server_stats() -> Dict[str, Any]:
+    """Get connection pool, cache, datasource queue and request coalescing statistics of this MCP server.
+
+    In multi-worker mode the counters are those of the worker serving the call.
 
     Returns:
-        Dict[str, Any]: Dictionary containing check results with 'has_data', 'error', and 'details' keys.
+        Dict[str, Any]: Counters keyed by subsystem, including query cache hit rate and,
+        per datasource, running and queued queries and their wait times.
+    """
+    stats = {
+        "connection_pool": get_pool_stats(),
+        "query_cache": get_query_cache().stats(),
+        "datasource_queues": get_admission_stats(),
+        "coalescing": get_coalescer().stats(),
+        "delta_cache": get_timeseries_cache().stats(),
+        "cost_guard": get_cost_guard().stats(),
+    }
+    warmup = get_warmup()
+    if warmup is not None:
+        stats["warmup"] = warmup.status()
+    disk = get_disk_cache()
+    if disk is not None:
+        stats["disk_cache"] = disk.stats()
+    return stats
+
+
+def _with_warmup(app):
+    """Warm the server up in the background while the app starts serving, see ``_warmup_steps``.
+
+    The warmup is tied to the lifespan of the ASGI app rather than to the one
+    of the MCP server, which older FastMCP releases run once per session: it
+    starts once per process, before any MCP session is opened.
     """
-    return check_dashboard_has_data(dashboard_uid)
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = start_warmup(_warmup_steps(), required=WARMUP_REQUIRED) if get_settings().warmup else None
+        try:
+            async with app_lifespan(app) as state:
+                yield state
+        finally:
+            if task is not None:
+                task.cancel()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def create_app(transport: str = "http"):
+    """Build the ASGI app of the server.
+
+    With the default ``http`` transport, used in multi-worker mode, the MCP
+    endpoint is served at ``/mcp`` with stateless sessions, so that any worker
+    can answer any request. A single process serves the ``sse`` transport.
+
+    Args:
+        transport (str): The MCP transport, ``http`` or ``sse``. Defaults to ``http``.
+    """
+    get_template_registry().load_all()
+    if transport == "sse":
+        return _with_warmup(mcp.http_app(transport="sse"))
+    return _with_warmup(mcp.http_app(transport="http", stateless_http=True))
 
 
 # Run the server if executed directly
 if __name__ == "__main__":
-    mcp.run(transport="sse", host="0.0.0.0")
+    import uvicorn
+
+    uvicorn.run(create_app(transport="sse"), host="0.0.0.0", port=fastmcp.settings.port)
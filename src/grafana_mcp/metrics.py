@@ -0,0 +1,217 @@
+"""
+Prometheus metrics and optional OpenTelemetry spans for the Grafana MCP server.
+
+Metrics are kept in process with plain counters and fixed-bucket histograms,
+so recording a value costs a bisect and a few integer updates under a lock.
+``render`` produces the Prometheus text exposition format served on
+``/metrics``. Values owned by other modules, such as cache hit counters, are
+read at scrape time through collectors registered with ``register_collector``.
+
+Spans are only created when ``GRAFANA_OTEL_ENABLED`` is set and the
+``opentelemetry-api`` package is installed; otherwise ``span`` is a no-op.
+"""
+
+import contextlib
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from grafana_mcp.config import get_settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+# (name, type, help, [(suffix, labels, value)])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+_UID_SEGMENT = re.compile(r"/uid/[^/]+")
+
+
+def endpoint_template(path: str) -> str:
+    """Replace UIDs in an API path so it can be used as a metric label."""
+    path = path.split("?", 1)[0].rstrip("/")
+    return _UID_SEGMENT.sub("/uid/{uid}", path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add ``amount`` to the counter of the given label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> Family:
+        with self._lock:
+            values = list(self._values.items())
+        samples = [("_total", dict(zip(self.labelnames, labels)), value) for labels, value in values]
+        return self.name, "counter", self.help, samples
+
+
+class Histogram:
+    """Histogram with fixed upper bounds and a fixed set of label names."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # Per label values: [count per bucket (last is +Inf), sum]
+        self._values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def collect(self) -> Family:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        samples = []
+        for labels, counts, total in values:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", base, total))
+            samples.append(("_count", base, cumulative))
+        return self.name, "histogram", self.help, samples
+
+
+Collector = Callable[[], Iterable[Family]]
+
+_collectors: List[Collector] = []
+
+TOOL_DURATION = Histogram(
+    "grafana_mcp_tool_duration_seconds", "Duration of MCP tool calls.", ("tool", "status"))
+UPSTREAM_DURATION = Histogram(
+    "grafana_mcp_upstream_request_duration_seconds", "Duration of Grafana API requests until response headers.",
+    ("method", "endpoint", "status"))
+UPSTREAM_REQUEST_BYTES = Histogram(
+    "grafana_mcp_upstream_request_bytes", "Size of Grafana API request bodies.", ("method", "endpoint"),
+    buckets=SIZE_BUCKETS)
+UPSTREAM_RESPONSE_BYTES = Histogram(
+    "grafana_mcp_upstream_response_bytes", "Size of Grafana API response bodies, when known.", ("method", "endpoint"),
+    buckets=SIZE_BUCKETS)
+UPSTREAM_RETRIES = Counter(
+    "grafana_mcp_upstream_retries", "Grafana API requests retried after a 429 or 5xx response.",
+    ("method", "endpoint"))
+DATASOURCE_QUEUE_WAIT = Histogram(
+    "grafana_mcp_datasource_queue_wait_seconds", "Time datasource queries waited for a slot and a rate-limit token.",
+    ("datasource",))
+SHARE_FAILURES = Counter(
+    "grafana_mcp_dashboard_share_failures", "Dashboards saved but not made public because sharing failed.")
+
+_METRICS = (TOOL_DURATION, UPSTREAM_DURATION, UPSTREAM_REQUEST_BYTES, UPSTREAM_RESPONSE_BYTES, UPSTREAM_RETRIES,
+            DATASOURCE_QUEUE_WAIT, SHARE_FAILURES)
+
+
+def register_collector(collector: Collector) -> None:
+    """Register a function returning metric families to read at scrape time."""
+    _collectors.append(collector)
+
+
+def cache_families(caches: Dict[str, Dict[str, Any]]) -> List[Family]:
+    """Build hit and miss counter families from cache ``stats()`` dicts keyed by cache name."""
+    hits = [("_total", {"cache": name}, stats["hits"]) for name, stats in caches.items()]
+    misses = [("_total", {"cache": name}, stats["misses"]) for name, stats in caches.items()]
+    return [
+        ("grafana_mcp_cache_hits", "counter", "Cache lookups served from memory.", hits),
+        ("grafana_mcp_cache_misses", "counter", "Cache lookups that missed.", misses),
+    ]
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    families = [metric.collect() for metric in _METRICS]
+    for collector in _collectors:
+        families.extend(collector())
+
+    lines = []
+    for name, kind, help, samples in families:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+_tracer: Optional[Any] = None
+_tracer_checked = False
+
+
+def _get_tracer() -> Optional[Any]:
+    global _tracer, _tracer_checked
+    if not _tracer_checked:
+        if get_settings().otel_enabled:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                pass
+            else:
+                _tracer = trace.get_tracer("grafana_mcp")
+        _tracer_checked = True
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Optional[Any]]:
+    """Start an OpenTelemetry span as the child of the current one, if tracing is enabled.
+
+    Args:
+        name (str): Span name.
+        **attributes: Span attributes; None values are skipped.
+
+    Returns:
+        ContextManager[Optional[Any]]: Context manager yielding the span, or None when tracing is disabled.
+    """
+    tracer = _get_tracer()
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.start_as_current_span(
+        name, attributes={key: value for key, value in attributes.items() if value is not None})
+
+
+def reset_tracer() -> None:
+    """Forget the tracer so that the next span reads the settings again."""
+    global _tracer, _tracer_checked
+    _tracer = None
+    _tracer_checked = False
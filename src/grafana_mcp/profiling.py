@@ -0,0 +1,218 @@
+"""
+On-demand sampling profiler for tool calls.
+
+A fraction ``sample_rate`` of tool calls is profiled; with the default of 0
+nothing is. While at least one profiled call runs, a ``SIGPROF`` interval
+timer interrupts the server every ``interval`` seconds of CPU time and the
+handler records the interrupted Python stack against the call whose context
+is active, including the tasks it spawned. Time spent waiting for Grafana or
+for a datasource slot uses no CPU and takes no samples; it is measured
+separately by the connection layer and admission control through
+``record_wait``.
+
+The ``keep`` slowest calls of each tool are kept with their wall-clock
+breakdown and stacks, which ``collapsed`` renders in the collapsed format
+read by flamegraph.pl, speedscope and similar tools. Sampling needs the
+event loop to run in the main thread of a Unix process; elsewhere calls are
+still timed, without stacks.
+"""
+
+import collections
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from grafana_mcp.config import get_settings
+
+_current: contextvars.ContextVar[Optional["CallProfile"]] = contextvars.ContextVar("profile", default=None)
+
+_profiler: Optional["ToolProfiler"] = None
+_profiler_lock = threading.Lock()
+
+
+class CallProfile:
+    """Timings and stack samples of one profiled tool call."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started_at = time.time()
+        self.wall = 0.0
+        self.waits: Dict[str, float] = collections.defaultdict(float)
+        self.stacks: Dict[str, int] = collections.Counter()
+        # Samples by top-level package of the innermost frame
+        self.packages: Dict[str, int] = collections.Counter()
+
+    def summary(self, interval: float) -> Dict[str, Any]:
+        """Get the call's timings, with CPU time estimated from the number of samples."""
+        samples = sum(self.stacks.values())
+        return {
+            "tool": self.tool,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall, 6),
+            "wait_seconds": {kind: round(seconds, 6) for kind, seconds in self.waits.items()},
+            "cpu_seconds": round(samples * interval, 6),
+            "cpu_seconds_by_package": {package: round(count * interval, 6)
+                                       for package, count in self.packages.most_common()},
+            "samples": samples,
+        }
+
+
+def record_wait(kind: str, seconds: float) -> None:
+    """Add time spent waiting, e.g. for Grafana, to the profiled call running in this context."""
+    profile = _current.get()
+    if profile is not None:
+        profile.waits[kind] += seconds
+
+
+class ToolProfiler:
+    """Profiles a sample of tool calls and keeps the slowest ones per tool."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        keep: int = 10,
+        clock: Callable[[], float] = time.perf_counter,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.keep = keep
+        self._clock = clock
+        self._random = rand
+        self._lock = threading.Lock()
+        self._active = 0
+        # None until the signal handler was tried, then whether it is installed
+        self._sampling: Optional[bool] = None
+        self._slowest: Dict[str, List[Tuple[float, int, CallProfile]]] = {}
+        self._sequence = itertools.count()
+        self.profiled = 0
+
+    def configure(self, sample_rate: Optional[float] = None, interval: Optional[float] = None) -> None:
+        """Change the fraction of calls profiled, 0 to stop, or the sampling interval."""
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+            if interval is not None and interval > 0:
+                self.interval = interval
+
+    def should_profile(self) -> bool:
+        """Draw whether the next call is profiled."""
+        return self.sample_rate > 0 and self._random() < self.sample_rate
+
+    @contextlib.contextmanager
+    def profile(self, tool: str) -> Iterator[CallProfile]:
+        """Profile the code run in this context, including tasks started from it."""
+        profile = CallProfile(tool)
+        token = _current.set(profile)
+        self._start_sampling()
+        start = self._clock()
+        try:
+            yield profile
+        finally:
+            profile.wall = self._clock() - start
+            self._stop_sampling()
+            _current.reset(token)
+            self._record(profile)
+
+    def _start_sampling(self) -> None:
+        with self._lock:
+            if self._sampling is None:
+                try:
+                    signal.signal(signal.SIGPROF, self._on_sample)
+                    self._sampling = True
+                except (AttributeError, ValueError):
+                    # No SIGPROF on Windows; handlers can only be set from the main thread
+                    self._sampling = False
+            self._active += 1
+            if self._sampling and self._active == 1:
+                signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def _stop_sampling(self) -> None:
+        with self._lock:
+            self._active -= 1
+            if self._sampling and self._active == 0:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+
+    @staticmethod
+    def _on_sample(signum: int, frame: Any) -> None:
+        # Runs in the main thread between bytecodes, in the context of the interrupted code
+        profile = _current.get()
+        if profile is None or frame is None:
+            return
+        profile.packages[frame.f_globals.get("__name__", "?").split(".")[0]] += 1
+        stack = []
+        while frame is not None:
+            stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        profile.stacks[";".join(reversed(stack))] += 1
+
+    def _record(self, profile: CallProfile) -> None:
+        with self._lock:
+            self.profiled += 1
+            slowest = self._slowest.setdefault(profile.tool, [])
+            item = (profile.wall, next(self._sequence), profile)
+            if len(slowest) < self.keep:
+                heapq.heappush(slowest, item)
+            elif item > slowest[0]:
+                heapq.heapreplace(slowest, item)
+
+    def slowest(self, tool: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the summaries of the slowest profiled calls, of one tool or all, slowest first."""
+        with self._lock:
+            profiles = [item for name, items in self._slowest.items() if tool is None or name == tool
+                        for item in items]
+        return [profile.summary(self.interval) for _, _, profile in sorted(profiles, reverse=True)]
+
+    def collapsed(self, tool: Optional[str] = None) -> str:
+        """Render the stacks of the slowest calls, of one tool or all, in the collapsed format.
+
+        Each line holds a tool name and the frames of one stack separated by
+        semicolons, outermost first, followed by the number of samples.
+        """
+        with self._lock:
+            profiles = [profile for name, items in self._slowest.items() if tool is None or name == tool
+                        for _, _, profile in items]
+        stacks: Dict[str, int] = collections.Counter()
+        for profile in profiles:
+            for stack, count in profile.stacks.items():
+                stacks[f"{profile.tool};{stack}"] += count
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def clear(self) -> None:
+        """Forget the kept calls."""
+        with self._lock:
+            self._slowest.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the profiler's settings and the number of calls profiled."""
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval": self.interval,
+                "keep": self.keep,
+                "sampling": self._sampling,
+                "active": self._active,
+                "profiled": self.profiled,
+            }
+
+
+def get_profiler() -> ToolProfiler:
+    """Get the process-wide tool profiler."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                settings = get_settings()
+                _profiler = ToolProfiler(
+                    sample_rate=settings.profile_sample_rate,
+                    interval=settings.profile_interval,
+                    keep=settings.profile_keep,
+                )
+    return _profiler
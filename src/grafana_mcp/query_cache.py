@@ -0,0 +1,54 @@
+"""
+Result cache for datasource queries sent through ``/api/ds/query``.
+
+Results are keyed by datasource UID, normalized SQL and the absolute time
+range floored to a bucket, so retries of the same or a reformatted query
+within a bucket are served from memory. With a disk cache, results are
+also shared by the worker processes and survive restarts.
+"""
+
+from typing import Hashable, Optional, Union
+
+from grafana_mcp.cache import LRUCache, TieredCache
+from grafana_mcp.config import get_settings
+from grafana_mcp.disk_cache import get_disk_cache
+from grafana_mcp.sql import normalize_sql
+from grafana_mcp.timerange import resolve_range
+
+_query_cache: Optional[Union[LRUCache, TieredCache]] = None
+
+
+def query_cache_key(
+    datasource_uid: str,
+    raw_sql: str,
+    time_from: str,
+    time_to: str,
+    *extra: Hashable,
+    now: Optional[float] = None,
+) -> Hashable:
+    """Build the cache key for a datasource query.
+
+    Args:
+        datasource_uid (str): The datasource UID.
+        raw_sql (str): The SQL query.
+        time_from (str): Start of the time range.
+        time_to (str): End of the time range.
+        *extra (Hashable): Further values that change the result, such as a validation mode.
+        now (Optional[float]): Reference time in epoch seconds. Defaults to the current time.
+
+    Returns:
+        Hashable: The cache key.
+    """
+    start, end = resolve_range(time_from, time_to, now=now, bucket_seconds=get_settings().query_cache_bucket)
+    return (datasource_uid, normalize_sql(raw_sql), start, end) + extra
+
+
+def get_query_cache() -> Union[LRUCache, TieredCache]:
+    """Get the process-wide query result cache."""
+    global _query_cache
+    if _query_cache is None:
+        settings = get_settings()
+        cache = LRUCache(ttl=settings.query_cache_ttl, max_bytes=settings.query_cache_max_bytes)
+        disk = get_disk_cache()
+        _query_cache = cache if disk is None else TieredCache(cache, disk, "query")
+    return _query_cache
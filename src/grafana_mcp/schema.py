@@ -0,0 +1,318 @@
+"""
+Catalog of the ClickHouse databases, tables and columns behind a datasource.
+
+The catalog is loaded through ``/api/ds/query`` and kept in memory, so
+listing tables and searching columns makes no HTTP calls. Once its TTL has
+expired, the next lookup is still answered from memory and starts a refresh
+in the background: ``system.tables`` is read again and columns are only
+fetched for tables that are new or whose metadata changed.
+
+Each refresh also indexes the distinct column names: a sorted list answers
+prefix lookups with a binary search, and an index of the trigrams of each
+name narrows substring lookups and picks the candidates of fuzzy matching
+for misspelled names, so lookups do not scan every name.
+"""
+
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import difflib
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from grafana_mcp.config import get_settings
+from grafana_mcp.sql import quote
+
+TABLES_SQL = (
+    "SELECT database, name, engine, toString(metadata_modification_time) AS modified\n"
+    "FROM system.tables\n"
+    "WHERE database NOT IN ('system', 'INFORMATION_SCHEMA', 'information_schema')"
+)
+COLUMNS_SQL = (
+    "SELECT database, table, name, type, comment\n"
+    "FROM system.columns\n"
+    "WHERE (database, table) IN ({tables})\n"
+    "ORDER BY database, table, position"
+)
+# Tables per system.columns query
+COLUMNS_BATCH = 500
+FUZZY_CUTOFF = 0.6
+# Names sharing the most trigrams with a query that fuzzy matching compares to it
+FUZZY_CANDIDATES = 200
+
+RunSQL = Callable[[str], Awaitable[List[Dict[str, Any]]]]
+TableKey = Tuple[str, str]
+
+_catalogs: Dict[str, "SchemaCatalog"] = {}
+_catalogs_lock = threading.Lock()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ColumnNameIndex:
+    """Prefix and trigram index of distinct lowercased column names."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(set(names))
+        # Trigram of a name padded with spaces -> positions in ``names``
+        self.trigrams: Dict[str, List[int]] = collections.defaultdict(list)
+        for i, name in enumerate(self.names):
+            for gram in _trigrams(f" {name} "):
+                self.trigrams[gram].append(i)
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """Get the names starting with ``prefix``."""
+        names = self.names
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+        return names[start:end]
+
+    def containing(self, text: str) -> Iterable[str]:
+        """Get the names containing ``text``, checking only those with all its trigrams.
+
+        Texts shorter than a trigram are looked for in every name.
+        """
+        grams = _trigrams(text)
+        if not grams:
+            return [name for name in self.names if text in name]
+        postings = sorted((self.trigrams.get(gram, ()) for gram in grams), key=len)
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            ids.intersection_update(posting)
+            if not ids:
+                break
+        return [self.names[i] for i in ids if text in self.names[i]]
+
+    def similar(self, text: str, allowed: Optional[Set[str]] = None) -> List[str]:
+        """Get the names sharing the most trigrams with ``text``, at most ``FUZZY_CANDIDATES``."""
+        shared: Dict[int, int] = collections.Counter()
+        for gram in _trigrams(f" {text} "):
+            for i in self.trigrams.get(gram, ()):
+                shared[i] += 1
+        names = (self.names[i] for i, _ in sorted(shared.items(), key=lambda item: -item[1]))
+        if allowed is not None:
+            names = (name for name in names if name in allowed)
+        return [name for name, _ in zip(names, range(FUZZY_CANDIDATES))]
+
+
+class SchemaCatalog:
+    """In-memory index of tables and columns refreshed incrementally."""
+
+    def __init__(self, ttl: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._tables: Dict[TableKey, Dict[str, Any]] = {}
+        # Lowercased column name -> (table key, column)
+        self._columns: Dict[str, List[Tuple[TableKey, Dict[str, str]]]] = {}
+        self._names = ColumnNameIndex(())
+        # Lowercased column names per database and per table name
+        self._database_names: Dict[str, Set[str]] = {}
+        self._table_names: Dict[str, Dict[str, Set[str]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._inflight: Optional[concurrent.futures.Future] = None
+        self._background: Optional[asyncio.Future] = None
+
+    def is_fresh(self) -> bool:
+        """Whether the catalog was loaded less than ``ttl`` seconds ago."""
+        return self._loaded_at is not None and self._clock() - self._loaded_at < self.ttl
+
+    async def ensure_fresh(self, run_sql: RunSQL) -> None:
+        """Load the catalog if it is empty, or start a background refresh if it expired."""
+        if self._loaded_at is None:
+            await self.refresh(run_sql)
+        elif not self.is_fresh() and (self._background is None or self._background.done()):
+            self._background = asyncio.ensure_future(self.refresh(run_sql))
+            # A failed background refresh is retried by the next lookup
+            self._background.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def refresh(self, run_sql: RunSQL) -> Dict[str, int]:
+        """Reload the table list and fetch the columns of new and changed tables.
+
+        Concurrent refreshes wait for the first one. A concurrent.futures.Future
+        is used so waiters may run on any event loop.
+
+        Args:
+            run_sql (RunSQL): Coroutine function running a query and returning its rows as dicts.
+
+        Returns:
+            Dict[str, int]: Number of tables 'fetched' (new or changed), 'removed' and in 'total'.
+        """
+        with self._lock:
+            future = self._inflight
+            owner = future is None
+            if owner:
+                future = self._inflight = concurrent.futures.Future()
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self._refresh(run_sql)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+
+    async def _refresh(self, run_sql: RunSQL) -> Dict[str, int]:
+        current = {(row["database"], row["name"]): row for row in await run_sql(TABLES_SQL)}
+        stale = [key for key, row in current.items()
+                 if key not in self._tables or self._tables[key]["modified"] != row.get("modified")]
+
+        columns: Dict[TableKey, List[Dict[str, str]]] = {key: [] for key in stale}
+        for start in range(0, len(stale), COLUMNS_BATCH):
+            batch = ", ".join(f"({quote(db)}, {quote(table)})" for db, table in stale[start:start + COLUMNS_BATCH])
+            for row in await run_sql(COLUMNS_SQL.format(tables=batch)):
+                key = (row["database"], row["table"])
+                if key in columns:
+                    columns[key].append({"name": row["name"], "type": row["type"], "comment": row.get("comment") or ""})
+
+        tables = {}
+        for key, row in current.items():
+            if key in columns:
+                tables[key] = {"database": key[0], "table": key[1], "engine": row.get("engine", ""),
+                               "modified": row.get("modified"), "columns": columns[key]}
+            else:
+                tables[key] = self._tables[key]
+
+        index: Dict[str, List[Tuple[TableKey, Dict[str, str]]]] = {}
+        database_names: Dict[str, Set[str]] = {}
+        table_names: Dict[str, Dict[str, Set[str]]] = {}
+        for key, table in tables.items():
+            names = table_names.setdefault(key[1], {})[key[0]] = set()
+            for column in table["columns"]:
+                name = column["name"].lower()
+                index.setdefault(name, []).append((key, column))
+                names.add(name)
+            database_names.setdefault(key[0], set()).update(names)
+        names_index = ColumnNameIndex(index)
+
+        removed = len(set(self._tables) - set(tables))
+        self._tables, self._columns, self._names = tables, index, names_index
+        self._database_names, self._table_names = database_names, table_names
+        self._loaded_at = self._clock()
+        return {"fetched": len(stale), "removed": removed, "total": len(tables)}
+
+    def list_tables(self, database: Optional[str] = None, pattern: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List tables, optionally of one database and containing ``pattern`` in their name.
+
+        Returns:
+            List[Dict[str, Any]]: 'database', 'table', 'engine' and 'columns' count, sorted by name.
+        """
+        pattern = pattern.lower() if pattern else None
+        return [
+            {"database": db, "table": name, "engine": table["engine"], "columns": len(table["columns"])}
+            for (db, name), table in sorted(self._tables.items())
+            if (database is None or db == database) and (pattern is None or pattern in name.lower())
+        ]
+
+    def get_table(self, database: str, table: str) -> Optional[Dict[str, Any]]:
+        """Get a table with its columns."""
+        return self._tables.get((database, table))
+
+    def _scope(self, database: Optional[str], table: Optional[str]) -> Optional[Set[str]]:
+        """Get the column names of the tables matching the filters, or None without filters."""
+        if table is not None:
+            databases = self._table_names.get(table, {})
+            if database is not None:
+                return databases.get(database, set())
+            return set().union(*databases.values())
+        if database is not None:
+            return self._database_names.get(database, set())
+        return None
+
+    def search_columns(
+        self,
+        query: str,
+        database: Optional[str] = None,
+        table: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Find columns by name.
+
+        Exact matches score 1.0, prefix matches 0.9 and substring matches 0.8.
+        When these find fewer than ``limit`` columns within the filters, the
+        names sharing the most trigrams with the query are compared with
+        ``difflib`` and score their similarity ratio, scaled below 0.8.
+
+        Args:
+            query (str): Column name or part of it, case-insensitive.
+            database (Optional[str]): Only search this database.
+            table (Optional[str]): Only search this table.
+            limit (int): Maximum number of results.
+
+        Returns:
+            List[Dict[str, Any]]: 'database', 'table', 'column', 'type', 'comment' and 'score',
+            best matches first.
+        """
+        query = query.strip().lower()
+        scope = self._scope(database, table)
+        index = self._names
+        scores: Dict[str, float] = {}
+        if scope is not None and len(scope) < len(index.names) // 8:
+            # A few tables: checking their names is cheaper than the index
+            for name in scope:
+                if name.startswith(query):
+                    scores[name] = 1.0 if name == query else 0.9
+                elif query in name:
+                    scores[name] = 0.8
+        else:
+            for name in index.with_prefix(query):
+                scores[name] = 1.0 if name == query else 0.9
+            for name in index.containing(query) if query else ():
+                scores.setdefault(name, 0.8)
+            if scope is not None:
+                scores = {name: score for name, score in scores.items() if name in scope}
+
+        results = self._results(scores, database, table)
+        if len(results) < limit and query:
+            matcher = difflib.SequenceMatcher()
+            matcher.set_seq2(query)
+            fuzzy = {}
+            for name in index.similar(query, scope):
+                if name in scores:
+                    continue
+                matcher.set_seq1(name)
+                if matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF:
+                    ratio = matcher.ratio()
+                    if ratio >= FUZZY_CUTOFF:
+                        fuzzy[name] = round(0.8 * ratio, 3)
+            best = sorted(fuzzy.items(), key=lambda item: -item[1])[:limit]
+            results += self._results(dict(best), database, table)
+
+        results.sort(key=lambda r: (-r["score"], r["database"], r["table"], r["column"]))
+        return results[:limit]
+
+    def _results(self, scores: Dict[str, float], database: Optional[str], table: Optional[str]) -> List[Dict[str, Any]]:
+        return [
+            {"database": db, "table": table_name, "column": column["name"], "type": column["type"],
+             "comment": column["comment"], "score": score}
+            for name, score in scores.items()
+            for (db, table_name), column in self._columns[name]
+            if (database is None or db == database) and (table is None or table_name == table)
+        ]
+
+
+def get_schema_catalog(datasource_uid: str) -> SchemaCatalog:
+    """Get the process-wide schema catalog of a datasource."""
+    catalog = _catalogs.get(datasource_uid)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(datasource_uid)
+            if catalog is None:
+                catalog = _catalogs[datasource_uid] = SchemaCatalog(ttl=get_settings().schema_cache_ttl)
+    return catalog
+
+
+def clear_schema_catalogs() -> None:
+    """Forget the schema catalogs of all datasources."""
+    with _catalogs_lock:
+        _catalogs.clear()
@@ -0,0 +1,388 @@
+"""
+Local search index of the dashboards of a Grafana instance.
+
+The index holds the title, tags, folder, panel titles and SQL of every
+dashboard, in an inverted index from lowercased word to dashboard UIDs and a
+map from referenced table to dashboard UIDs. Lookups only touch the posting
+lists of the query words, so they stay well under a millisecond on tens of
+thousands of dashboards.
+
+A sync lists all dashboards through ``/api/search`` and fetches only those
+that are new or whose search hit changed: a different ``version`` when
+Grafana reports one, otherwise a different title, tags or folder. Search
+hits of current Grafana releases carry no version, so the latest version of
+other dashboards is read from their version history and compared with the
+indexed one, which catches edits to panels and queries made elsewhere. To
+keep a sync's load bounded on large instances, at most ``revalidations``
+dashboards are checked per sync, those checked least recently first, with at
+most ``REVALIDATE_CONCURRENCY`` requests in flight. Dashboards indexed more
+than ``max_age`` seconds ago are fetched again regardless. Dashboards saved through this server are re-indexed by
+``update``, so their edits show up without waiting for a sync.
+"""
+
+import asyncio
+import bisect
+import concurrent.futures
+import heapq
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from grafana_mcp.config import get_settings
+from grafana_mcp.dashboards import iter_panels
+from grafana_mcp.sql import referenced_tables
+
+# Weight of a word by the field it appears in
+FIELD_WEIGHTS = {"title": 8.0, "tags": 4.0, "folder": 2.0, "panels": 2.0, "sql": 1.0}
+
+# Version history requests in flight during a sync
+REVALIDATE_CONCURRENCY = 4
+
+_WORD = re.compile(r"[0-9a-z_]+")
+# SQL words that would match nearly every dashboard
+_SQL_STOP_WORDS = frozenset([
+    "all", "and", "as", "asc", "by", "case", "desc", "distinct", "else", "end", "from", "group", "having", "in",
+    "inner", "interval", "is", "join", "left", "limit", "not", "null", "on", "or", "order", "select", "then",
+    "union", "when", "where", "with", "__timefilter", "__datetimefilter", "__fromtime", "__totime",
+])
+
+ListDashboards = Callable[[], Awaitable[List[Dict[str, Any]]]]
+FetchDashboard = Callable[[str], Awaitable[Dict[str, Any]]]
+# Coroutine function getting the latest version of a dashboard, or None if unknown
+LatestVersion = Callable[[str], Awaitable[Optional[int]]]
+
+_dashboard_index: Optional["DashboardIndex"] = None
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _hit_signature(hit: Dict[str, Any]) -> Tuple[Any, ...]:
+    if hit.get("version") is not None:
+        return ("version", hit["version"])
+    return ("hit", hit.get("title"), tuple(hit.get("tags") or ()), hit.get("folderUid"), hit.get("folderTitle"))
+
+
+class DashboardIndex:
+    """Inverted index of dashboards kept in sync with ``/api/search``."""
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        concurrency: int = 10,
+        max_age: float = 86400.0,
+        revalidations: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self.revalidations = revalidations
+        self._clock = clock
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Tuple[Any, ...]] = {}
+        self._indexed_at: Dict[str, float] = {}
+        # When each dashboard was last fetched or checked against its version history
+        self._checked_at: Dict[str, float] = {}
+        # word -> {uid: score}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_words: Dict[str, Set[str]] = {}
+        # Sorted vocabulary for prefix lookups, rebuilt after changes
+        self._vocabulary: Optional[List[str]] = None
+        # lowercased table, with and without database -> uids
+        self._tables: Dict[str, Set[str]] = {}
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._inflight: Optional[concurrent.futures.Future] = None
+        self._background: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def is_fresh(self) -> bool:
+        """Whether the index was synced less than ``ttl`` seconds ago."""
+        return self._synced_at is not None and self._clock() - self._synced_at < self.ttl
+
+    async def ensure_fresh(
+        self,
+        list_dashboards: ListDashboards,
+        fetch_dashboard: FetchDashboard,
+        latest_version: Optional[LatestVersion] = None,
+    ) -> None:
+        """Build the index if it is empty, or start a background sync if it expired."""
+        if self._synced_at is None:
+            await self.sync(list_dashboards, fetch_dashboard, latest_version)
+        elif not self.is_fresh() and (self._background is None or self._background.done()):
+            self._background = asyncio.ensure_future(self.sync(list_dashboards, fetch_dashboard, latest_version))
+            # A failed background sync is retried by the next lookup
+            self._background.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def sync(
+        self,
+        list_dashboards: ListDashboards,
+        fetch_dashboard: FetchDashboard,
+        latest_version: Optional[LatestVersion] = None,
+    ) -> Dict[str, int]:
+        """Bring the index up to date, fetching only new and changed dashboards.
+
+        Concurrent syncs wait for the first one. A concurrent.futures.Future is
+        used so waiters may run on any event loop.
+
+        Args:
+            list_dashboards (ListDashboards): Coroutine function returning all ``/api/search`` hits.
+            fetch_dashboard (FetchDashboard): Coroutine function returning ``/api/dashboards/uid/<uid>``.
+            latest_version (Optional[LatestVersion]): Coroutine function getting the latest version of
+                a dashboard, used to revalidate those whose search hit has no version.
+
+        Returns:
+            Dict[str, int]: Number of dashboards 'fetched', 'revalidated' by version, 'removed' and
+            in 'total'.
+        """
+        with self._lock:
+            future = self._inflight
+            owner = future is None
+            if owner:
+                future = self._inflight = concurrent.futures.Future()
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self._sync(list_dashboards, fetch_dashboard, latest_version)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+
+    async def _sync(
+        self,
+        list_dashboards: ListDashboards,
+        fetch_dashboard: FetchDashboard,
+        latest_version: Optional[LatestVersion],
+    ) -> Dict[str, int]:
+        hits = {hit["uid"]: hit for hit in await list_dashboards() if hit.get("uid")}
+        now = self._clock()
+        changed = {uid for uid, hit in hits.items() if self._signatures.get(uid) != _hit_signature(hit)
+                   or now - self._indexed_at.get(uid, now) >= self.max_age}
+        # Hits without a version do not show edits to panels and queries; the least recently
+        # checked ones are checked against their version history
+        unversioned = [] if latest_version is None else heapq.nsmallest(
+            self.revalidations, (uid for uid, hit in hits.items() if hit.get("version") is None
+                                 and uid not in changed), key=lambda uid: self._checked_at.get(uid, float("-inf")))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        history_semaphore = asyncio.Semaphore(min(self.concurrency, REVALIDATE_CONCURRENCY))
+        fetched = 0
+
+        async def fetch(uid: str) -> None:
+            nonlocal fetched
+            async with semaphore:
+                try:
+                    response = await fetch_dashboard(uid)
+                except Exception:
+                    # Deleted since it was listed, or unreadable; retried on the next sync
+                    return
+            fetched += 1
+            self.update(response, hits[uid])
+
+        async def revalidate(uid: str) -> None:
+            async with history_semaphore:
+                try:
+                    version = await latest_version(uid)
+                except Exception:
+                    return
+            self._checked_at[uid] = self._clock()
+            doc = self._docs.get(uid)
+            if version is not None and (doc is None or doc["version"] != version):
+                await fetch(uid)
+
+        await asyncio.gather(*[fetch(uid) for uid in changed], *[revalidate(uid) for uid in unversioned])
+
+        removed = [uid for uid in self._docs if uid not in hits]
+        for uid in removed:
+            self.remove(uid)
+        self._synced_at = self._clock()
+        return {"fetched": fetched, "revalidated": len(unversioned), "removed": len(removed),
+                "total": len(self._docs)}
+
+    def update(self, response: Dict[str, Any], hit: Optional[Dict[str, Any]] = None) -> None:
+        """Index or re-index a dashboard.
+
+        Args:
+            response (Dict[str, Any]): The ``/api/dashboards/uid/<uid>`` response, or a saved payload
+                with 'dashboard' and optional 'meta' keys.
+            hit (Optional[Dict[str, Any]]): Its ``/api/search`` hit, if known.
+        """
+        dashboard = response.get("dashboard") or {}
+        meta = response.get("meta") or {}
+        uid = dashboard.get("uid") or (hit or {}).get("uid")
+        if not uid:
+            return
+
+        panels = [panel.get("title", "") for panel in iter_panels(dashboard) if panel.get("title")]
+        queries = [target.get("rawSql", "") for panel in iter_panels(dashboard)
+                   for target in panel.get("targets") or [] if target.get("rawSql")]
+        tables = sorted({table for sql in queries for table in referenced_tables(sql)})
+        doc = {
+            "uid": uid,
+            "title": dashboard.get("title") or (hit or {}).get("title", ""),
+            "tags": list(dashboard.get("tags") or (hit or {}).get("tags") or []),
+            "folder": meta.get("folderTitle") or (hit or {}).get("folderTitle") or "",
+            "folder_uid": meta.get("folderUid") or (hit or {}).get("folderUid"),
+            "url": meta.get("url") or (hit or {}).get("url"),
+            "version": dashboard.get("version", meta.get("version")),
+            "panels": panels,
+            "tables": tables,
+        }
+
+        with self._lock:
+            self._unindex(uid)
+            self._docs[uid] = doc
+            self._indexed_at[uid] = self._checked_at[uid] = self._clock()
+            if hit is not None:
+                self._signatures[uid] = _hit_signature(hit)
+            else:
+                # Saved by this server; the next sync checks it against its search hit
+                self._signatures.pop(uid, None)
+            fields = {
+                "title": _words(doc["title"]),
+                "tags": _words(" ".join(doc["tags"])),
+                "folder": _words(doc["folder"]),
+                "panels": _words(" ".join(panels)),
+                "sql": _words(" ".join(queries)) - _SQL_STOP_WORDS,
+            }
+            for field, words in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for word in words:
+                    posting = self._postings.get(word)
+                    if posting is None:
+                        posting = self._postings[word] = {}
+                        self._vocabulary = None
+                    posting[uid] = posting.get(uid, 0.0) + weight
+            self._doc_words[uid] = set().union(*fields.values())
+            for table in tables:
+                for key in self._table_keys(table):
+                    self._tables.setdefault(key, set()).add(uid)
+
+    def clear(self) -> None:
+        """Forget all dashboards, so the next lookup builds the index again."""
+        with self._lock:
+            for index in (self._docs, self._signatures, self._indexed_at, self._checked_at, self._postings,
+                          self._doc_words, self._tables):
+                index.clear()
+            self._vocabulary = None
+            self._synced_at = None
+
+    def remove(self, uid: str) -> None:
+        """Drop a dashboard from the index."""
+        with self._lock:
+            self._unindex(uid)
+            self._docs.pop(uid, None)
+            self._signatures.pop(uid, None)
+            self._indexed_at.pop(uid, None)
+            self._checked_at.pop(uid, None)
+
+    def _unindex(self, uid: str) -> None:
+        doc = self._docs.get(uid)
+        if doc is None:
+            return
+        for word in self._doc_words.pop(uid, ()):
+            posting = self._postings.get(word)
+            if posting is not None:
+                posting.pop(uid, None)
+                if not posting:
+                    del self._postings[word]
+                    self._vocabulary = None
+        for table in doc["tables"]:
+            for key in self._table_keys(table):
+                uids = self._tables.get(key)
+                if uids is not None:
+                    uids.discard(uid)
+                    if not uids:
+                        del self._tables[key]
+
+    @staticmethod
+    def _table_keys(table: str) -> Iterable[str]:
+        table = table.lower()
+        yield table
+        if "." in table:
+            yield table.rsplit(".", 1)[1]
+
+    def search(
+        self,
+        query: str = "",
+        table: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Search the index.
+
+        Every word of ``query`` must match a word of the dashboard; the last one
+        may be a prefix. Results are ranked by where the words appear, the
+        title weighing most.
+
+        Args:
+            query (str): Words to look for in titles, tags, folders, panel titles and SQL.
+            table (Optional[str]): Only dashboards reading from this ``table`` or ``database.table``.
+            tag (Optional[str]): Only dashboards with this tag.
+            limit (int): Maximum number of results.
+
+        Returns:
+            List[Dict[str, Any]]: Indexed dashboards with a 'score', best first.
+        """
+        words = _WORD.findall(query.lower())
+        candidates: Optional[Set[str]] = None
+        if table:
+            candidates = self._tables.get(table.lower(), set())
+
+        scores: Dict[str, float] = {}
+        for i, word in enumerate(words):
+            if i == len(words) - 1 and word not in self._postings:
+                posting = self._prefix_posting(word)
+            else:
+                posting = self._postings.get(word, {})
+            if i == 0:
+                # The posting itself is only read, so it needs no copy
+                scores = posting if candidates is None else \
+                    {uid: score for uid, score in posting.items() if uid in candidates}
+            else:
+                scores = {uid: score + posting[uid] for uid, score in scores.items() if uid in posting}
+            if not scores:
+                return []
+        if not words:
+            scores = dict.fromkeys(self._docs if candidates is None else candidates, 0.0)
+
+        if tag:
+            scores = {uid: score for uid, score in scores.items() if tag in self._docs[uid]["tags"]}
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [{**self._docs[uid], "score": score} for uid, score in best]
+
+    def _prefix_posting(self, prefix: str) -> Dict[str, float]:
+        vocabulary = self._vocabulary
+        if vocabulary is None:
+            vocabulary = self._vocabulary = sorted(self._postings)
+        posting: Dict[str, float] = {}
+        for i in range(bisect.bisect_left(vocabulary, prefix), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(prefix):
+                break
+            for uid, score in self._postings.get(word, {}).items():
+                posting[uid] = max(posting.get(uid, 0.0), score)
+        return posting
+
+
+def get_dashboard_index() -> DashboardIndex:
+    """Get the process-wide dashboard index."""
+    global _dashboard_index
+    if _dashboard_index is None:
+        settings = get_settings()
+        _dashboard_index = DashboardIndex(ttl=settings.dashboard_index_ttl, concurrency=settings.pool_size,
+                                          max_age=settings.dashboard_index_max_age,
+                                          revalidations=settings.dashboard_index_revalidations)
+    return _dashboard_index
@@ -0,0 +1,243 @@
+"""
+Columnar decoding, downsampling and summaries of query results.
+
+Frames from ``/api/ds/query`` are decoded into NumPy columns. Frames with a
+time column are split into series, one per numeric column and combination of
+string label values, and each series is downsampled to a target number of
+points with LTTB (largest triangle three buckets) or min/max bucketing.
+Frames without a time column are returned as a truncated table. Statistics
+are always computed over all rows, so the output size depends only on the
+requested point and series limits.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+PERCENTILES = (50, 90, 99)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select ``n_out`` points of a series with the largest triangle three buckets algorithm.
+
+    The first and last points are always kept. Bucket averages are computed in
+    one vectorized pass; each bucket then needs one vectorized area computation.
+
+    Args:
+        x (np.ndarray): Ascending x values.
+        y (np.ndarray): Y values without NaNs.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # n_out - 2 buckets over the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    x_means = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    y_means = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The bucket after the last one is the last point
+    x_means = np.append(x_means, x[n - 1])
+    y_means = np.append(y_means, y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - x_means[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (y_means[i + 1] - ay))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select the minimum and maximum of ``n_out // 2`` equal-width buckets.
+
+    Args:
+        y (np.ndarray): Y values without NaNs, in x order.
+        n_out (int): Maximum number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted unique indices of the selected points.
+    """
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(min(n, max(n_out, 0)))
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by bucket then value puts each bucket's minimum first and maximum last
+    order = np.lexsort((y, bucket_ids))
+    return np.unique(np.concatenate([order[edges[:-1]], order[edges[1:] - 1]]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> np.ndarray:
+    """Select at most ``n_out`` points of a series with the given method."""
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method '{method}', expected one of {DOWNSAMPLING_METHODS}")
+
+
+def summarize(values: np.ndarray) -> Dict[str, Any]:
+    """Summary statistics of a float column where NaN stands for null.
+
+    Returns:
+        Dict[str, Any]: 'count' of non-null values, 'nulls', and 'min', 'max', 'mean'
+        and percentiles when there is at least one value.
+    """
+    valid = values[~np.isnan(values)]
+    stats: Dict[str, Any] = {"count": int(valid.size), "nulls": int(values.size - valid.size)}
+    if valid.size:
+        stats["min"] = float(valid.min())
+        stats["max"] = float(valid.max())
+        stats["mean"] = float(valid.mean())
+        for percentile, value in zip(PERCENTILES, np.percentile(valid, PERCENTILES)):
+            stats[f"p{percentile}"] = float(value)
+    return stats
+
+
+def _numeric(values: List[Any]) -> np.ndarray:
+    # None becomes NaN when converting to a float array
+    return np.array(values, dtype=np.float64)
+
+
+def _field_name(field: Dict[str, Any]) -> str:
+    config = field.get("config") or {}
+    return config.get("displayNameFromDS") or field.get("name", "")
+
+
+def _series_from_frame(frame: Dict[str, Any]) -> Tuple[Optional[np.ndarray], List[Dict[str, Any]]]:
+    """Split a frame into (time, [{'name', 'labels', 'values'}]); time is None without a time column."""
+    fields = frame.get("schema", {}).get("fields", [])
+    columns = frame.get("data", {}).get("values", [])
+    time_index = next((i for i, field in enumerate(fields) if field.get("type") == "time"), None)
+    if time_index is None:
+        return None, []
+
+    time = _numeric(columns[time_index])
+    label_columns = [(field.get("name", ""), columns[i]) for i, field in enumerate(fields)
+                     if field.get("type") == "string" and i < len(columns)]
+    numeric_columns = [(field, columns[i]) for i, field in enumerate(fields)
+                       if field.get("type") == "number" and i < len(columns)]
+
+    # Long frames carry series labels as string columns; group rows by their values.
+    # A dict factorizes the keys much faster than sorting an object array.
+    if label_columns:
+        if len(label_columns) == 1:
+            keys = label_columns[0][1]
+        else:
+            keys = zip(*[values for _, values in label_columns])
+        codes: Dict[Any, int] = {}
+        inverse = np.fromiter((codes.setdefault(key, len(codes)) for key in keys), dtype=np.int64, count=len(time))
+        groups = list(codes)
+    else:
+        groups, inverse = [()], np.zeros(len(time), dtype=np.int64)
+
+    # Rows of each group are contiguous after a stable sort by group
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(groups)))])
+    grouped_time = time[order]
+
+    series = []
+    for field, values in numeric_columns:
+        column = _numeric(values)[order]
+        for group_index, group in enumerate(groups):
+            rows = slice(bounds[group_index], bounds[group_index + 1])
+            labels = dict(field.get("labels") or {})
+            if label_columns:
+                group = group if len(label_columns) > 1 else (group,)
+                labels.update((name, str(value)) for (name, _), value in zip(label_columns, group))
+            series.append({"name": _field_name(field), "labels": labels,
+                           "time": grouped_time[rows], "values": column[rows]})
+    return time, series
+
+
+def summarize_query_result(
+    query_result: Dict[str, Any],
+    max_points: int = 500,
+    method: str = "lttb",
+    max_series: int = 20,
+) -> Dict[str, Any]:
+    """Turn an ``/api/ds/query`` response into downsampled series and statistics.
+
+    Args:
+        query_result (Dict[str, Any]): The ``/api/ds/query`` response.
+        max_points (int): Maximum points per series, or rows of a table frame.
+        method (str): Downsampling method, "lttb" or "minmax".
+        max_series (int): Maximum series, and tables, returned. Others are only counted.
+
+    Returns:
+        Dict[str, Any]: 'series' with 'name', 'labels', 'stats', 'points' and the downsampled
+        'time' (epoch ms) and 'values' columns; 'tables' for frames without a time column;
+        'row_count' and 'series_count' over the whole result; and 'errors' per refId.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of {DOWNSAMPLING_METHODS}")
+
+    output: Dict[str, Any] = {"series": [], "tables": [], "row_count": 0, "series_count": 0}
+    errors = {}
+    for ref_id, result_data in query_result.get("results", {}).items():
+        if result_data.get("error"):
+            errors[ref_id] = result_data["error"]
+        for frame in result_data.get("frames") or []:
+            values = frame.get("data", {}).get("values", [])
+            rows = len(values[0]) if values else 0
+            output["row_count"] += rows
+            time, series = _series_from_frame(frame)
+            if time is None:
+                if len(output["tables"]) < max_series:
+                    output["tables"].append(_table_summary(ref_id, frame, rows, max_points))
+                continue
+
+            output["series_count"] += len(series)
+            for item in series[:max(max_series - len(output["series"]), 0)]:
+                output["series"].append(_series_summary(ref_id, item, max_points, method))
+
+    output["series_truncated"] = output["series_count"] > len(output["series"])
+    if errors:
+        output["errors"] = errors
+    return output
+
+
+def _series_summary(ref_id: str, series: Dict[str, Any], max_points: int, method: str) -> Dict[str, Any]:
+    time, values = series["time"], series["values"]
+    stats = summarize(values)
+    valid = ~np.isnan(values) & ~np.isnan(time)
+    time, values = time[valid], values[valid]
+    order = np.argsort(time, kind="stable")
+    time, values = time[order], values[order]
+    selected = downsample(time, values, max_points, method)
+    return {
+        "ref_id": ref_id,
+        "name": series["name"],
+        "labels": series["labels"],
+        "stats": stats,
+        "points": int(selected.size),
+        "time": time[selected].astype(np.int64).tolist(),
+        "values": values[selected].tolist(),
+    }
+
+
+def _table_summary(ref_id: str, frame: Dict[str, Any], rows: int, max_rows: int) -> Dict[str, Any]:
+    fields = frame.get("schema", {}).get("fields", [])
+    values = frame.get("data", {}).get("values", [])
+    columns = []
+    for field, column in zip(fields, values):
+        entry = {"name": field.get("name", ""), "type": field.get("type", "other"), "values": column[:max_rows]}
+        if field.get("type") == "number":
+            entry["stats"] = summarize(_numeric(column))
+        columns.append(entry)
+    return {"ref_id": ref_id, "rows": rows, "truncated": rows > max_rows, "columns": columns}
@@ -0,0 +1,164 @@
+"""
+Synchronous Grafana HTTP session for scripts and the ``GrafanaApi`` client.
+
+A single keep-alive ``requests.Session`` is shared by the ``GrafanaApi``
+client and by raw API calls, so repeated calls reuse pooled TCP/TLS
+connections instead of paying a new handshake each time. The MCP tools use
+the async client of ``grafana_mcp.connection`` instead; this module, and with
+it ``requests`` and ``grafana_client``, is only imported on first use.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from grafana_client import GrafanaApi
+from grafana_client.client import TokenAuth
+
+from grafana_mcp import __version__
+from grafana_mcp.config import Settings, get_settings
+from grafana_mcp.connection import RETRY_STATUSES, _require_token
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_client: Optional[GrafanaApi] = None
+
+
+class _GrafanaRetry(Retry):
+    """Retry policy that also retries non-idempotent requests on 429.
+
+    A 429 means Grafana rejected the request before doing any work, so it is
+    safe to replay regardless of the HTTP method. 5xx responses are only
+    retried for idempotent methods.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class _TrackingAdapter(HTTPAdapter):
+    """HTTP adapter that remembers the connection pools it hands out."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.pools = weakref.WeakSet()
+        super().__init__(*args, **kwargs)
+
+    def get_connection_with_tls_context(self, *args: Any, **kwargs: Any):
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        self.pools.add(pool)
+        return pool
+
+    def get_connection(self, *args: Any, **kwargs: Any):
+        pool = super().get_connection(*args, **kwargs)
+        self.pools.add(pool)
+        return pool
+
+
+def _build_session(settings: Settings) -> requests.Session:
+    retry = _GrafanaRetry(
+        total=settings.max_retries,
+        backoff_factor=settings.backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = _TrackingAdapter(pool_connections=1, pool_maxsize=settings.pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {_require_token(settings)}",
+        "User-Agent": f"grafana-mcp/{__version__}",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the shared Grafana HTTP session, creating it on first use.
+
+    Returns:
+        requests.Session: Keep-alive session with pooling, retries and auth headers.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session(get_settings())
+    return _session
+
+
+def get_grafana_client() -> GrafanaApi:
+    """Get the shared Grafana client instance.
+
+    The client sends its requests through the shared session from ``get_session``.
+
+    Returns:
+        GrafanaApi: The cached Grafana client.
+    """
+    global _client
+    if _client is None:
+        settings = get_settings()
+        session = get_session()
+        with _lock:
+            if _client is None:
+                client = GrafanaApi.from_url(
+                    url=settings.grafana_url,
+                    credential=TokenAuth(token=_require_token(settings)),
+                    timeout=settings.timeout,
+                )
+                client.client.s.close()
+                client.client.s = session
+                _client = client
+    return _client
+
+
+def grafana_request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    """Send a request to the Grafana HTTP API through the shared session.
+
+    Args:
+        method (str): HTTP method.
+        path (str): API path starting with ``/api``.
+        **kwargs: Extra arguments for ``requests.Session.request``. The configured
+            timeout is applied unless ``timeout`` is given.
+
+    Returns:
+        requests.Response: The raw response.
+    """
+    settings = get_settings()
+    kwargs.setdefault("timeout", settings.timeout)
+    return get_session().request(method, f"{settings.grafana_url}{path}", **kwargs)
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Get connection pool counters for the Grafana host.
+
+    Returns:
+        Dict[str, int]: ``requests`` sent, ``hits`` served by a pooled connection,
+        ``misses`` that opened a new connection, and the configured ``pool_size``.
+    """
+    settings = get_settings()
+    stats = {"requests": 0, "hits": 0, "misses": 0, "pool_size": settings.pool_size}
+    if _session is None:
+        return stats
+
+    adapter = _session.get_adapter(settings.grafana_url)
+    for pool in list(adapter.pools):
+        stats["requests"] += pool.num_requests
+        stats["misses"] += pool.num_connections
+    stats["hits"] = max(stats["requests"] - stats["misses"], 0)
+    return stats
+
+
+def close_session() -> None:
+    """Close the shared session and drop the cached client."""
+    global _session, _client
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _client = None
@@ -0,0 +1,316 @@
+"""
+Helpers for working with the raw SQL of Grafana ClickHouse queries.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+_QUOTES = "'\"`"
+
+
+def _literal_end(sql: str, start: int) -> int:
+    """Get the index just past the quoted literal starting at ``start``."""
+    quote = sql[start]
+    i = start + 1
+    while i < len(sql):
+        if sql[i] == "\\":
+            i += 2
+            continue
+        if sql[i] == quote:
+            if sql.startswith(quote, i + 1):
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(sql)
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize a query for use as a cache key.
+
+    Comments are removed and runs of whitespace are collapsed to a single
+    space, leaving string literals and quoted identifiers untouched.
+
+    Args:
+        sql (str): The raw SQL.
+
+    Returns:
+        str: The normalized SQL.
+    """
+    out = []
+    pending_space = False
+    i = 0
+    while i < len(sql):
+        c = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            pending_space = True
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end == -1 else end + 2
+            pending_space = True
+            continue
+        if c.isspace():
+            pending_space = True
+            i += 1
+            continue
+
+        if pending_space and out:
+            out.append(" ")
+        pending_space = False
+        if c in _QUOTES:
+            end = _literal_end(sql, i)
+            out.append(sql[i:end])
+            i = end
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+_IDENTIFIER = r'(?:`[^`]+`|"[^"]+"|[A-Za-z_][\w$]*)'
+_TABLE_REFERENCE = re.compile(
+    rf"\b(?:FROM|JOIN)\s+({_IDENTIFIER}(?:\s*\.\s*{_IDENTIFIER})?)(?![\w$.])(?!\s*\()", re.IGNORECASE)
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """Get the tables a query reads from, as ``table`` or ``database.table``.
+
+    Tables are found after ``FROM`` and ``JOIN``; subqueries and table
+    functions such as ``numbers(10)`` are skipped. Quotes are removed.
+
+    Args:
+        sql (str): The raw SQL.
+
+    Returns:
+        List[str]: The distinct table references, in order of appearance.
+    """
+    tables = []
+    for match in _TABLE_REFERENCE.finditer(normalize_sql(sql)):
+        parts = [part.strip().strip('`"') for part in match.group(1).split(".")]
+        table = ".".join(parts)
+        if table not in tables:
+            tables.append(table)
+    return tables
+
+
+def quote(value: str) -> str:
+    """Quote a value as a ClickHouse string literal, escaping backslashes and quotes."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def strip_trailing_semicolons(sql: str) -> str:
+    """Remove trailing semicolons, which break queries wrapped by Grafana."""
+    return sql.rstrip().rstrip(";").rstrip()
+
+
+def schema_probe_sql(sql: str) -> str:
+    """Wrap a query so it returns its columns but no rows.
+
+    The newlines keep a trailing ``--`` comment from swallowing the wrapper.
+    """
+    return f"SELECT * FROM (\n{strip_trailing_semicolons(sql)}\n) LIMIT 0"
+
+
+def explain_sql(sql: str) -> str:
+    """Wrap a query in ``EXPLAIN`` so ClickHouse plans it without reading data."""
+    return f"EXPLAIN\n{strip_trailing_semicolons(sql)}"
+
+
+def estimate_sql(sql: str) -> str:
+    """Wrap a query in ``EXPLAIN ESTIMATE`` to get the parts, rows and marks it would read per table."""
+    return f"EXPLAIN ESTIMATE\n{strip_trailing_semicolons(sql)}"
+
+
+_TIME_FILTER = re.compile(r"\$__(?:timeFilter|timeFilter_ms|dateTimeFilter|dt)\s*\(")
+# Constructs whose result over a range is not the union of their results over its parts
+_RANGE_DEPENDENT = re.compile(
+    r"\$__(?:interval|timeInterval|fromTime|toTime|from|to)\b|\$\{__(?:from|to|interval)"
+    r"|\bLIMIT\b|\bWITH\s+FILL\b|\bOVER\s*\(|\b(?:runningDifference|runningAccumulate|neighbor)\s*\(",
+    re.IGNORECASE)
+
+
+def has_time_filter(sql: str) -> bool:
+    """Whether a query filters its rows by the dashboard time range with a time filter macro."""
+    return bool(_TIME_FILTER.search(normalize_sql(sql)))
+
+
+# Aggregate functions of ClickHouse, with their combinators such as countIf or sumMerge
+_AGGREGATE = re.compile(
+    r"\b(?:count|sum|avg|min|max|any|anyLast|anyHeavy|argMin|argMax|uniq\w*|quantile\w*|median\w*"
+    r"|groupArray\w*|groupUniqArray\w*|groupBit\w*|stddev\w*|var(?:Pop|Samp)\w*|covar\w*|corr\w*|topK\w*"
+    r"|entropy|histogram|simpleLinearRegression|sumMap|minMap|maxMap|first_value|last_value)"
+    r"(?:If|Merge|State|Array|OrNull|OrDefault|Distinct|ForEach|Resample)*\s*\(",
+    re.IGNORECASE)
+# Functions labelling a timestamp with the start of its time bucket
+_BUCKET_START = re.compile(r"(?:toStartOf\w+|\$__timeGroup)\s*\(", re.IGNORECASE)
+_COLUMN = re.compile(rf"{_IDENTIFIER}(?:\s*\.\s*{_IDENTIFIER})?")
+_CLAUSE_END = re.compile(r"\b(?:HAVING|ORDER\s+BY|LIMIT|SETTINGS|UNION|FORMAT|WITH\s+(?:ROLLUP|CUBE|TOTALS))\b",
+                         re.IGNORECASE)
+
+
+def _mask(sql: str, nested: bool = True) -> str:
+    """Blank out literals and, with ``nested``, the contents of parentheses, keeping positions.
+
+    Searching the masked query only finds keywords of the outermost query.
+    """
+    out = []
+    depth = 0
+    i = 0
+    while i < len(sql):
+        c = sql[i]
+        if c in _QUOTES:
+            end = _literal_end(sql, i)
+            out.append(" " * (end - i))
+            i = end
+            continue
+        if c == "(":
+            out.append(c if depth == 0 or not nested else " ")
+            depth += 1
+        elif c == ")":
+            depth = max(depth - 1, 0)
+            out.append(c if depth == 0 or not nested else " ")
+        else:
+            out.append(c if depth == 0 or not nested else " ")
+        i += 1
+    return "".join(out)
+
+
+def _split_top_level(sql: str) -> List[str]:
+    """Split a list of expressions on the commas outside parentheses and literals."""
+    masked = _mask(sql)
+    parts, start = [], 0
+    for i, c in enumerate(masked):
+        if c == ",":
+            parts.append(sql[start:i].strip())
+            start = i + 1
+    parts.append(sql[start:].strip())
+    return [part for part in parts if part]
+
+
+def _unquote(identifier: str) -> str:
+    return identifier.strip().strip('`"').split(".")[-1].strip('`"')
+
+
+def _references(expression: str, columns: List[str]) -> bool:
+    # String literals are blanked, quoted identifiers kept
+    expression = re.sub(r"'(?:[^'\\]|\\.)*'", "''", expression)
+    identifiers = {_unquote(name) for name in re.findall(_IDENTIFIER, expression)}
+    return any(column in identifiers for column in columns)
+
+
+def _is_column(expression: str, columns: List[str]) -> bool:
+    return _COLUMN.fullmatch(expression.strip()) is not None and _unquote(expression) in columns
+
+
+def _is_bucket_start(expression: str, columns: List[str]) -> bool:
+    """Whether an expression is exactly a bucket-start function of a filtered column, e.g. toStartOfHour(ts)."""
+    match = _BUCKET_START.match(expression)
+    if match is None:
+        return False
+    # The call must span the whole expression, with nothing such as "+ INTERVAL 1 HOUR" after it
+    call = _mask(expression)[match.end():].rstrip()
+    if not call.endswith(")") or call[:-1].strip():
+        return False
+    arguments = _split_top_level(expression[match.end():len(call) + match.end() - 1])
+    return bool(arguments) and _is_column(arguments[0], columns)
+
+
+def _select_items(sql: str) -> List[Tuple[str, Optional[str]]]:
+    """Get the expressions of the outermost SELECT list with their alias, if any."""
+    masked = _mask(sql)
+    select = re.search(r"\bSELECT\b(?:\s+DISTINCT\b)?", masked, re.IGNORECASE)
+    source = re.search(r"\bFROM\b", masked, re.IGNORECASE)
+    if not (select and source):
+        return []
+    items = []
+    for item in _split_top_level(sql[select.end():source.start()]):
+        match = re.match(rf"(.*?)\s+AS\s+({_IDENTIFIER})$", item, re.IGNORECASE | re.DOTALL)
+        items.append((match.group(1).strip(), _unquote(match.group(2))) if match else (item, None))
+    return items
+
+
+def _group_keys(sql: str, items: List[Tuple[str, Optional[str]]]) -> Optional[List[str]]:
+    """Get the GROUP BY expressions of the outermost query, with aliases and positions resolved.
+
+    Returns None without a GROUP BY clause.
+    """
+    masked = _mask(sql)
+    group_by = re.search(r"\bGROUP\s+BY\b", masked, re.IGNORECASE)
+    if group_by is None:
+        return None
+    end = _CLAUSE_END.search(masked, group_by.end())
+    keys = _split_top_level(sql[group_by.end():end.start() if end else len(sql)])
+
+    aliases = {alias: expression for expression, alias in items if alias}
+    resolved = []
+    for key in keys:
+        if key.isdigit() and 0 < int(key) <= len(items):
+            key = items[int(key) - 1][0]
+        resolved.append(aliases.get(_unquote(key), key))
+    return resolved
+
+
+def _same(a: str, b: str) -> bool:
+    return re.sub(r"\s+", "", a).lower() == re.sub(r"\s+", "", b).lower()
+
+
+# Kinds of range-decomposable queries, see range_decomposition
+ROWS = "rows"
+BUCKETS = "buckets"
+
+
+def range_decomposition(sql: str) -> Optional[str]:
+    """Get how a query's rows for a time range relate to the rows for its sub-ranges.
+
+    ``ROWS``: raw rows filtered with a time filter macro and labelled with the
+    filtered column itself; the rows for a range are the rows for its parts
+    put together. ``BUCKETS``: aggregates grouped by exactly a bucket-start
+    function of the filtered column, such as ``toStartOfHour(ts)`` or
+    ``toStartOfInterval(ts, INTERVAL 5 minute)``, that label their rows with
+    that same expression; the same holds except for the buckets cut by the
+    sub-ranges' bounds, which must be recomputed. None otherwise: other
+    aggregates such as a count per name over the whole range, buckets
+    labelled by their end or by ``max(ts)``, DISTINCT, aggregates in
+    subqueries, limits, fills, window functions and macros that depend on the
+    range's bounds or interval.
+
+    The row label is taken to be the first selected expression that reads
+    the filtered column.
+
+    Args:
+        sql (str): The raw SQL.
+
+    Returns:
+        Optional[str]: ``ROWS``, ``BUCKETS`` or None.
+    """
+    sql = strip_trailing_semicolons(normalize_sql(sql))
+    columns = [_unquote(match.group(1)) for match in re.finditer(
+        r"\$__(?:timeFilter|timeFilter_ms|dateTimeFilter|dt)\s*\(\s*([^,)]+)", sql)]
+    if not columns or _RANGE_DEPENDENT.search(sql):
+        return None
+
+    unquoted = _mask(sql, nested=False)
+    if len(re.findall(r"\bSELECT\b", unquoted, re.IGNORECASE)) > 1:
+        # Subqueries are not analysed
+        return None
+    items = _select_items(sql)
+    keys = _group_keys(sql, items)
+    label = next((expression for expression, _ in items
+                  if expression == "*" or _references(expression, columns)), None)
+    if label is None:
+        return None
+
+    aggregated = bool(_AGGREGATE.search(unquoted) or re.search(r"\bDISTINCT\b", unquoted, re.IGNORECASE))
+    if keys is None and not aggregated:
+        return ROWS if label == "*" or _is_column(label, columns) else None
+    if keys is not None and _is_bucket_start(label, columns) and any(_same(key, label) for key in keys):
+        return BUCKETS
+    return None
+
+
+def is_range_decomposable(sql: str) -> bool:
+    """Whether a query can be fetched in time slices, see ``range_decomposition``."""
+    return range_decomposition(sql) is not None
@@ -0,0 +1,149 @@
+"""
+Registry of single-panel dashboard templates bundled with the package.
+
+Templates are read and validated once. ``DashboardTemplate.build`` returns a
+payload that copies only the objects on the path to the fields it sets (uid,
+title, description, panel title, rawSql and datasource uids) and shares every
+other subtree with the template, so building a dashboard costs no I/O and no
+deep copy. Built payloads are meant to be serialized, not mutated in place.
+"""
+
+import json
+import threading
+from importlib import resources
+from typing import Any, Dict, Optional
+
+DEFAULT_TEMPLATE = "timeseries"
+
+
+class DashboardTemplate:
+    """A validated ``/api/dashboards/db`` payload with a single panel and query."""
+
+    def __init__(self, name: str, payload: Dict[str, Any]):
+        try:
+            panel = payload["dashboard"]["panels"][0]
+            target = panel["targets"][0]
+            if not isinstance(panel["datasource"], dict) or not isinstance(target["datasource"], dict):
+                raise TypeError("datasource must be an object")
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Invalid dashboard template '{name}': {e}") from e
+        self.name = name
+        self.payload = payload
+
+    def build_panel(
+        self,
+        title: str,
+        raw_sql: str,
+        datasource_uid: str,
+        description: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Build the template's panel with its query, e.g. to add it to an existing dashboard.
+
+        Args:
+            title (str): Title of the panel.
+            raw_sql (str): SQL of the panel query.
+            datasource_uid (str): Datasource of the panel and its query.
+            description (Optional[str]): Description of the panel.
+
+        Returns:
+            Dict[str, Any]: The panel, sharing unchanged subtrees with the template.
+        """
+        template_panel = self.payload["dashboard"]["panels"][0]
+        template_target = template_panel["targets"][0]
+
+        target = {
+            **template_target,
+            "rawSql": raw_sql,
+            "datasource": {**template_target["datasource"], "uid": datasource_uid},
+        }
+        return {
+            **template_panel,
+            "title": title,
+            "description": description if description else "",
+            "datasource": {**template_panel["datasource"], "uid": datasource_uid},
+            "targets": [target] + template_panel["targets"][1:],
+        }
+
+    def build(
+        self,
+        uid: str,
+        title: str,
+        raw_sql: str,
+        datasource_uid: str,
+        panel_title: Optional[str] = None,
+        description: Optional[str] = None,
+        folder_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Build a dashboard payload from the template.
+
+        Args:
+            uid (str): UID of the new dashboard.
+            title (str): Dashboard title, also used as panel title if ``panel_title`` is empty.
+            raw_sql (str): SQL of the panel query.
+            datasource_uid (str): Datasource of the panel and its query.
+            panel_title (Optional[str]): Title of the panel.
+            description (Optional[str]): Description of the dashboard and the panel.
+            folder_id (Optional[int]): Folder to save the dashboard in.
+
+        Returns:
+            Dict[str, Any]: The payload for ``/api/dashboards/db``.
+        """
+        panel = self.build_panel(panel_title if panel_title else title, raw_sql, datasource_uid, description)
+        dashboard = {
+            **self.payload["dashboard"],
+            "uid": uid,
+            "title": title,
+            "description": description if description else "",
+            "panels": [panel] + self.payload["dashboard"]["panels"][1:],
+        }
+        return {**self.payload, "folderId": folder_id, "dashboard": dashboard}
+
+
+class TemplateRegistry:
+    """Named dashboard templates loaded from package resources."""
+
+    def __init__(self, package: str = "grafana_mcp"):
+        self.package = package
+        self._resources: Dict[str, str] = {}
+        self._templates: Dict[str, DashboardTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, resource: str) -> None:
+        """Register a template stored as a JSON resource of the package."""
+        with self._lock:
+            self._resources[name] = resource
+            self._templates.pop(name, None)
+
+    def get(self, name: str = DEFAULT_TEMPLATE) -> DashboardTemplate:
+        """Get a template, loading it on first use."""
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    if name not in self._resources:
+                        raise KeyError(f"Unknown dashboard template '{name}'")
+                    template = self._templates[name] = self._load(name)
+        return template
+
+    def load_all(self) -> None:
+        """Load and validate every registered template, e.g. at server startup."""
+        for name in list(self._resources):
+            self.get(name)
+
+    def _load(self, name: str) -> DashboardTemplate:
+        with resources.files(self.package).joinpath(self._resources[name]).open("r") as f:
+            return DashboardTemplate(name, json.load(f))
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Get the registry of bundled templates."""
+    global _registry
+    if _registry is None:
+        registry = TemplateRegistry()
+        registry.register(DEFAULT_TEMPLATE, "dashboard.json")
+        _registry = registry
+    return _registry
@@ -0,0 +1,81 @@
+"""
+Resolution of Grafana time range expressions such as ``now-30d`` or ``now/d``.
+"""
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+# Calendar units are approximated with fixed lengths, which is precise enough
+# for cache keys and bucketing.
+UNIT_SECONDS = {
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 7 * 86400,
+    "M": 30 * 86400,
+    "y": 365 * 86400,
+}
+
+_RELATIVE = re.compile(r"^now((?:[+-]\d+[smhdwMy])*)(?:/([smhdwMy]))?$")
+_OFFSET = re.compile(r"([+-])(\d+)([smhdwMy])")
+
+
+def resolve_time(value: str, now: Optional[float] = None) -> float:
+    """Resolve a Grafana time expression to epoch seconds.
+
+    Args:
+        value (str): ``now``-relative expression, epoch milliseconds, or ISO 8601 timestamp.
+        now (Optional[float]): Reference time in epoch seconds. Defaults to the current time.
+
+    Returns:
+        float: The absolute time in epoch seconds.
+    """
+    value = str(value).strip()
+    now = time.time() if now is None else now
+
+    match = _RELATIVE.match(value)
+    if match:
+        result = now
+        for sign, amount, unit in _OFFSET.findall(match.group(1)):
+            delta = int(amount) * UNIT_SECONDS[unit]
+            result += delta if sign == "+" else -delta
+        if match.group(2):
+            result -= result % UNIT_SECONDS[match.group(2)]
+        return result
+
+    if value.isdigit():
+        return int(value) / 1000.0
+
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def resolve_range(
+    time_from: str,
+    time_to: str,
+    now: Optional[float] = None,
+    bucket_seconds: float = 0,
+) -> Tuple[float, float]:
+    """Resolve a time range, optionally flooring both ends to a bucket.
+
+    Args:
+        time_from (str): Start of the range.
+        time_to (str): End of the range.
+        now (Optional[float]): Reference time in epoch seconds. Defaults to the current time.
+        bucket_seconds (float): Bucket width to floor to; 0 keeps exact times.
+
+    Returns:
+        Tuple[float, float]: The range as epoch seconds.
+    """
+    now = time.time() if now is None else now
+    start = resolve_time(time_from, now)
+    end = resolve_time(time_to, now)
+    if bucket_seconds:
+        start -= start % bucket_seconds
+        end -= end % bucket_seconds
+    return start, end
@@ -0,0 +1,293 @@
+"""
+Delta-fetching cache of time-filtered datasource queries.
+
+Dashboards and tools mostly query relative ranges such as ``now-30d`` to
+``now``, so running the same query again a minute later re-reads 30 days of
+data for a minute of new points. For queries whose rows only depend on data
+at or after their timestamp (see ``sql.is_range_decomposable``), this cache
+keeps the decoded frames together with the absolute range they cover, keyed
+independently of the range. A later run over an overlapping range only
+fetches the tail from shortly before the last cached row, replaces the
+cached rows from that point, drops the rows that fell out of the range, and
+returns the merged frames.
+
+Re-fetching from the last row's timestamp recomputes a time bucket that was
+still filling up, and ``overlap`` picks up data that arrived late. Queries
+grouped by time bucket (``sql.BUCKETS``) label a row with the start of its
+bucket, so the bucket holding the new start of a range that moved forward
+is labelled before it and was computed over data that is now out of range;
+it is always recomputed with a query from the new start up to the first
+cached bucket after it. Entries are fully refreshed after ``max_age``
+seconds, or when the range grows backwards or fetched frames do not line up
+with the cached ones.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from grafana_mcp.cache import LRUCache
+from grafana_mcp.config import get_settings
+
+# Coroutine function fetching [start, end] in epoch seconds, returning the
+# /api/ds/query response and its size in bytes
+FetchRange = Callable[[float, float], Awaitable[Tuple[Dict[str, Any], int]]]
+FrameSignature = Tuple[Any, ...]
+# Frames by refId, and the [lo, hi) range in epoch ms of the rows to take from them
+Segment = Tuple[Dict[str, List[Dict[str, Any]]], float, float]
+
+_timeseries_cache: Optional["TimeSeriesCache"] = None
+_timeseries_cache_lock = threading.Lock()
+
+
+def _time_index(frame: Dict[str, Any]) -> Optional[int]:
+    fields = frame.get("schema", {}).get("fields", [])
+    return next((i for i, field in enumerate(fields) if field.get("type") == "time"), None)
+
+
+def _mergeable(frame: Dict[str, Any]) -> bool:
+    """Whether a frame has a time column without nulls and no side-tables indexed by row."""
+    data = frame.get("data", {})
+    if data.get("entities") or data.get("nanos"):
+        return False
+    index = _time_index(frame)
+    values = data.get("values", [])
+    return index is not None and index < len(values) and None not in values[index]
+
+
+def _signature(ref_id: str, frame: Dict[str, Any]) -> FrameSignature:
+    schema = frame.get("schema", {})
+    fields = tuple(
+        (field.get("name"), field.get("type"), tuple(sorted((field.get("labels") or {}).items())))
+        for field in schema.get("fields", [])
+    )
+    return ref_id, schema.get("name"), fields
+
+
+def slice_frame(frame: Dict[str, Any], start_ms: float, end_ms: float) -> Dict[str, Any]:
+    """Keep the rows of a frame with ``start_ms <= time < end_ms``.
+
+    Sorted time columns are sliced with a binary search; others row by row.
+    """
+    values = frame["data"]["values"]
+    times = values[_time_index(frame)]
+    if all(a <= b for a, b in zip(times, times[1:])):
+        lo, hi = bisect.bisect_left(times, start_ms), bisect.bisect_left(times, end_ms)
+        columns = [column[lo:hi] for column in values]
+    else:
+        rows = [i for i, t in enumerate(times) if start_ms <= t < end_ms]
+        columns = [[column[i] for i in rows] for column in values]
+    return {**frame, "data": {**frame["data"], "values": columns}}
+
+
+def _concat_frames(head: Dict[str, Any], tail: Dict[str, Any]) -> Dict[str, Any]:
+    columns = [a + b for a, b in zip(head["data"]["values"], tail["data"]["values"])]
+    return {**tail, "data": {**tail["data"], "values": columns}}
+
+
+def _frames_by_ref(query_result: Dict[str, Any]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    frames = {}
+    for ref_id, result in query_result.get("results", {}).items():
+        if result.get("error"):
+            return None
+        frames[ref_id] = result.get("frames") or []
+        if not all(_mergeable(frame) for frame in frames[ref_id]):
+            return None
+    return frames
+
+
+def _result(frames: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return {"results": {ref_id: {"status": 200, "frames": ref_frames} for ref_id, ref_frames in frames.items()}}
+
+
+def _row_count(frames: Dict[str, List[Dict[str, Any]]]) -> int:
+    return sum(len(frame["data"]["values"][0]) for ref_frames in frames.values()
+               for frame in ref_frames if frame["data"]["values"])
+
+
+class TimeSeriesCache:
+    """Cache of time-filtered query results that fetches only what a new range adds."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_age: float = 3600.0,
+        overlap: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_age = max_age
+        self.overlap = overlap
+        self._clock = clock
+        # Entries expire by max_age, checked against 'fetched_at'; the LRU only bounds memory
+        self._entries = LRUCache(ttl=max_age, max_bytes=max_bytes, clock=clock)
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.delta_fetches = 0
+        self.cached = 0
+        self.fetched_seconds = 0.0
+        self.requested_seconds = 0.0
+
+    async def get(
+        self, key: Hashable, start: float, end: float, fetch: FetchRange, bucketed: bool = False
+    ) -> Tuple[Dict[str, Any], int]:
+        """Get the result of a query over ``[start, end]``, fetching only what is not cached.
+
+        Args:
+            key (Hashable): Identity of the query, independent of its time range.
+            start (float): Start of the range in epoch seconds.
+            end (float): End of the range in epoch seconds.
+            fetch (FetchRange): Coroutine function running the query over an absolute range.
+            bucketed (bool): Whether the query groups rows by time buckets labelled with their
+                start, as told by ``sql.range_decomposition``. Defaults to False, for raw rows.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: An ``/api/ds/query`` style response over the requested range,
+            and its size in bytes, estimated when it was merged.
+        """
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is None or start < entry["start"] or now - entry["fetched_at"] >= self.max_age:
+            return await self._fetch_full(key, start, end, fetch)
+
+        cached = entry["frames"]
+        times = [column for ref_frames in cached.values() for frame in ref_frames
+                 for column in [frame["data"]["values"][_time_index(frame)]] if column]
+        # Ranges to fetch: (start, end) in seconds and the rows kept from the result, (lo, hi) in ms
+        head = tail = None
+        cached_lo, cached_hi = float("-inf"), float("inf")
+        if start > entry["start"]:
+            cached_lo = start * 1000.0
+            if bucketed:
+                # The bucket holding the new start is labelled before it and is recomputed,
+                # along with any bucket up to the first cached one after the start
+                cached_lo = min((t for column in times for t in column if t >= start * 1000.0), default=None)
+                if cached_lo is None:
+                    return await self._fetch_full(key, start, end, fetch)
+                head = (start, cached_lo / 1000.0 - 1, float("-inf"), cached_lo)
+        if end > entry["end"]:
+            # Recompute from the last row, which may be an incomplete time bucket
+            last_row = max((max(column) / 1000.0 for column in times), default=entry["end"])
+            cut = max(min(last_row, entry["end"]) - self.overlap, start)
+            cached_hi = cut * 1000.0
+            tail = (cut, end, cached_hi, float("inf"))
+        if head is not None and tail is not None and head[1] >= tail[0]:
+            return await self._fetch_full(key, start, end, fetch)
+
+        requests = [request for request in (head, tail) if request is not None]
+        results = await asyncio.gather(*[fetch(request[0], request[1]) for request in requests])
+        pieces = {}
+        for request, (query_result, _) in zip(requests, results):
+            frames = _frames_by_ref(query_result)
+            if frames is None:
+                return await self._fetch_full(key, start, end, fetch)
+            pieces[request] = (frames, request[2], request[3])
+        segments = [pieces[head]] if head is not None else []
+        segments.append((cached, cached_lo, cached_hi))
+        if tail is not None:
+            segments.append(pieces[tail])
+
+        frames = self._merge(segments)
+        if frames is None:
+            return await self._fetch_full(key, start, end, fetch)
+        if requests:
+            self._count("delta_fetches", sum(request[1] - request[0] for request in requests), end - start)
+        else:
+            self._count("cached", 0.0, end - start)
+
+        self._store(key, frames, start, max(end, entry["end"]), entry["fetched_at"], entry["row_bytes"])
+        frames = {ref_id: [slice_frame(frame, float("-inf"), end * 1000.0 + 1) for frame in ref_frames]
+                  for ref_id, ref_frames in frames.items()}
+        return _result(frames), int(_row_count(frames) * entry["row_bytes"])
+
+    async def _fetch_full(
+        self, key: Hashable, start: float, end: float, fetch: FetchRange
+    ) -> Tuple[Dict[str, Any], int]:
+        query_result, size = await fetch(start, end)
+        self._count("full_fetches", end - start, end - start)
+        frames = _frames_by_ref(query_result)
+        if frames is None:
+            self._entries.delete(key)
+        else:
+            rows = _row_count(frames)
+            self._store(key, frames, start, end, self._clock(), size / rows if rows else 0.0)
+        return query_result, size
+
+    @staticmethod
+    def _merge(segments: List[Segment]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Put the rows of each segment's frames within its ``[lo, hi)`` ms range together, in order.
+
+        Frames are matched by refId, name, fields and labels. Returns None when
+        the segments have different refIds or a refId has two frames alike.
+        """
+        ref_ids = set(segments[0][0])
+        if any(set(frames) != ref_ids for frames, _, _ in segments):
+            return None
+        merged = {}
+        for ref_id in ref_ids:
+            by_signature: Dict[FrameSignature, Dict[str, Any]] = {}
+            for frames, lo, hi in segments:
+                signatures = [_signature(ref_id, frame) for frame in frames[ref_id]]
+                if len(set(signatures)) != len(signatures):
+                    return None
+                for signature, frame in zip(signatures, frames[ref_id]):
+                    part = slice_frame(frame, lo, hi)
+                    previous = by_signature.get(signature)
+                    by_signature[signature] = part if previous is None else _concat_frames(previous, part)
+            merged[ref_id] = list(by_signature.values())
+        return merged
+
+    def _store(
+        self,
+        key: Hashable,
+        frames: Dict[str, List[Dict[str, Any]]],
+        start: float,
+        end: float,
+        fetched_at: float,
+        row_bytes: float,
+    ) -> None:
+        entry = {"frames": frames, "start": start, "end": end, "fetched_at": fetched_at, "row_bytes": row_bytes}
+        ttl = fetched_at + self.max_age - self._clock()
+        self._entries.set(key, entry, ttl=ttl, size=max(int(_row_count(frames) * row_bytes), 1))
+
+    def _count(self, counter: str, fetched: float, requested: float) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.fetched_seconds += fetched
+            self.requested_seconds += requested
+
+    def clear(self) -> None:
+        """Forget all cached results."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get fetch counters.
+
+        Returns:
+            Dict[str, Any]: Number of 'full_fetches', 'delta_fetches' and 'cached' answers, the
+            'fetched_fraction' of the requested time ranges actually queried, and the entry
+            counters of the underlying LRU cache.
+        """
+        with self._lock:
+            fraction = self.fetched_seconds / self.requested_seconds if self.requested_seconds else 0.0
+            stats = {"full_fetches": self.full_fetches, "delta_fetches": self.delta_fetches,
+                     "cached": self.cached, "fetched_fraction": round(fraction, 4)}
+        entries = self._entries.stats()
+        stats.update(entries=entries["entries"], bytes=entries["bytes"], max_bytes=entries["max_bytes"])
+        return stats
+
+
+def get_timeseries_cache() -> TimeSeriesCache:
+    """Get the process-wide delta-fetching cache."""
+    global _timeseries_cache
+    if _timeseries_cache is None:
+        with _timeseries_cache_lock:
+            if _timeseries_cache is None:
+                settings = get_settings()
+                _timeseries_cache = TimeSeriesCache(
+                    max_bytes=settings.delta_cache_max_bytes,
+                    max_age=settings.delta_cache_max_age,
+                    overlap=settings.delta_cache_overlap,
+                )
+    return _timeseries_cache
@@ -0,0 +1,100 @@
+"""
+Startup warmup and readiness of the server.
+
+At startup the server runs a set of warmup steps concurrently in the
+background, such as opening connections to Grafana, checking the token and
+prefetching the folder tree, so the first tool calls do not pay for them.
+The server reports ready once every required step has succeeded; failures
+of the others are only reported. Until then, the required steps that failed
+are retried with exponential backoff, so an instance started while Grafana
+is unreachable becomes ready once it is back.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+Step = Callable[[], Awaitable[Any]]
+
+# Delay before the first retry of failed required steps, doubled up to the maximum
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+_warmup: Optional["Warmup"] = None
+_warmup_lock = threading.Lock()
+
+
+class Warmup:
+    """Runs warmup steps and tracks whether the server is ready."""
+
+    def __init__(
+        self,
+        steps: Dict[str, Step],
+        required: Iterable[str] = (),
+        retry_delay: float = RETRY_DELAY,
+        max_retry_delay: float = MAX_RETRY_DELAY,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.steps = steps
+        self.required = set(required)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._clock = clock
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self.state = "pending"
+        self.attempts = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether every required step succeeded."""
+        return self.state == "ready"
+
+    async def run(self) -> bool:
+        """Run all steps, then retry failed required steps until they succeed.
+
+        Returns:
+            bool: True once ready; the coroutine only returns early when cancelled.
+        """
+        self.state = "running"
+        pending = list(self.steps)
+        delay = self.retry_delay
+        while True:
+            self.attempts += 1
+            await asyncio.gather(*[self._run_step(name) for name in pending])
+            failed = [name for name in self.required if not self._results[name]["ok"]]
+            if not failed:
+                self.state = "ready"
+                return True
+            self.state = "retrying"
+            pending = failed
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def _run_step(self, name: str) -> None:
+        start = self._clock()
+        try:
+            result = await self.steps[name]()
+            self._results[name] = {"ok": True, "seconds": round(self._clock() - start, 6)}
+            if result is not None:
+                self._results[name]["result"] = result
+        except Exception as e:
+            self._results[name] = {"ok": False, "seconds": round(self._clock() - start, 6), "error": str(e)}
+
+    def status(self) -> Dict[str, Any]:
+        """Get the readiness state and the outcome of each step that ran."""
+        return {"ready": self.ready, "state": self.state, "attempts": self.attempts,
+                "steps": {name: dict(result) for name, result in self._results.items()}}
+
+
+def start_warmup(steps: Dict[str, Step], required: Iterable[str] = ()) -> "asyncio.Task":
+    """Start the process-wide warmup in the background of the running event loop."""
+    global _warmup
+    with _warmup_lock:
+        _warmup = Warmup(steps, required)
+    return asyncio.ensure_future(_warmup.run())
+
+
+def get_warmup() -> Optional[Warmup]:
+    """Get the process-wide warmup, or None if none was started."""
+    return _warmup
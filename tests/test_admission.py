@@ -0,0 +1,102 @@
+"""Tests for the grafana_mcp.admission module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.admission import DatasourceLimiter, QueueFullError, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for the token bucket."""
+
+    def test_waits_once_burst_is_spent(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2.0, burst=2, clock=lambda: now[0])
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+        now[0] = 2.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, burst=1)
+        self.assertEqual(bucket.reserve() + bucket.reserve(), 0.0)
+
+
+class TestDatasourceLimiter(unittest.TestCase):
+    """Tests for the concurrency cap and the fair queue."""
+
+    def test_caps_concurrency_and_rejects_when_full(self):
+        limiter = DatasourceLimiter("ch", max_concurrency=2, max_queue=1)
+        running = []
+        peak = []
+
+        async def query(release):
+            async with limiter.slot():
+                running.append(1)
+                peak.append(len(running))
+                await release.wait()
+                running.pop()
+
+        async def main():
+            release = asyncio.Event()
+            tasks = [asyncio.ensure_future(query(release)) for _ in range(3)]
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.stats()["queued"], 1)
+            with self.assertRaises(QueueFullError):
+                await query(release)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(max(peak), 2)
+        stats = limiter.stats()
+        self.assertEqual((stats["active"], stats["queued"], stats["admitted"], stats["rejected"]), (0, 0, 3, 1))
+
+    def test_serves_sessions_round_robin(self):
+        limiter = DatasourceLimiter("ch", max_concurrency=1, max_queue=10)
+        order = []
+
+        async def query(client, name, gate=None):
+            async with limiter.slot(client):
+                order.append(name)
+                if gate is not None:
+                    await gate.wait()
+
+        async def main():
+            gate = asyncio.Event()
+            first = asyncio.ensure_future(query("a", "a0", gate))
+            await asyncio.sleep(0)
+            tasks = [asyncio.ensure_future(query("a", f"a{i}")) for i in range(1, 4)]
+            tasks.append(asyncio.ensure_future(query("b", "b1")))
+            await asyncio.sleep(0)
+            gate.set()
+            await asyncio.gather(first, *tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["a0", "a1", "b1", "a2", "a3"])
+
+    def test_cancelled_waiter_leaves_queue(self):
+        limiter = DatasourceLimiter("ch", max_concurrency=1, max_queue=1)
+
+        async def main():
+            gate = asyncio.Event()
+
+            async def hold():
+                async with limiter.slot():
+                    await gate.wait()
+
+            holder = asyncio.ensure_future(hold())
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(hold())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            self.assertEqual(limiter.stats()["queued"], 0)
+            gate.set()
+            await holder
+
+        asyncio.run(main())
+        self.assertEqual(limiter.stats()["active"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
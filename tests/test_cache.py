@@ -0,0 +1,77 @@
+"""Tests for the grafana_mcp.cache module."""
+
+import unittest
+
+from grafana_mcp.cache import LRUCache, TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """Tests for the TTL cache."""
+
+    def test_expiry(self):
+        """Test that entries expire after their ttl."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=30)
+        clock.now = 15
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_delete_where(self):
+        """Test removing entries by key predicate."""
+        cache = TTLCache(ttl=10)
+        cache.set(("p", "a"), 1)
+        cache.set(("q", "b"), 2)
+        cache.delete_where(lambda key: key[0] == "p")
+        self.assertIsNone(cache.get(("p", "a")))
+        self.assertEqual(cache.get(("q", "b")), 2)
+
+
+class TestLRUCache(unittest.TestCase):
+    """Tests for the byte-bounded LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the budget is enforced by evicting the oldest unused entry."""
+        cache = LRUCache(ttl=10, max_bytes=10)
+        cache.set("a", 1, size=4)
+        cache.set("b", 2, size=4)
+        cache.get("a")
+        cache.set("c", 3, size=4)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["bytes"], 8)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_oversized_entries_are_not_stored(self):
+        """Test that an entry larger than the budget is skipped."""
+        cache = LRUCache(ttl=10, max_bytes=10)
+        cache.set("a", 1, size=11)
+        self.assertIsNone(cache.get("a"))
+
+    def test_stats(self):
+        """Test the hit rate counters."""
+        clock = FakeClock()
+        cache = LRUCache(ttl=10, max_bytes=10, clock=clock)
+        cache.set("a", 1)
+        cache.get("a")
+        clock.now = 11
+        cache.get("a")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 0))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
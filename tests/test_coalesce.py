@@ -0,0 +1,83 @@
+"""Tests for the grafana_mcp.coalesce module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.coalesce import Coalescer, request_key
+
+
+class TestCoalescer(unittest.TestCase):
+    """Tests for single-flight coalescing."""
+
+    def setUp(self):
+        self.coalescer = Coalescer()
+        self.calls = 0
+
+    async def fetch(self, result="ok", delay=0.01):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def test_concurrent_calls_share_one_run(self):
+        async def main():
+            return await asyncio.gather(*[self.coalescer.run("key", self.fetch) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(main()), ["ok"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.coalescer.stats(), {"started": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_sequential_calls_are_not_cached(self):
+        async def main():
+            await self.coalescer.run("key", self.fetch)
+            await self.coalescer.run("key", self.fetch)
+
+        asyncio.run(main())
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_reach_every_waiter(self):
+        async def main():
+            return await asyncio.gather(
+                *[self.coalescer.run("key", lambda: self.fetch(ValueError("boom"))) for _ in range(3)],
+                return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertEqual([str(r) for r in results], ["boom"] * 3)
+        self.assertEqual(self.calls, 1)
+
+    def test_cancelled_waiter_does_not_cancel_others(self):
+        async def main():
+            first = asyncio.ensure_future(self.coalescer.run("key", self.fetch))
+            second = asyncio.ensure_future(self.coalescer.run("key", self.fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second, first.cancelled()
+
+        self.assertEqual(asyncio.run(main()), ("ok", True))
+        self.assertEqual(self.calls, 1)
+
+    def test_call_is_cancelled_once_abandoned(self):
+        async def main():
+            waiter = asyncio.ensure_future(self.coalescer.run("key", lambda: self.fetch(delay=10)))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            await asyncio.sleep(0)
+            return self.coalescer.stats()["in_flight"]
+
+        self.assertEqual(asyncio.run(main()), 0)
+
+
+class TestRequestKey(unittest.TestCase):
+    """Tests for request_key."""
+
+    def test_key_ignores_json_key_order(self):
+        self.assertEqual(request_key("post", "/api/ds/query", {"json": {"a": 1, "b": 2}}),
+                         request_key("POST", "/api/ds/query", {"json": {"b": 2, "a": 1}}))
+        self.assertNotEqual(request_key("GET", "/api/folders", {"params": {"parentUid": "x"}}),
+                            request_key("GET", "/api/folders", {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
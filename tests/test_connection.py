@@ -0,0 +1,108 @@
+"""Tests for the grafana_mcp.connection module."""
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+import httpx
+
+from grafana_mcp import connection, session
+
+
+class TestConnection(unittest.TestCase):
+    """Tests for the shared Grafana connection layer."""
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {
+            "GRAFANA_URL": "http://grafana.example:3000/",
+            "GRAFANA_API_TOKEN": "secret",
+            "GRAFANA_POOL_SIZE": "4",
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.reset_connections()
+        self.addCleanup(connection.reset_connections)
+
+    def test_session_is_shared(self):
+        """Test that the client and raw calls use one session."""
+        shared = connection.get_session()
+        self.assertIs(shared, connection.get_session())
+        self.assertIs(connection.get_grafana_client().client.s, shared)
+        self.assertEqual(shared.headers["Authorization"], "Bearer secret")
+
+    def test_missing_token(self):
+        """Test that a missing token is reported when the session is built."""
+        with mock.patch.dict(os.environ, {"GRAFANA_API_TOKEN": ""}):
+            connection.reset_connections()
+            with self.assertRaises(ValueError):
+                connection.get_session()
+
+    def test_pool_stats(self):
+        """Test that pool counters are exposed before and after the session exists."""
+        stats = connection.get_pool_stats()
+        self.assertEqual(stats["sync_session"], {"requests": 0, "hits": 0, "misses": 0, "pool_size": 4})
+        self.assertEqual(stats["async_client"]["requests"], 0)
+        self.assertEqual(stats["async_client"]["max_connections"], 4)
+        connection.get_session()
+        self.assertEqual(connection.get_pool_stats()["sync_session"]["requests"], 0)
+
+    def test_async_pool_stats(self):
+        """Test that async requests are counted as reusing a connection unless they opened one."""
+        class Transport(httpx.AsyncBaseTransport):
+            connected = False
+
+            async def handle_async_request(self, request):
+                if not self.connected:
+                    self.connected = True
+                    await request.extensions["trace"]("connection.connect_tcp.started", {})
+                return httpx.Response(200, json={})
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            connection._async_clients[loop] = httpx.AsyncClient(
+                base_url="http://grafana.example:3000", transport=Transport())
+            for _ in range(3):
+                await connection.grafana_request_async("GET", "/api/health", coalesce=False)
+            return connection.get_pool_stats()["async_client"]
+
+        stats = asyncio.run(run())
+        self.assertEqual((stats["requests"], stats["hits"], stats["misses"], stats["clients"]), (3, 2, 1, 1))
+
+    def test_retry_on_429_for_post(self):
+        """Test that 429 responses are retried for any method."""
+        retry = session._GrafanaRetry(total=2, status_forcelist=connection.RETRY_STATUSES)
+        self.assertTrue(retry.is_retry("POST", 429))
+        self.assertFalse(retry.is_retry("POST", 503))
+        self.assertTrue(retry.is_retry("GET", 503))
+
+    def test_async_request_retries_429(self):
+        """Test that the async client retries throttled requests."""
+        statuses = [429, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), json={"path": request.url.path})
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            connection._async_clients[loop] = httpx.AsyncClient(
+                base_url="http://grafana.example:3000", transport=httpx.MockTransport(handler))
+            with mock.patch.dict(os.environ, {"GRAFANA_RETRY_BACKOFF": "0"}):
+                connection.get_settings.cache_clear()
+                return await connection.grafana_request_async("POST", "/api/ds/query", json={})
+
+        response = asyncio.run(run())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"path": "/api/ds/query"})
+        self.assertEqual(statuses, [])
+
+    def test_run_sync_reuses_loop(self):
+        """Test that sync callers share one background loop."""
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        self.assertIs(connection.run_sync(current_loop()), connection.run_sync(current_loop()))
+
+
+if __name__ == "__main__":
+    unittest.main()
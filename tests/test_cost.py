@@ -0,0 +1,76 @@
+"""Tests for the grafana_mcp.cost module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.cost import CostGuard, QueryBudgetError
+from grafana_mcp.timerange import resolve_range
+
+SQL = "SELECT ts AS time, count() FROM db.events WHERE $__timeFilter(ts) GROUP BY time"
+ROWS_PER_DAY = 10_000_000
+
+
+class FakeClickHouse:
+    """Answers EXPLAIN ESTIMATE with rows proportional to the time range."""
+
+    def __init__(self):
+        self.queries = []
+
+    async def run_sql(self, sql, time_from, time_to):
+        self.queries.append((sql, time_from, time_to))
+        if sql.startswith("EXPLAIN ESTIMATE"):
+            start, end = resolve_range(time_from, time_to)
+            rows = int((end - start) / 86400 * ROWS_PER_DAY)
+            return [{"database": "db", "table": "events", "parts": 3, "rows": rows, "marks": rows // 8192}]
+        return [{"database": "db", "name": "events", "total_rows": "1000", "total_bytes": "20000"}]
+
+
+class TestCostGuard(unittest.TestCase):
+    """Tests for the query cost guard."""
+
+    def setUp(self):
+        self.clickhouse = FakeClickHouse()
+
+    def plan(self, guard, time_from="now-30d", sql=SQL, **kwargs):
+        return asyncio.run(guard.plan("ds", sql, time_from, "now", self.clickhouse.run_sql, **kwargs))
+
+    def test_estimates_are_cached_with_bytes(self):
+        guard = CostGuard(max_rows=10**12)
+        first = self.plan(guard, "now-1d")
+        second = self.plan(guard, "now-1d")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.clickhouse.queries), 2)
+        self.assertEqual(first["rows"], ROWS_PER_DAY)
+        self.assertEqual(first["bytes"], ROWS_PER_DAY * 20)
+        self.assertEqual(guard.stats()["cached"], 1)
+
+    def test_narrows_time_range_to_fit_budget(self):
+        guard = CostGuard(max_rows=5 * ROWS_PER_DAY)
+        cost = self.plan(guard)
+        self.assertLessEqual(cost["rows"], 5 * ROWS_PER_DAY)
+        self.assertEqual(cost["narrowed_from"]["rows"], 30 * ROWS_PER_DAY)
+        start, end = resolve_range(cost["time_from"], cost["time_to"])
+        self.assertAlmostEqual((end - start) / 86400, 4.5, places=2)
+
+    def test_rejects_what_cannot_be_narrowed(self):
+        guard = CostGuard(max_bytes=ROWS_PER_DAY, action="narrow")
+        with self.assertRaises(QueryBudgetError) as raised:
+            self.plan(guard, sql="SELECT * FROM db.events")
+        self.assertEqual(raised.exception.estimate["bytes"], 30 * ROWS_PER_DAY * 20)
+
+        with self.assertRaises(QueryBudgetError):
+            self.plan(guard, narrow=False)
+        self.assertEqual(guard.stats()["rejected"], 2)
+
+    def test_failed_estimates_let_queries_through(self):
+        async def failing(sql, time_from, time_to):
+            raise RuntimeError("EXPLAIN ESTIMATE is only supported for MergeTree tables")
+
+        guard = CostGuard(max_rows=1)
+        self.assertIsNone(asyncio.run(guard.plan("ds", SQL, "now-1d", "now", failing)))
+        self.assertIsNone(self.plan(CostGuard()))
+        self.assertEqual(self.clickhouse.queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
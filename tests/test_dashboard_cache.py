@@ -0,0 +1,63 @@
+"""Tests for the grafana_mcp.dashboard_cache module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.dashboard_cache import DashboardCache
+
+
+class FakeGrafana:
+    """Serves dashboards with a version and counts downloads."""
+
+    def __init__(self):
+        self.versions = {}
+        self.downloads = []
+
+    async def fetch(self, uid):
+        self.downloads.append(uid)
+        return {"dashboard": {"uid": uid, "version": self.versions[uid]}, "meta": {}}, 1000
+
+    async def latest_version(self, uid):
+        return self.versions[uid]
+
+
+class TestDashboardCache(unittest.TestCase):
+    """Tests for the version-aware dashboard cache."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.grafana = FakeGrafana()
+        self.cache = DashboardCache(max_bytes=2500, revalidate_after=30, clock=lambda: self.now)
+
+    def get(self, uid):
+        return asyncio.run(self.cache.get(uid, self.grafana.fetch, self.grafana.latest_version))
+
+    def test_unchanged_dashboard_is_revalidated_without_download(self):
+        self.grafana.versions["a"] = 1
+        self.get("a")
+        self.now += 10
+        self.get("a")
+        self.now += 60
+        self.assertEqual(self.get("a")["dashboard"]["version"], 1)
+        self.assertEqual(self.grafana.downloads, ["a"])
+
+        self.grafana.versions["a"] = 2
+        self.now += 60
+        self.assertEqual(self.get("a")["dashboard"]["version"], 2)
+        self.assertEqual(self.grafana.downloads, ["a", "a"])
+        stats = self.cache.stats()
+        self.assertEqual((stats["fresh"], stats["revalidated"], stats["fetched"]), (1, 1, 2))
+
+    def test_invalidate_and_byte_budget(self):
+        for uid in "abc":
+            self.grafana.versions[uid] = 1
+            self.get(uid)
+        self.assertEqual(self.cache.stats()["bytes"], 2000)
+
+        self.cache.invalidate("c")
+        self.get("c")
+        self.assertEqual(self.grafana.downloads, ["a", "b", "c", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for the grafana_mcp.dashboards module."""
+
+import unittest
+
+from grafana_mcp.dashboards import append_panel, collect_targets, iter_panels, set_target_sql
+
+DASHBOARD = {
+    "panels": [
+        {"id": 1, "title": "a", "datasource": {"uid": "panel-ds"}, "targets": [
+            {"refId": "A", "rawSql": "SELECT 1"},
+            {"refId": "B", "rawSql": "SELECT 2", "datasource": {"uid": "target-ds", "type": "other"}},
+            {"refId": "C", "rawSql": "SELECT 3", "hide": True},
+        ]},
+        {"id": 2, "type": "row", "collapsed": True, "panels": [
+            {"id": 3, "title": "nested", "targets": [{"refId": "A", "rawSql": "SELECT 4"}, {"refId": "B"}]},
+        ]},
+    ]
+}
+
+
+class TestDashboards(unittest.TestCase):
+    """Tests for dashboard model helpers."""
+
+    def test_iter_panels_includes_rows(self):
+        """Test that panels inside collapsed rows are visited."""
+        self.assertEqual([panel["id"] for panel in iter_panels(DASHBOARD)], [1, 2, 3])
+
+    def test_collect_targets(self):
+        """Test target collection and datasource fallbacks."""
+        targets = collect_targets(DASHBOARD, "default-ds")
+        self.assertEqual([(t["panel_id"], t["ref_id"], t["datasource_uid"]) for t in targets], [
+            (1, "A", "panel-ds"),
+            (1, "B", "target-ds"),
+            (3, "A", "default-ds"),
+        ])
+        self.assertEqual(targets[1]["datasource_type"], "other")
+
+    def test_append_panel(self):
+        """Test that added panels get a new id and go below the others."""
+        dashboard = {"panels": [{"id": 4, "gridPos": {"x": 0, "y": 0, "w": 12, "h": 8}}, *DASHBOARD["panels"]]}
+        patched = append_panel(dashboard, {"title": "new", "gridPos": {"x": 0, "y": 0, "w": 24, "h": 8}})
+        self.assertEqual(patched["panels"][-1]["id"], 5)
+        self.assertEqual(patched["panels"][-1]["gridPos"], {"x": 0, "y": 8, "w": 24, "h": 8})
+        self.assertEqual(len(dashboard["panels"]), 3)
+
+    def test_set_target_sql_copies_only_the_path(self):
+        """Test that patching a nested query leaves the original model untouched."""
+        patched = set_target_sql(DASHBOARD, 3, "A", "SELECT 5")
+        self.assertEqual(collect_targets(patched, "ds")[-1]["raw_sql"], "SELECT 5")
+        self.assertEqual(collect_targets(DASHBOARD, "ds")[-1]["raw_sql"], "SELECT 4")
+        self.assertIs(patched["panels"][0], DASHBOARD["panels"][0])
+        with self.assertRaises(KeyError):
+            set_target_sql(DASHBOARD, 1, "Z", "SELECT 5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests for the grafana_mcp.disk_cache module."""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from grafana_mcp.cache import LRUCache, TieredCache
+from grafana_mcp.disk_cache import DiskCache
+
+
+def _write_entries(path, worker, count):
+    cache = DiskCache(path, max_bytes=1 << 20)
+    for i in range(count):
+        cache.set("query", (worker, i), {"worker": worker, "i": i}, ttl=60)
+
+
+class TestDiskCache(unittest.TestCase):
+    """Tests for the SQLite disk cache."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "cache.sqlite3")
+        self.now = 1000.0
+
+    def make_cache(self, max_bytes=1 << 20):
+        return DiskCache(self.path, max_bytes=max_bytes, clock=lambda: self.now)
+
+    def test_entries_are_shared_and_expire(self):
+        writer, reader = self.make_cache(), self.make_cache()
+        writer.set("query", ("ds", "SELECT 1", 0.0), {"results": {}}, ttl=10)
+        self.assertEqual(reader.get("query", ("ds", "SELECT 1", 0.0)), ({"results": {}}, 1010.0))
+        self.assertIsNone(reader.get("folders", ("ds", "SELECT 1", 0.0)))
+
+        self.now += 10
+        self.assertIsNone(reader.get("query", ("ds", "SELECT 1", 0.0)))
+        self.assertEqual(reader.stats()["hits"], 1)
+
+    def test_evicts_least_recently_read_within_budget(self):
+        cache = self.make_cache(max_bytes=300)
+        for i in range(3):
+            cache.set("query", i, "x" * 90, ttl=600)
+            self.now += 100
+        cache.get("query", 0)
+        cache.set("query", 3, "x" * 90, ttl=600)
+
+        self.assertIsNotNone(cache.get("query", 0))
+        self.assertIsNone(cache.get("query", 1))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (3, 276))
+
+    def test_replacing_keeps_usage_exact(self):
+        cache = self.make_cache()
+        cache.set("query", "k", "a" * 10, ttl=60)
+        cache.set("query", "k", "a" * 20, ttl=60)
+        self.assertEqual(cache.stats()["bytes"], 22)
+        cache.delete_where("query", lambda key: key == "k")
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_concurrent_processes(self):
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_write_entries, args=(self.path, worker, 50)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+        cache = DiskCache(self.path, max_bytes=1 << 20)
+        self.assertEqual(cache.stats()["entries"], 200)
+        self.assertEqual(cache.get("query", (3, 49))[0], {"worker": 3, "i": 49})
+
+
+class TestTieredCache(unittest.TestCase):
+    """Tests for the memory cache backed by the disk cache."""
+
+    def test_promotes_disk_hits_to_memory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        disk = DiskCache(os.path.join(directory, "cache.sqlite3"), max_bytes=1 << 20)
+        first = TieredCache(LRUCache(ttl=60, max_bytes=1 << 20), disk, "query")
+        second = TieredCache(LRUCache(ttl=60, max_bytes=1 << 20), disk, "query")
+
+        first.set(("ds", "sql"), {"rows": 1}, size=10)
+        self.assertEqual(second.get(("ds", "sql")), {"rows": 1})
+        self.assertEqual(second.memory.stats()["entries"], 1)
+
+        second.delete(("ds", "sql"))
+        self.assertIsNone(disk.get("query", ("ds", "sql")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for the grafana_mcp.folders module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.folders import FolderCache, split_folder_path
+
+
+class FakeFolders:
+    """In-memory stand-in for the Grafana folder API."""
+
+    def __init__(self):
+        self.folders = []
+        self.list_calls = 0
+        self.create_calls = 0
+
+    async def list_children(self, parent_uid):
+        self.list_calls += 1
+        await asyncio.sleep(0)
+        return [f for f in self.folders if f["parentUid"] == parent_uid]
+
+    async def create(self, title, parent_uid):
+        self.create_calls += 1
+        await asyncio.sleep(0.01)
+        folder = {"id": len(self.folders) + 1, "uid": f"f{len(self.folders) + 1}", "title": title,
+                  "parentUid": parent_uid}
+        self.folders.append(folder)
+        return folder
+
+
+class TestFolderCache(unittest.TestCase):
+    """Tests for the folder hierarchy cache."""
+
+    def test_split_folder_path(self):
+        """Test that empty segments and whitespace are dropped."""
+        self.assertEqual(split_folder_path(" a//b / c/"), ["a", "b", "c"])
+        self.assertEqual(split_folder_path(""), [])
+
+    def test_warm_path_makes_no_calls(self):
+        """Test that a resolved path is served from the cache."""
+        api = FakeFolders()
+        cache = FolderCache()
+
+        async def run():
+            first = await cache.resolve("a/b/c", api.list_children, api.create)
+            calls = (api.list_calls, api.create_calls)
+            second = await cache.resolve("a/b/c", api.list_children, api.create)
+            return first, second, calls
+
+        first, second, calls = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertEqual(calls, (1, 3))
+        self.assertEqual((api.list_calls, api.create_calls), (1, 3))
+
+    def test_concurrent_creates_are_deduplicated(self):
+        """Test that parallel resolves of a new path create each folder once."""
+        api = FakeFolders()
+        cache = FolderCache()
+
+        async def run():
+            return await asyncio.gather(*[cache.resolve("x/y", api.list_children, api.create) for _ in range(5)])
+
+        results = asyncio.run(run())
+        self.assertEqual(api.create_calls, 2)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_invalidate_relists_parent(self):
+        """Test that invalidating a parent forces a new listing."""
+        api = FakeFolders()
+        cache = FolderCache()
+        asyncio.run(cache.resolve("a", api.list_children, api.create))
+        cache.invalidate(None)
+        asyncio.run(cache.resolve("a", api.list_children, api.create))
+        self.assertEqual((api.list_calls, api.create_calls), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for the grafana_mcp.frames module."""
+
+import asyncio
+import json
+import unittest
+
+from grafana_mcp.frames import frame_columns, scan_frame_values, time_series_contract_errors
+from grafana_mcp.jsonstream import JSONEventParser, aiter_events
+
+RESULT = {
+    "results": {
+        "A": {
+            "frames": [{
+                "schema": {"fields": [{"name": "time", "type": "time"}, {"name": "value", "type": "number"}]},
+                "data": {"values": [[], []]},
+            }]
+        }
+    }
+}
+
+
+class TestFrames(unittest.TestCase):
+    """Tests for data frame helpers."""
+
+    def test_frame_columns(self):
+        """Test reading column names and types from the first frame."""
+        self.assertEqual(frame_columns(RESULT), [{"name": "time", "type": "time"}, {"name": "value", "type": "number"}])
+        self.assertEqual(frame_columns({"results": {"A": {}}}), [])
+
+    def test_time_series_contract(self):
+        """Test the time and numeric column requirements."""
+        self.assertEqual(time_series_contract_errors(frame_columns(RESULT)), [])
+        errors = time_series_contract_errors([{"name": "host", "type": "string"}])
+        self.assertEqual(len(errors), 2)
+
+    def scan(self, result, count, ref_ids=None, skip=True, chunk_size=7):
+        self.events = 0
+
+        async def chunks():
+            text = json.dumps(result).encode()
+            for i in range(0, len(text), chunk_size):
+                yield text[i:i + chunk_size]
+
+        async def counted(events):
+            async for event in events:
+                self.events += 1
+                yield event
+
+        parser = JSONEventParser() if skip else None
+        events = counted(aiter_events(chunks(), parser))
+        return asyncio.run(scan_frame_values(events, count=count, ref_ids=ref_ids, parser=parser))
+
+    def test_scan_frame_values(self):
+        """Test the streamed data presence check in both modes."""
+        result = {"results": {"A": {"frames": [{"data": {"values": [[], [1, 2], [3, 4]]}}]}}}
+        for skip in (False, True):
+            self.assertEqual(self.scan(result, False, skip=skip), {"A": {"has_data": True}})
+            self.assertEqual(self.scan(result, True, skip=skip), {"A": {"has_data": True, "total_datapoints": 4}})
+            self.assertEqual(self.scan(RESULT, True, skip=skip)["A"]["has_data"], False)
+
+    def test_scan_skips_values(self):
+        """Test that values after the first of each refId, or all of them when counting, emit no events."""
+        frame = {"schema": {"fields": [{"name": "time", "type": "time"}, {"name": "host", "type": "string"}]},
+                 "data": {"values": [list(range(10000)), [f"host-{i}," for i in range(10000)]]}}
+        result = {"results": {ref_id: {"status": 200, "frames": [frame, frame]} for ref_id in ("q0", "q1")}}
+        expected = {ref_id: {"has_data": True, "total_datapoints": 40000} for ref_id in result["results"]}
+        self.assertEqual(self.scan(result, True, chunk_size=4096), expected)
+        self.assertLess(self.events, 200)
+
+        ref_ids = list(result["results"])
+        has_data = {ref_id: {"has_data": True} for ref_id in ref_ids}
+        self.assertEqual(self.scan(result, False, ref_ids, chunk_size=4096), has_data)
+        self.assertLess(self.events, 100)
+        self.assertEqual(self.scan(result, False, ref_ids, skip=False, chunk_size=4096), has_data)
+        self.assertGreater(self.events, 10000)
+
+    def test_scan_multiple_refs(self):
+        """Test per-refId results and errors in a batched response."""
+        result = {"results": {
+            "q0": {"frames": [{"data": {"values": [[1], [2]]}}]},
+            "q1": {"frames": [], "error": "bad query"},
+            "q2": {"frames": [{"data": {"values": [[]]}}]},
+        }}
+        self.assertEqual(self.scan(result, False, ["q0", "q1", "q2", "q3"]), {
+            "q0": {"has_data": True},
+            "q1": {"has_data": False, "error": "bad query"},
+            "q2": {"has_data": False},
+            "q3": {"has_data": False},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
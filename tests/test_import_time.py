@@ -0,0 +1,50 @@
+"""Tests for the import-time cost of the grafana_mcp.mcp_server module."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Self time, in microseconds, of all grafana_mcp modules imported with the server
+IMPORT_BUDGET_US = 250_000
+# Only imported on first use of the tools that need them
+LAZY_MODULES = ("requests", "grafana_client", "niquests", "numpy", "httpx", "grafana_mcp.session",
+                "grafana_mcp.series")
+
+
+def _import_times(module: str):
+    """Import a module in a fresh interpreter and return {module: self time in microseconds}."""
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    """Tests that starting the server does not import more than it needs."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.times = _import_times("grafana_mcp.mcp_server")
+
+    def test_heavy_modules_are_lazy(self):
+        imported = [name for name in LAZY_MODULES if name in self.times]
+        self.assertEqual(imported, [])
+
+    def test_import_budget(self):
+        own = sum(us for name, us in self.times.items() if name.split(".")[0] == "grafana_mcp")
+        self.assertLess(own, IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tests for the grafana_mcp.jsonstream module."""
+
+import json
+import unittest
+
+from grafana_mcp.jsonstream import JSONEventParser, decode_scalar
+
+
+def parse(text: bytes, chunk_size: int):
+    """Feed ``text`` to a parser in chunks and collect the events."""
+    parser = JSONEventParser()
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[i:i + chunk_size]))
+    events.extend(parser.feed(b"", final=True))
+    return events
+
+
+class TestJSONEventParser(unittest.TestCase):
+    """Tests for the incremental JSON parser."""
+
+    DOC = {"a": [1, -2.5e3, "x\"y", "ü", None, True], "b": {"c": [[], {"d": 1}]}}
+
+    def test_chunking_does_not_change_events(self):
+        """Test that events are the same whatever the chunk boundaries."""
+        text = json.dumps(self.DOC).encode()
+        expected = parse(text, len(text))
+        for size in range(1, 12):
+            self.assertEqual(parse(text, size), expected)
+
+    def test_prefixes(self):
+        """Test ijson-style prefixes and raw scalar values."""
+        events = parse(json.dumps(self.DOC).encode(), 5)
+        scalars = [(prefix, decode_scalar(value)) for prefix, event, value in events if event == "scalar"]
+        self.assertEqual(scalars[:2], [("a.item", 1), ("a.item", -2500.0)])
+        self.assertIn(("b.c.item.d", 1), scalars)
+        self.assertIn(("b.c", "start_array", None), events)
+
+    def test_skip_counts_elements_without_events(self):
+        """Test that a skipped container emits only its end event, with the number of elements."""
+        doc = {"a": [1, "x,]\"y", [2, {"k": "}"}], {"m": [3]}, None], "b": {"c": 1, "d": [4]}}
+        text = json.dumps(doc).encode()
+        for size in (1, 3, len(text)):
+            parser = JSONEventParser()
+            events = []
+            for i in range(0, len(text) + 1, size):
+                for event in parser.feed(text[i:i + size], final=i + size > len(text)):
+                    events.append(event)
+                    if event == ("a.item", "scalar", "1") or event == ("b", "start_map", None):
+                        parser.skip()
+            self.assertEqual(events, [
+                ("", "start_map", None), ("", "map_key", "a"), ("a", "start_array", None),
+                ("a.item", "scalar", "1"), ("a", "end_array", 4),
+                ("", "map_key", "b"), ("b", "start_map", None), ("b", "end_map", 2), ("", "end_map", None),
+            ])
+
+    def test_invalid_json(self):
+        """Test that a truncated document is reported at the end."""
+        parser = JSONEventParser()
+        list(parser.feed(b'{"a": "unterminated'))
+        with self.assertRaises(ValueError):
+            list(parser.feed(b"", final=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
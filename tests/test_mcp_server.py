@@ -1,7 +1,13 @@
 """Tests for the grafana_mcp.mcp_server module."""
 
+import asyncio
 import importlib
+import os
+import time
 import unittest
+from unittest import mock
+
+import httpx
 
 
 class TestMCPServer(unittest.TestCase):
@@ -20,5 +26,259 @@ class TestMCPServer(unittest.TestCase):
         self.assertIsNotNone(module.mcp)
 
 
+class TestSaveAndShareDashboard(unittest.TestCase):
+    """Tests for creating and sharing a dashboard."""
+
+    def setUp(self):
+        self.module = importlib.import_module("grafana_mcp.mcp_server")
+        self.module._public_tokens.clear()
+        self.calls = []
+
+    def tearDown(self):
+        self.module._public_tokens.clear()
+
+    async def fake_request(self, method, path, **kwargs):
+        self.calls.append((method, path))
+        request = httpx.Request(method, "https://grafana.test" + path)
+        if path == "/api/dashboards/db":
+            return httpx.Response(200, json={"uid": "abc", "version": 1}, request=request)
+        if method == "POST":
+            return httpx.Response(200, json={"uid": "pub", "accessToken": "tok"}, request=request)
+        return httpx.Response(404, request=request)
+
+    def test_two_requests_and_cached_token(self):
+        """Saving and sharing takes two requests and later lookups take none."""
+        with mock.patch.object(self.module, "grafana_request_async", self.fake_request):
+            res = asyncio.run(self.module._save_and_share_dashboard({"dashboard": {}}, "abc", True))
+            self.assertEqual(len(self.calls), 2)
+            self.assertTrue(res["public_url"].endswith("/public-dashboards/tok"))
+
+            url = asyncio.run(self.module.get_public_dashboard_url_async("abc"))
+        self.assertEqual(url, res["public_url"])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_sharing_failure_is_reported(self):
+        """A dashboard saved but not shared reports why in the result."""
+        async def failing_share(dashboard_uid):
+            raise RuntimeError("public dashboards are disabled")
+
+        failures = self.module.metrics.SHARE_FAILURES.value()
+        with mock.patch.object(self.module, "grafana_request_async", self.fake_request), \
+                mock.patch.object(self.module, "share_dashboard_async", failing_share), \
+                self.assertLogs("grafana_mcp.mcp_server", "WARNING"):
+            res = asyncio.run(self.module._save_and_share_dashboard({"dashboard": {}}, "abc", True))
+
+        self.assertEqual(res["uid"], "abc")
+        self.assertNotIn("public_url", res)
+        self.assertIn("public dashboards are disabled", res["public_url_error"])
+        self.assertEqual(self.module.metrics.SHARE_FAILURES.value(), failures + 1)
+
+
+class TestSavePatchedDashboard(unittest.TestCase):
+    """Tests for saving patches with optimistic concurrency."""
+
+    def setUp(self):
+        self.module = importlib.import_module("grafana_mcp.mcp_server")
+        self.module.get_dashboard_cache().clear()
+        self.addCleanup(self.module.get_dashboard_cache().clear)
+        self.version = 1
+        self.saved = []
+
+    async def fake_request(self, method, path, **kwargs):
+        request = httpx.Request(method, "https://grafana.test" + path)
+        if method == "GET":
+            dashboard = {"uid": "abc", "version": self.version, "panels": [{"id": 1, "title": f"v{self.version}"}]}
+            return httpx.Response(200, json={"dashboard": dashboard, "meta": {"folderUid": "f"}}, request=request)
+        payload = kwargs["json"]
+        self.saved.append(payload)
+        if payload["dashboard"]["version"] != self.version:
+            return httpx.Response(412, json={"status": "version-mismatch"}, request=request)
+        self.version += 1
+        return httpx.Response(200, json={"uid": "abc", "version": self.version, "url": "/d/abc"}, request=request)
+
+    def test_conflict_reapplies_patch_to_new_version(self):
+        """A save conflicting with another one is retried on top of it."""
+        with mock.patch.object(self.module, "grafana_request_async", self.fake_request):
+            current = asyncio.run(self.module.get_dashboard_async("abc"))
+            self.version = 2
+            res, patched = asyncio.run(self.module._save_patched_dashboard(
+                "abc", lambda d: self.module.append_panel(d, {"title": "new"}), "Add panel", current))
+
+        self.assertEqual(res["version"], 3)
+        self.assertEqual([payload["overwrite"] for payload in self.saved], [False, False])
+        self.assertEqual([panel["title"] for panel in patched["panels"]], ["v2", "new"])
+        self.assertEqual(len(current["dashboard"]["panels"]), 1)
+
+
+class TestCreateTimeSeriesDashboards(unittest.TestCase):
+    """Tests for the bulk dashboard creation tool."""
+
+    def setUp(self):
+        self.module = importlib.import_module("grafana_mcp.mcp_server")
+        patcher = mock.patch.dict(os.environ, {"GRAFANA_POOL_SIZE": "2", "GRAFANA_DATASOURCE_UID": "ds"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.module.get_settings.cache_clear()
+        self.addCleanup(self.module.get_settings.cache_clear)
+        self.folder_calls = []
+        self.active = self.max_active = 0
+
+    async def fake_folder(self, folder):
+        self.folder_calls.append(folder)
+        await asyncio.sleep(0)
+        if folder == "missing":
+            raise RuntimeError("folder lookup failed")
+        return {"": 1, "ci": 2, "ci/jobs": 3}[folder]
+
+    async def fake_validate(self, raw_sql, datasource_uid):
+        await self.hold(0.001)
+        if "broken" in raw_sql:
+            return {"error": "Query validation failed: syntax error", "dashboard": None}, None
+        return None, None
+
+    async def fake_save(self, dashboard, dashboard_uid, make_public):
+        # Later items finish first, so results come back out of order
+        await self.hold(0.002 * (10 - int(dashboard["dashboard"]["title"].split()[-1])))
+        if dashboard["dashboard"]["title"] == "Dashboard 4":
+            raise RuntimeError("save failed")
+        return {"uid": dashboard_uid, "folderId": dashboard["folderId"]}
+
+    async def hold(self, seconds):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.active -= 1
+
+    def create(self, specs):
+        with mock.patch.object(self.module, "get_or_create_folder_async", self.fake_folder), \
+                mock.patch.object(self.module, "_validate_time_series_query", self.fake_validate), \
+                mock.patch.object(self.module, "_save_and_share_dashboard", self.fake_save):
+            return asyncio.run(self.module.create_time_series_dashboards(specs))
+
+    def test_failures_are_per_item_and_results_in_order(self):
+        folders = ["ci", "", "ci/jobs", "ci", "missing", "ci/jobs", "", "ci"]
+        specs = [{"title": f"Dashboard {i}", "raw_sql": "SELECT now() AS time, 1 AS value", "folder": folder}
+                 for i, folder in enumerate(folders)]
+        specs[2]["raw_sql"] = "SELECT broken"
+        specs.append({"title": "No SQL"})
+
+        res = self.create(specs)
+
+        self.assertEqual([r["index"] for r in res["results"]], list(range(len(specs))))
+        self.assertEqual([r["status"] for r in res["results"]],
+                         ["success", "success", "error", "success", "error", "success", "success", "success", "error"])
+        self.assertEqual((res["succeeded"], res["failed"]), (6, 3))
+        self.assertIn("syntax error", res["results"][2]["error"])
+        self.assertEqual(res["results"][4]["error"], "folder lookup failed")
+        self.assertEqual([r.get("folderId") for r in res["results"] if r["status"] == "success"], [2, 1, 2, 3, 1, 2])
+        # Each distinct folder path is resolved once
+        self.assertEqual(sorted(self.folder_calls), ["", "ci", "ci/jobs", "missing"])
+        # Validations and saves hold one of GRAFANA_POOL_SIZE slots
+        self.assertEqual(self.max_active, 2)
+
+    def test_failing_save_does_not_abort_the_batch(self):
+        specs = [{"title": f"Dashboard {i}", "raw_sql": "SELECT now() AS time, 1 AS value"} for i in range(3, 7)]
+
+        res = self.create(specs)
+
+        self.assertEqual([r["status"] for r in res["results"]], ["success", "error", "success", "success"])
+        self.assertEqual(res["results"][1]["error"], "save failed")
+        self.assertEqual(self.folder_calls, [""])
+
+    def test_folders_are_not_resolved_for_invalid_items(self):
+        specs = [{"title": f"Dashboard {i}", "raw_sql": "SELECT broken", "folder": folder}
+                 for i, folder in enumerate(["ci", "ci/jobs", ""])]
+        specs.append({"title": "No SQL", "folder": "missing"})
+
+        res = self.create(specs)
+
+        self.assertEqual((res["succeeded"], res["failed"]), (0, 4))
+        self.assertEqual(self.folder_calls, [])
+
+
+class TestCheckDashboardHasData(unittest.TestCase):
+    """Tests for the dashboard data check under a query budget."""
+
+    def setUp(self):
+        self.module = importlib.import_module("grafana_mcp.mcp_server")
+        patcher = mock.patch.dict(os.environ, {"GRAFANA_API_TOKEN": "secret", "GRAFANA_DATASOURCE_UID": "ds"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.module.get_settings.cache_clear()
+        self.addCleanup(self.module.get_settings.cache_clear)
+        self.ranges = []
+
+    async def fake_dashboard(self, dashboard_uid):
+        panels = [
+            {"id": 1, "title": "Jobs", "targets": [{"refId": "A", "rawSql": "SELECT small"},
+                                                   {"refId": "B", "rawSql": "SELECT huge"}]},
+            {"id": 2, "title": "Queue", "targets": [{"refId": "A", "rawSql": "SELECT large"}]},
+        ]
+        return {"dashboard": {"uid": dashboard_uid, "time": {"from": "now-30d", "to": "now"}, "panels": panels}}
+
+    async def fake_plan(self, raw_sql, datasource_uid, time_from, time_to, narrow=True):
+        if raw_sql == "SELECT huge":
+            raise self.module.QueryBudgetError("Query would read about 10 rows, over the budget of 1.", {"rows": 10})
+        if raw_sql == "SELECT large":
+            return {"rows": 1, "time_from": "1000", "time_to": "2000",
+                    "narrowed_from": {"time_from": time_from, "time_to": time_to, "rows": 5, "bytes": 0}}
+        return {"rows": 1, "time_from": time_from, "time_to": time_to}
+
+    async def fake_has_data(self, queries, time_from, time_to, count_datapoints=False):
+        self.ranges.append(([query["rawSql"] for query in queries], time_from, time_to))
+        return {query["refId"]: {"has_data": True} for query in queries}
+
+    def test_rejected_and_narrowed_targets_are_reported_per_panel(self):
+        with mock.patch.object(self.module, "get_dashboard_async", self.fake_dashboard), \
+                mock.patch.object(self.module, "_plan_query", self.fake_plan), \
+                mock.patch.object(self.module, "queries_have_data_async", self.fake_has_data):
+            report = asyncio.run(self.module._check_dashboard_has_data("dash", False))
+
+        # The rejected query is not run, and the narrowed one runs over its own range
+        self.assertEqual(sorted(self.ranges), [(["SELECT large"], "1000", "2000"),
+                                               (["SELECT small"], "now-30d", "now")])
+        jobs, queue = report["panels"]
+        self.assertEqual((jobs["rejected"], "narrowed" in jobs), (["B"], False))
+        self.assertEqual((queue["narrowed"], "rejected" in queue), (["A"], False))
+        self.assertEqual([t["has_data"] for t in jobs["targets"]], [True, False])
+        self.assertIn("over the budget", jobs["targets"][1]["error"])
+        self.assertEqual(queue["targets"][0]["cost"]["narrowed_from"]["rows"], 5)
+        self.assertTrue(report["has_data"])
+
+
+class TestReadiness(unittest.TestCase):
+    """Tests for the startup warmup of the ASGI app."""
+
+    def setUp(self):
+        self.module = importlib.import_module("grafana_mcp.mcp_server")
+        self.calls = 0
+
+    def steps(self):
+        async def step():
+            self.calls += 1
+            await asyncio.sleep(0.01)
+
+        return {name: step for name in self.module.WARMUP_REQUIRED}
+
+    def test_ready_without_an_mcp_session(self):
+        from starlette.testclient import TestClient
+
+        with mock.patch.object(self.module, "_warmup_steps", self.steps), \
+                mock.patch.object(self.module, "get_template_registry"):
+            with TestClient(self.module.create_app()) as client:
+                for _ in range(100):
+                    response = client.get("/ready")
+                    if response.status_code == 200:
+                        break
+                    time.sleep(0.01)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["state"], "ready")
+        # Each step ran once
+        self.assertEqual(self.calls, len(self.module.WARMUP_REQUIRED))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for the grafana_mcp.metrics module."""
+
+import unittest
+
+from grafana_mcp.metrics import Counter, Histogram, cache_families, endpoint_template, render, span
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    """Tests for endpoint_template."""
+
+    def test_replaces_uids(self):
+        self.assertEqual(endpoint_template("/api/dashboards/uid/abc-123"), "/api/dashboards/uid/{uid}")
+        self.assertEqual(endpoint_template("/api/dashboards/uid/abc/public-dashboards/"),
+                         "/api/dashboards/uid/{uid}/public-dashboards")
+
+    def test_drops_query_string(self):
+        self.assertEqual(endpoint_template("/api/folders?parentUid=x"), "/api/folders")
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests for Counter and Histogram."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("tool",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "a")
+
+        name, kind, _, samples = histogram.collect()
+        buckets = [(labels["le"], value) for suffix, labels, value in samples if suffix == "_bucket"]
+        self.assertEqual(kind, "histogram")
+        self.assertEqual(buckets, [("0.1", 1), ("1", 3), ("+Inf", 4)])
+        self.assertIn(("_count", {"tool": "a"}, 4), samples)
+        self.assertEqual(histogram.count("a"), 4)
+
+    def test_counter(self):
+        counter = Counter("retries", "Retries.", ("endpoint",))
+        counter.inc("/api/folders")
+        counter.inc("/api/folders", amount=2)
+        self.assertEqual(counter.value("/api/folders"), 3)
+        self.assertEqual(counter.collect()[3], [("_total", {"endpoint": "/api/folders"}, 3)])
+
+    def test_render_includes_cache_families(self):
+        families = cache_families({"query": {"hits": 3, "misses": 1}})
+        self.assertEqual(families[0][3], [("_total", {"cache": "query"}, 3)])
+        text = render()
+        self.assertIn("# TYPE grafana_mcp_tool_duration_seconds histogram", text)
+        self.assertIn("# TYPE grafana_mcp_upstream_retries counter", text)
+
+    def test_span_is_noop_when_disabled(self):
+        with span("test", attribute=None) as current:
+            self.assertIsNone(current)
+
+
+if __name__ == "__main__":
+    unittest.main()
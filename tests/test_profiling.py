@@ -0,0 +1,55 @@
+"""Tests for the grafana_mcp.profiling module."""
+
+import asyncio
+import time
+import unittest
+
+from grafana_mcp.profiling import ToolProfiler, record_wait
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+class TestToolProfiler(unittest.TestCase):
+    """Tests for the tool call profiler."""
+
+    def test_samples_cpu_and_records_waits(self):
+        profiler = ToolProfiler(sample_rate=1.0, interval=0.002)
+
+        async def work():
+            busy(0.1)
+
+        async def call():
+            with profiler.profile("run_query"):
+                await asyncio.sleep(0.01)
+                record_wait("upstream", 0.01)
+                # CPU used in a child task counts for the call
+                await asyncio.ensure_future(work())
+
+        asyncio.run(call())
+        summary = profiler.slowest("run_query")[0]
+        self.assertEqual(summary["wait_seconds"], {"upstream": 0.01})
+        self.assertGreater(summary["samples"], 0)
+        self.assertIn("tests", summary["cpu_seconds_by_package"])
+        lines = profiler.collapsed().splitlines()
+        self.assertTrue(any(line.startswith("run_query;") and ":busy " in line for line in lines))
+        self.assertEqual(profiler.stats()["active"], 0)
+
+    def test_keeps_the_slowest_calls(self):
+        now = [0.0]
+        profiler = ToolProfiler(sample_rate=1.0, keep=2, clock=lambda: now[0])
+        for duration in (3, 1, 2, 5):
+            with profiler.profile("check_dashboard_data"):
+                now[0] += duration
+        self.assertEqual([call["wall_seconds"] for call in profiler.slowest()], [5, 3])
+        self.assertEqual(profiler.stats()["profiled"], 4)
+
+        profiler.configure(sample_rate=0)
+        self.assertFalse(profiler.should_profile())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests for the grafana_mcp.schema module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.schema import SchemaCatalog
+
+
+class FakeClickHouse:
+    """In-memory stand-in for system.tables and system.columns."""
+
+    def __init__(self):
+        self.tables = {
+            ("default", "workflow_job"): ("1", ["id", "started_at", "conclusion", "runner_name"]),
+            ("default", "push"): ("1", ["head_commit", "created_at"]),
+            ("metrics", "load"): ("1", ["time", "load_1m"]),
+        }
+        self.queries = []
+
+    async def run_sql(self, sql):
+        self.queries.append(sql)
+        await asyncio.sleep(0)
+        if "system.tables" in sql:
+            return [{"database": db, "name": name, "engine": "MergeTree", "modified": modified}
+                    for (db, name), (modified, _) in self.tables.items()]
+        return [{"database": db, "table": name, "name": column, "type": "String", "comment": ""}
+                for (db, name), (_, columns) in self.tables.items() if f"'{name}'" in sql
+                for column in columns]
+
+
+class TestSchemaCatalog(unittest.TestCase):
+    """Tests for the schema catalog."""
+
+    def setUp(self):
+        self.clickhouse = FakeClickHouse()
+        self.now = 0.0
+        self.catalog = SchemaCatalog(ttl=60, clock=lambda: self.now)
+
+    def test_lists_and_searches_from_memory(self):
+        asyncio.run(self.catalog.ensure_fresh(self.clickhouse.run_sql))
+        queries = len(self.clickhouse.queries)
+
+        tables = self.catalog.list_tables(database="default")
+        self.assertEqual([t["table"] for t in tables], ["push", "workflow_job"])
+        self.assertEqual(tables[1]["columns"], 4)
+
+        columns = self.catalog.search_columns("created")
+        self.assertEqual(columns[0]["column"], "created_at")
+        self.assertEqual(columns[0]["score"], 0.9)
+
+        asyncio.run(self.catalog.ensure_fresh(self.clickhouse.run_sql))
+        self.assertEqual(len(self.clickhouse.queries), queries)
+
+    def test_fuzzy_match(self):
+        asyncio.run(self.catalog.refresh(self.clickhouse.run_sql))
+        columns = self.catalog.search_columns("conclusoin")
+        self.assertEqual(columns[0]["column"], "conclusion")
+        self.assertLess(columns[0]["score"], 0.8)
+
+    def test_filters_apply_before_fuzzy_fallback(self):
+        asyncio.run(self.catalog.refresh(self.clickhouse.run_sql))
+        # created_at of another table fills the limit before filtering, but is not in this table
+        columns = self.catalog.search_columns("created_at", database="default", table="workflow_job", limit=1)
+        self.assertEqual([c["column"] for c in columns], ["started_at"])
+        self.assertEqual(self.catalog.search_columns("load", database="metrics")[0]["column"], "load_1m")
+        self.assertEqual([c["column"] for c in self.catalog.search_columns("", table="push")],
+                         ["created_at", "head_commit"])
+
+    def test_refresh_fetches_only_changed_tables(self):
+        asyncio.run(self.catalog.refresh(self.clickhouse.run_sql))
+        self.clickhouse.tables[("metrics", "load")] = ("2", ["time", "load_1m", "load_5m"])
+        del self.clickhouse.tables[("default", "push")]
+        self.clickhouse.queries.clear()
+
+        result = asyncio.run(self.catalog.refresh(self.clickhouse.run_sql))
+
+        self.assertEqual(result, {"fetched": 1, "removed": 1, "total": 2})
+        self.assertIn("'load'", self.clickhouse.queries[1])
+        self.assertNotIn("'workflow_job'", self.clickhouse.queries[1])
+        self.assertEqual(self.catalog.search_columns("load_5m")[0]["table"], "load")
+        self.assertEqual(self.catalog.search_columns("head_commit"), [])
+
+    def test_expired_catalog_refreshes_in_background(self):
+        async def run():
+            await self.catalog.ensure_fresh(self.clickhouse.run_sql)
+            self.now = 120.0
+            self.clickhouse.queries.clear()
+            await self.catalog.ensure_fresh(self.clickhouse.run_sql)
+            self.assertEqual(self.clickhouse.queries, [])
+            await self.catalog._background
+
+        asyncio.run(run())
+        self.assertEqual(len(self.clickhouse.queries), 1)
+        self.assertTrue(self.catalog.is_fresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
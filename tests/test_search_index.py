@@ -0,0 +1,134 @@
+"""Tests for the grafana_mcp.search_index module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.search_index import DashboardIndex
+
+
+def _dashboard(uid, title, sql, tags=(), version=1):
+    return {
+        "dashboard": {"uid": uid, "title": title, "tags": list(tags), "version": version,
+                      "panels": [{"id": 1, "title": f"{title} panel", "targets": [{"refId": "A", "rawSql": sql}]}]},
+        "meta": {"folderTitle": "CI", "folderUid": "ci", "url": f"/d/{uid}"},
+    }
+
+
+class FakeGrafana:
+    """In-memory stand-in for /api/search and /api/dashboards/uid."""
+
+    def __init__(self):
+        self.dashboards = {
+            "a": _dashboard("a", "Queue time", "SELECT time, avg(q) FROM default.workflow_job", tags=["ci"]),
+            "b": _dashboard("b", "Disk usage", "SELECT time, max(used) FROM metrics.disk"),
+            "c": _dashboard("c", "Job duration", "SELECT time, d FROM workflow_job j JOIN push p ON 1"),
+        }
+        self.fetched = []
+        self.version_requests = []
+        self.active = self.max_active = 0
+
+    async def list_dashboards(self):
+        # Like Grafana's /api/search, hits carry no version
+        return [{"uid": uid, "title": d["dashboard"]["title"], "tags": d["dashboard"]["tags"],
+                 "folderUid": "ci", "folderTitle": "CI"} for uid, d in self.dashboards.items()]
+
+    async def fetch(self, uid):
+        self.fetched.append(uid)
+        await asyncio.sleep(0)
+        return self.dashboards[uid]
+
+    async def latest_version(self, uid):
+        self.version_requests.append(uid)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        return self.dashboards[uid]["dashboard"]["version"]
+
+
+class TestDashboardIndex(unittest.TestCase):
+    """Tests for the dashboard search index."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.grafana = FakeGrafana()
+        self.index = DashboardIndex(max_age=3600, clock=lambda: self.now)
+        self.sync()
+
+    def sync(self):
+        return asyncio.run(self.index.sync(self.grafana.list_dashboards, self.grafana.fetch,
+                                           self.grafana.latest_version))
+
+    def uids(self, *args, **kwargs):
+        return [doc["uid"] for doc in self.index.search(*args, **kwargs)]
+
+    def test_full_text_ranks_titles_first(self):
+        self.assertEqual(self.uids("queue"), ["a"])
+        self.assertEqual(self.uids("time"), ["a", "c", "b"])
+        self.assertEqual(self.uids("disk us"), ["b"])
+        self.assertEqual(self.uids("queue disk"), [])
+
+    def test_table_and_tag_lookup(self):
+        self.assertEqual(sorted(self.uids(table="workflow_job")), ["a", "c"])
+        self.assertEqual(self.uids(table="default.workflow_job"), ["a"])
+        self.assertEqual(self.uids("duration", table="workflow_job"), ["c"])
+        self.assertEqual(self.uids(tag="ci"), ["a"])
+
+    def test_sync_fetches_only_changed_dashboards(self):
+        self.grafana.fetched.clear()
+        self.grafana.dashboards["b"] = _dashboard("b", "Disk free", "SELECT time, free FROM metrics.disk", version=2)
+        del self.grafana.dashboards["c"]
+
+        result = self.sync()
+
+        self.assertEqual(result, {"fetched": 1, "revalidated": 1, "removed": 1, "total": 2})
+        self.assertEqual(self.grafana.fetched, ["b"])
+        self.assertEqual(self.uids("free"), ["b"])
+        self.assertEqual(self.uids("usage"), [])
+        self.assertEqual(self.uids(table="push"), [])
+
+    def test_sync_revalidates_edits_the_search_hit_does_not_show(self):
+        self.grafana.fetched.clear()
+        # Only the SQL changed, so the search hit is the same
+        self.grafana.dashboards["b"] = _dashboard("b", "Disk usage", "SELECT time, used FROM metrics.volume", version=2)
+
+        result = self.sync()
+
+        self.assertEqual((result["fetched"], result["revalidated"]), (1, 3))
+        self.assertEqual(self.grafana.fetched, ["b"])
+        self.assertEqual(self.uids(table="volume"), ["b"])
+        self.assertEqual(self.uids(table="disk"), [])
+
+    def test_clear_forgets_all_dashboards(self):
+        self.index.clear()
+        self.assertEqual((len(self.index), self.uids("queue"), self.index.is_fresh()), (0, [], False))
+        self.sync()
+        self.assertEqual(self.uids("queue"), ["a"])
+
+    def test_sync_refetches_after_max_age(self):
+        self.grafana.fetched.clear()
+        self.now = 3600.0
+        asyncio.run(self.index.sync(self.grafana.list_dashboards, self.grafana.fetch))
+        self.assertEqual(sorted(self.grafana.fetched), ["a", "b", "c"])
+
+    def test_sync_revalidates_a_bounded_number_of_dashboards(self):
+        self.grafana.dashboards = {f"d{i}": _dashboard(f"d{i}", f"Dashboard {i}", "SELECT 1 FROM t")
+                                   for i in range(1000)}
+        self.index = DashboardIndex(max_age=3600, revalidations=50, clock=lambda: self.now)
+        self.sync()
+        self.assertEqual(self.grafana.version_requests, [])
+
+        checked = set()
+        for _ in range(3):
+            self.now += 300
+            self.grafana.version_requests.clear()
+            result = self.sync()
+            self.assertEqual((result["revalidated"], len(self.grafana.version_requests)), (50, 50))
+            # The least recently checked dashboards go first, so each sync checks new ones
+            self.assertFalse(checked & set(self.grafana.version_requests))
+            checked.update(self.grafana.version_requests)
+        self.assertLessEqual(self.grafana.max_active, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
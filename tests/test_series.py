@@ -0,0 +1,85 @@
+"""Tests for the grafana_mcp.series module."""
+
+import unittest
+
+import numpy as np
+
+from grafana_mcp.series import lttb_indices, minmax_indices, summarize, summarize_query_result
+
+
+def _frame(fields, values):
+    return {"schema": {"fields": fields}, "data": {"values": values}}
+
+
+class TestDownsampling(unittest.TestCase):
+    """Tests for the downsampling functions."""
+
+    def test_lttb_keeps_ends_and_peak(self):
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[437] = 100.0
+        indices = lttb_indices(x, y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertIn(437, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_lttb_short_series_is_unchanged(self):
+        self.assertEqual(lttb_indices(np.arange(5.0), np.arange(5.0), 10).tolist(), [0, 1, 2, 3, 4])
+
+    def test_minmax_keeps_bucket_extremes(self):
+        y = np.sin(np.linspace(0, 20, 1001))
+        indices = minmax_indices(y, 100)
+        self.assertLessEqual(len(indices), 100)
+        self.assertIn(int(np.argmax(y)), indices)
+        self.assertIn(int(np.argmin(y)), indices)
+
+
+class TestSummaries(unittest.TestCase):
+    """Tests for summarize and summarize_query_result."""
+
+    def test_summarize_counts_nulls(self):
+        stats = summarize(np.array([1.0, np.nan, 3.0]))
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["nulls"], 1)
+        self.assertEqual(stats["mean"], 2.0)
+        self.assertEqual(stats["p50"], 2.0)
+
+    def test_long_frame_is_split_by_label(self):
+        rows = 10000
+        time = [1_700_000_000_000 + i * 1000 for i in range(rows)]
+        frame = _frame(
+            [{"name": "time", "type": "time"}, {"name": "host", "type": "string"}, {"name": "load", "type": "number"}],
+            [time, ["a" if i % 2 else "b" for i in range(rows)], [float(i) for i in range(rows)]],
+        )
+        result = summarize_query_result({"results": {"A": {"frames": [frame]}}}, max_points=100)
+
+        self.assertEqual(result["row_count"], rows)
+        self.assertEqual(result["series_count"], 2)
+        self.assertEqual(sorted(s["labels"]["host"] for s in result["series"]), ["a", "b"])
+        for series in result["series"]:
+            self.assertEqual(series["points"], 100)
+            self.assertEqual(len(series["time"]), len(series["values"]))
+            self.assertEqual(series["stats"]["count"], rows // 2)
+
+    def test_table_frame_is_truncated(self):
+        frame = _frame([{"name": "name", "type": "string"}, {"name": "n", "type": "number"}],
+                       [["x", "y", "z"], [1, None, 3]])
+        result = summarize_query_result({"results": {"A": {"frames": [frame]}}}, max_points=2)
+
+        table = result["tables"][0]
+        self.assertTrue(table["truncated"])
+        self.assertEqual(table["columns"][0]["values"], ["x", "y"])
+        self.assertEqual(table["columns"][1]["stats"]["nulls"], 1)
+
+    def test_series_are_limited(self):
+        fields = [{"name": "time", "type": "time"}] + [{"name": f"v{i}", "type": "number"} for i in range(5)]
+        frame = _frame(fields, [[1, 2]] + [[1.0, 2.0]] * 5)
+        result = summarize_query_result({"results": {"A": {"frames": [frame]}}}, max_series=3)
+        self.assertEqual(len(result["series"]), 3)
+        self.assertTrue(result["series_truncated"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for the grafana_mcp.sql module."""
+
+import unittest
+
+from grafana_mcp.sql import (BUCKETS, ROWS, explain_sql, is_range_decomposable, normalize_sql, range_decomposition,
+                             schema_probe_sql)
+
+
+class TestNormalizeSQL(unittest.TestCase):
+    """Tests for SQL normalization."""
+
+    def test_whitespace_and_comments(self):
+        """Test that formatting differences normalize to the same query."""
+        a = "SELECT count() AS v\n  FROM t -- trailing\nWHERE $__timeFilter(ts)"
+        b = "SELECT count() AS v /* block */ FROM t\tWHERE $__timeFilter(ts)"
+        self.assertEqual(normalize_sql(a), "SELECT count() AS v FROM t WHERE $__timeFilter(ts)")
+        self.assertEqual(normalize_sql(a), normalize_sql(b))
+
+    def test_literals_are_preserved(self):
+        """Test that whitespace and comment markers inside literals are kept."""
+        sql = "SELECT 'a  -- b', \"x  y\" FROM t WHERE s = 'it''s  /* here */'"
+        self.assertEqual(normalize_sql(sql), sql)
+
+    def test_probe_wrappers(self):
+        """Test that probes drop trailing semicolons and survive trailing comments."""
+        sql = "SELECT 1 AS v -- note\n;"
+        self.assertEqual(schema_probe_sql(sql), "SELECT * FROM (\nSELECT 1 AS v -- note\n) LIMIT 0")
+        self.assertEqual(explain_sql(sql), "EXPLAIN\nSELECT 1 AS v -- note")
+
+
+class TestRangeDecomposable(unittest.TestCase):
+    """Tests for is_range_decomposable."""
+
+    def test_time_filtered_queries(self):
+        for sql in (
+            "SELECT ts AS time, v FROM t WHERE $__timeFilter(ts) ORDER BY ts",
+            "SELECT toStartOfHour(ts) AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY time ORDER BY time",
+            "SELECT toStartOfInterval(`ts`, INTERVAL 5 minute) AS t, name, max(v) FROM db.t "
+            "WHERE $__timeFilter(`ts`) GROUP BY 1, name;",
+        ):
+            self.assertTrue(is_range_decomposable(sql), sql)
+        self.assertFalse(is_range_decomposable("SELECT count() FROM t"))
+
+    def test_decomposition_kind(self):
+        self.assertEqual(range_decomposition("SELECT * FROM t WHERE $__timeFilter(ts)"), ROWS)
+        self.assertEqual(range_decomposition(
+            "SELECT $__timeGroup(ts, '1h') AS time, sum(v) FROM t WHERE $__timeFilter(ts) GROUP BY time"), BUCKETS)
+        self.assertEqual(range_decomposition(
+            "SELECT toStartOfHour(ts) AS time, count() FROM t WHERE $__timeFilter(ts) "
+            "GROUP BY toStartOfHour( ts ) ORDER BY time"), BUCKETS)
+
+    def test_aggregates_not_grouped_by_time_bucket(self):
+        for sql in (
+            # Counts per name over the whole range: slices would be counted separately
+            "SELECT name, max(ts) AS time, count() AS jobs FROM t WHERE $__timeFilter(ts) GROUP BY name",
+            "SELECT max(ts) AS time, count() FROM t WHERE $__timeFilter(ts)",
+            "SELECT DISTINCT name FROM t WHERE $__timeFilter(ts)",
+            "SELECT toStartOfHour(other) AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY time",
+            # Buckets labelled by their end or by their latest row
+            "SELECT toStartOfHour(ts) + INTERVAL 1 HOUR AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY time",
+            "SELECT toStartOfHour(ts) + INTERVAL 1 HOUR AS time, count() FROM t WHERE $__timeFilter(ts) "
+            "GROUP BY toStartOfHour(ts)",
+            "SELECT max(ts) AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY toStartOfHour(ts)",
+            "SELECT toStartOfHour(ts) AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY toStartOfDay(ts)",
+            # Raw rows labelled with a shifted timestamp
+            "SELECT ts + 60 AS time, v FROM t WHERE $__timeFilter(ts)",
+            "SELECT ts, n FROM t JOIN (SELECT name, count() AS n FROM t WHERE $__timeFilter(ts) GROUP BY name) "
+            "USING name WHERE $__timeFilter(ts)",
+        ):
+            self.assertFalse(is_range_decomposable(sql), sql)
+
+    def test_range_dependent_constructs(self):
+        for sql in (
+            "SELECT ts, v FROM t WHERE $__timeFilter(ts) ORDER BY ts DESC LIMIT 10",
+            "SELECT $__timeInterval(ts) AS time, count() FROM t WHERE $__timeFilter(ts) GROUP BY time",
+            "SELECT ts, sum(v) OVER (ORDER BY ts) FROM t WHERE $__timeFilter(ts)",
+            "SELECT ts, v / ($__toTime - $__fromTime) FROM t WHERE $__timeFilter(ts)",
+        ):
+            self.assertFalse(is_range_decomposable(sql), sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Tests for the grafana_mcp.templates module."""
+
+import copy
+import unittest
+
+from grafana_mcp.templates import DashboardTemplate, get_template_registry
+
+
+class TestTemplates(unittest.TestCase):
+    """Tests for the dashboard template registry."""
+
+    def test_build_leaves_template_untouched(self):
+        """Test that building copies only the changed path."""
+        template = get_template_registry().get()
+        original = copy.deepcopy(template.payload)
+        payload = template.build("uid-1", "Title", "SELECT 1", "ds", description="desc", folder_id=7)
+
+        self.assertEqual(template.payload, original)
+        panel = payload["dashboard"]["panels"][0]
+        self.assertEqual(payload["folderId"], 7)
+        self.assertEqual(payload["dashboard"]["uid"], "uid-1")
+        self.assertEqual(panel["title"], "Title")
+        self.assertEqual(panel["targets"][0]["rawSql"], "SELECT 1")
+        self.assertEqual(panel["targets"][0]["datasource"]["uid"], "ds")
+        self.assertEqual(panel["datasource"]["uid"], "ds")
+        self.assertIs(panel["fieldConfig"], template.payload["dashboard"]["panels"][0]["fieldConfig"])
+
+    def test_registry(self):
+        """Test that templates are loaded once and unknown names fail."""
+        registry = get_template_registry()
+        self.assertIs(registry.get(), registry.get("timeseries"))
+        with self.assertRaises(KeyError):
+            registry.get("missing")
+
+    def test_invalid_template(self):
+        """Test that templates without a panel query are rejected."""
+        with self.assertRaises(ValueError):
+            DashboardTemplate("broken", {"dashboard": {"panels": []}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Tests for the grafana_mcp.timerange module."""
+
+import unittest
+
+from grafana_mcp.timerange import resolve_range, resolve_time
+
+NOW = 1_700_000_000.0
+
+
+class TestTimeRange(unittest.TestCase):
+    """Tests for time range resolution."""
+
+    def test_relative(self):
+        """Test now-relative expressions with offsets and rounding."""
+        self.assertEqual(resolve_time("now", NOW), NOW)
+        self.assertEqual(resolve_time("now-30d", NOW), NOW - 30 * 86400)
+        self.assertEqual(resolve_time("now-1h+5m", NOW), NOW - 3300)
+        self.assertEqual(resolve_time("now/d", NOW) % 86400, 0)
+
+    def test_absolute(self):
+        """Test epoch milliseconds and ISO timestamps."""
+        self.assertEqual(resolve_time("1700000000000"), NOW)
+        self.assertEqual(resolve_time("2023-11-14T22:13:20Z"), NOW)
+
+    def test_bucketed_range(self):
+        """Test that nearby reference times share a bucket."""
+        first = resolve_range("now-30d", "now", now=NOW + 1, bucket_seconds=60)
+        second = resolve_range("now-30d", "now", now=NOW + 2, bucket_seconds=60)
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for the grafana_mcp.timeseries_cache module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.timeseries_cache import TimeSeriesCache
+
+HOUR = 3600
+
+
+class FakeDatasource:
+    """Per-minute data, optionally summed per hour like ``GROUP BY toStartOfHour(ts)``."""
+
+    def __init__(self, bucket=60, with_time=True, since=0):
+        self.bucket = bucket
+        self.with_time = with_time
+        self.since = since
+        self.calls = []
+
+    async def fetch(self, start, end):
+        self.calls.append((start, end))
+        buckets = {}
+        for minute in range(int(start) - int(start) % 60, int(end) + 1, 60):
+            if start <= minute <= end and minute >= self.since:
+                key = minute - minute % self.bucket
+                buckets[key] = buckets.get(key, 0) + minute // 60 % 7
+        times = sorted(buckets)
+        fields = [{"name": "value", "type": "number"}]
+        values = [[buckets[t] for t in times]]
+        if self.with_time:
+            fields.insert(0, {"name": "time", "type": "time"})
+            values.insert(0, [t * 1000 for t in times])
+        frame = {"schema": {"refId": "A", "fields": fields}, "data": {"values": values}}
+        return {"results": {"A": {"status": 200, "frames": [frame]}}}, 1000
+
+
+def _values(result):
+    return result["results"]["A"]["frames"][0]["data"]["values"]
+
+
+class TestTimeSeriesCache(unittest.TestCase):
+    """Tests for the delta-fetching cache."""
+
+    def setUp(self):
+        self.now = 100 * 86400.0
+        self.cache = TimeSeriesCache(max_bytes=1 << 20, max_age=3600, overlap=120, clock=lambda: self.now)
+
+    def get(self, datasource, start, end, key="key"):
+        bucketed = datasource.bucket > 60
+        return asyncio.run(self.cache.get(key, start, end, datasource.fetch, bucketed=bucketed))[0]
+
+    def test_fetches_only_the_tail_of_a_moved_range(self):
+        datasource = FakeDatasource()
+        self.get(datasource, self.now - 86400, self.now)
+        self.now += 600
+        result = self.get(datasource, self.now - 86400, self.now)
+
+        self.assertEqual(len(datasource.calls), 2)
+        tail_start, tail_end = datasource.calls[1]
+        self.assertEqual(tail_end, self.now)
+        self.assertLessEqual(tail_end - tail_start, 600 + 120)
+        expected, _ = asyncio.run(FakeDatasource().fetch(self.now - 86400, self.now))
+        self.assertEqual(_values(result), _values(expected))
+        self.assertEqual(self.cache.stats()["delta_fetches"], 1)
+
+    def test_recomputes_the_last_time_bucket(self):
+        datasource = FakeDatasource(bucket=HOUR)
+        self.get(datasource, self.now - 86400 + 1800, self.now + 1800)
+        self.now += 1200
+        result = self.get(datasource, self.now - 86400 + 1800, self.now + 1800)
+
+        expected, _ = asyncio.run(FakeDatasource(bucket=HOUR).fetch(self.now - 86400 + 1800, self.now + 1800))
+        self.assertEqual(_values(result), _values(expected))
+        self.assertEqual(len(datasource.calls), 3)
+
+    def test_recomputes_the_bucket_of_a_moved_start_after_an_empty_bucket(self):
+        # No rows before 03:50, so the 02:00 bucket holding the original start is empty
+        day = self.now
+        datasource = FakeDatasource(bucket=HOUR, since=day + 3 * HOUR + 3000)
+        self.now = day + 6 * HOUR
+        self.get(datasource, day + 2 * HOUR + 3000, self.now)
+        self.now += 1200
+        result = self.get(datasource, day + 3 * HOUR + 600, self.now)
+
+        expected, _ = asyncio.run(
+            FakeDatasource(bucket=HOUR, since=day + 3 * HOUR + 3000).fetch(day + 3 * HOUR + 600, self.now))
+        self.assertEqual(_values(result), _values(expected))
+        self.assertEqual(_values(result)[0][0], (day + 3 * HOUR) * 1000)
+
+    def test_covered_range_is_served_from_memory(self):
+        datasource = FakeDatasource()
+        self.get(datasource, self.now - 3600, self.now)
+        result = self.get(datasource, self.now - 1800, self.now - 600)
+        self.assertEqual(len(datasource.calls), 1)
+        self.assertEqual(len(_values(result)[0]), 21)
+
+        self.cache.clear()
+        self.get(datasource, self.now - 1800, self.now - 600)
+        self.assertEqual(len(datasource.calls), 2)
+
+    def test_entries_expire_and_frames_without_time_are_not_kept(self):
+        datasource = FakeDatasource()
+        self.get(datasource, self.now - 3600, self.now)
+        self.now += 3600
+        self.get(datasource, self.now - 3600, self.now)
+        self.assertEqual(self.cache.stats()["full_fetches"], 2)
+
+        table = FakeDatasource(with_time=False)
+        self.get(table, self.now - 3600, self.now, key="table")
+        self.get(table, self.now - 3600, self.now, key="table")
+        self.assertEqual(len(table.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests for the grafana_mcp.warmup module."""
+
+import asyncio
+import unittest
+
+from grafana_mcp.warmup import Warmup
+
+
+class TestWarmup(unittest.TestCase):
+    """Tests for the startup warmup."""
+
+    def setUp(self):
+        self.calls = {"token": 0, "folders": 0}
+
+    async def token(self):
+        self.calls["token"] += 1
+        if self.calls["token"] < 3:
+            raise ConnectionError("Grafana is unreachable")
+        return {"org": "Main"}
+
+    async def folders(self):
+        self.calls["folders"] += 1
+        raise RuntimeError("forbidden")
+
+    def test_retries_required_steps_until_ready(self):
+        warmup = Warmup({"token": self.token, "folders": self.folders}, required=["token"], retry_delay=0.001)
+        self.assertFalse(warmup.ready)
+        self.assertTrue(asyncio.run(warmup.run()))
+
+        status = warmup.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["attempts"], 3)
+        self.assertEqual(status["steps"]["token"]["result"], {"org": "Main"})
+        # Optional steps are run once and only reported
+        self.assertEqual(status["steps"]["folders"]["error"], "forbidden")
+        self.assertEqual(self.calls, {"token": 3, "folders": 1})
+
+    def test_not_ready_while_retrying(self):
+        async def main():
+            warmup = Warmup({"token": self.token}, required=["token"], retry_delay=10)
+            task = asyncio.ensure_future(warmup.run())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            return warmup.status()
+
+        status = asyncio.run(main())
+        self.assertEqual((status["ready"], status["state"]), (False, "retrying"))
+        self.assertEqual(status["steps"]["token"]["error"], "Grafana is unreachable")
+
+
+if __name__ == "__main__":
+    unittest.main()